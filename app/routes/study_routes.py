@@ -1,18 +1,21 @@
 from flask import Blueprint, jsonify, request
 from modules.study_manager import StudyManager
+from backend.session_manager import owner_from
+from backend.core.http_cache import conditional_json
 
 bp = Blueprint('study', __name__, url_prefix='/api/study')
 study_manager = StudyManager()
 
 @bp.route('/sessions', methods=['GET'])
 def get_study_sessions():
-    sessions = study_manager.get_all_sessions()
-    return jsonify(sessions)
+    return conditional_json(study_manager.store.version("sessions"), study_manager.get_all_sessions)
 
 @bp.route('/sessions', methods=['POST'])
 def create_study_session():
     session_data = request.json
-    session = study_manager.start_session(session_data)
+    session = study_manager.start_session(session_data, owner_from(request))
+    if session is None:
+        return jsonify({"error": "Invalid subject or a session is already running"}), 400
     return jsonify(session), 201
 
 @bp.route('/sessions/<int:session_id>', methods=['GET'])
@@ -25,7 +28,10 @@ def get_study_session(session_id):
 @bp.route('/sessions/<int:session_id>', methods=['PUT'])
 def update_study_session(session_id):
     session_data = request.json
-    session = study_manager.update_session(session_id, session_data)
+    try:
+        session = study_manager.update_session(session_id, session_data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     if session:
         return jsonify(session)
     return jsonify({"error": "Study session not found"}), 404
@@ -40,7 +46,7 @@ def delete_study_session(session_id):
 # Compatibility endpoints used by external tests/CLI
 @bp.route('/status', methods=['GET'])
 def study_status():
-    status = study_manager.get_status()
+    status = study_manager.get_status(owner_from(request))
     if status:
         return jsonify(status)
     # Return a JSON body even when no active session exists so clients can
@@ -51,7 +57,7 @@ def study_status():
 @bp.route('/start', methods=['POST'])
 def study_start():
     data = request.json or {}
-    session = study_manager.start_session(data)
+    session = study_manager.start_session(data, owner_from(request))
     if session:
         return jsonify(session), 200
     return jsonify({"error": "Invalid subject or could not start session"}), 400
@@ -59,7 +65,7 @@ def study_start():
 
 @bp.route('/stop', methods=['POST'])
 def study_stop():
-    saved = study_manager.stop_active_session(save=True)
+    saved = study_manager.stop_active_session(save=True, owner=owner_from(request))
     if saved:
         return jsonify(saved), 200
     return jsonify({"error": "No active session to stop"}), 404
\ No newline at end of file
@@ -1,12 +1,13 @@
 from backend.socket import socketio, _app
+from backend.socket.emitter import emitter
 from backend.core.clock_system import ClockManager
 from backend.core.automation import AutomationEngine
 from backend.core.maintenance import AutoRecovery
 from modules import utils
 
 # Initialize Core Systems
-clock_manager = ClockManager(socketio)
-automation_engine = AutomationEngine(socketio)
+clock_manager = ClockManager(emitter)
+automation_engine = AutomationEngine(emitter)
 recovery_system = AutoRecovery()
 
 # Perform startup integrity checks
@@ -27,6 +28,7 @@ from backend.routes.subjects_routes import bp as subjects_bp
 from backend.routes.study_routes import bp as study_bp
 from backend.routes.clock_routes import bp as clock_bp
 from backend.routes.activity_routes import bp as activity_bp
+from backend.routes.changes_routes import bp as changes_bp
 
 # import socket events
 import backend.socket.events as socket_events
@@ -38,6 +40,7 @@ _app.register_blueprint(subjects_bp)
 _app.register_blueprint(study_bp)
 _app.register_blueprint(clock_bp)
 _app.register_blueprint(activity_bp)
+_app.register_blueprint(changes_bp)
 
 @_app.before_request
 def log_request_info():
@@ -0,0 +1,88 @@
+# backend/core/changelog.py
+"""Bounded log of task, note and subject mutations for delta sync.
+
+Every mutation made through the API routes gets the next global revision
+number. A client that remembers the revision it last saw can ask for just
+the changes after it (GET /api/changes?since=<rev>) instead of refetching
+every collection. Only the newest CHANGE_LOG_SIZE entries are kept; older
+revisions get a "resync" answer.
+"""
+import threading
+import time
+from collections import deque
+
+CHANGE_LOG_SIZE = 1000
+
+
+class ChangeLog:
+    def __init__(self, size=CHANGE_LOG_SIZE, start=None):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+        # Start from the boot time in ms so revisions keep increasing across
+        # restarts; a revision from before this process is below the floor.
+        self._revision = int(time.time() * 1000) if start is None else start
+        self._floor = self._revision
+
+    @property
+    def revision(self):
+        with self._lock:
+            return self._revision
+
+    def record(self, collection, op, key, data=None):
+        """Log an "upsert" (with the full record) or "delete"; returns its revision."""
+        try:
+            hash(key)
+        except TypeError:
+            # since() groups changes by key; one bad entry would break it for everyone
+            raise TypeError(f"change key must be hashable, not {type(key).__name__}")
+        with self._lock:
+            self._revision += 1
+            if len(self._entries) == self._entries.maxlen:
+                # The evicted entry is no longer available to catch up from
+                self._floor = self._entries[0]["revision"]
+            self._entries.append({
+                "revision": self._revision,
+                "collection": collection,
+                "op": op,
+                "key": key,
+                "data": dict(data) if data is not None else None
+            })
+            return self._revision
+
+    def since(self, revision):
+        """Return (changes, current revision) for everything after revision.
+
+        changes maps collection -> {"upserts": [records], "deletes": [keys]},
+        keeping only the latest change per record. It is None when the log no
+        longer reaches back to revision and the client must refetch.
+        """
+        with self._lock:
+            current = self._revision
+            if revision < self._floor or revision > current:
+                return None, current
+            newer = []
+            for entry in reversed(self._entries):
+                if entry["revision"] <= revision:
+                    break
+                newer.append(entry)
+
+        latest = {}
+        for entry in reversed(newer):
+            key = (entry["collection"], entry["key"])
+            latest.pop(key, None)  # re-insert so the order follows the last change
+            latest[key] = entry
+        changes = {}
+        for entry in latest.values():
+            bucket = changes.setdefault(entry["collection"], {"upserts": [], "deletes": []})
+            if entry["op"] == "delete":
+                bucket["deletes"].append(entry["key"])
+            else:
+                bucket["upserts"].append(entry["data"])
+        return changes, current
+
+
+change_log = ChangeLog()
+
+
+def record_change(collection, op, key, data=None):
+    return change_log.record(collection, op, key, data)
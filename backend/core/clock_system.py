@@ -1,89 +1,252 @@
+import heapq
 import json
 import os
 import time
 import threading
 from datetime import datetime
-import pytz
 from backend.core.logger import clock_logger
 from backend.core.maintenance import AutoRecovery
+from backend.core import recurrence
+from backend.core.timers import Timer
 
 ALARMS_FILE = os.path.join("data", "clock", "alarms.json")
-IST = pytz.timezone('Asia/Kolkata')
+IST = recurrence.IST
+TIME_FORMAT = recurrence.TIME_FORMAT
+# Upper bound on one sleep, so a wall-clock change is noticed within a minute
+MAX_SLEEP = 60
+MAX_ALARMS = 10000
+MAX_BULK_ALARMS = 1000
+MAX_TIMERS = 100
+# alarms.json is copied into data/backups at most this often (seconds)
+BACKUP_INTERVAL = 3600
+
+
+def parse_alarm_time(time_str):
+    """Epoch seconds for an alarm time ("YYYY-MM-DD HH:MM", IST), or None."""
+    try:
+        return recurrence.parse_time(time_str).timestamp()
+    except (TypeError, ValueError):
+        return None
+
 
 class ClockManager:
+    """Alarm store and scheduler.
+
+    Alarms are indexed by id and by (name, time), so lookups, duplicate
+    checks, toggles and deletes don't scan the list. Repeating alarms keep
+    their recurrence (see backend.core.recurrence) unchanged; the compiled
+    rule and the next fire time are cached per alarm and only recomputed
+    after it fires or is edited.
+
+    Enabled alarms and running countdown timers sit in one min-heap of
+    (fire_at, seq, kind, id) entries. The worker sleeps until the earliest
+    one is due, and every change wakes it so a new earliest entry is picked
+    up at once. Entries are not removed from the heap when an alarm or timer
+    changes; stale ones (fire_at no longer its cached due time) are skipped
+    when they reach the top.
+
+    Stopwatches and timers (backend.core.timers) live in memory only.
+    """
+
     def __init__(self, socketio=None):
-        self.alarms = []
         self.socketio = socketio
         self.recovery = AutoRecovery()
         self.running = False
         self.worker_thread = None
+        self._lock = threading.RLock()
+        self._by_id = {}   # id -> alarm, in creation order
+        self._by_key = {}  # (name, time) -> id
+        self._last_id = 0
+        self._last_backup = 0
+        self._heap = []
+        self._seq = 0
+        self._schedules = {}  # id -> compiled recurrence
+        self._next_fire = {}  # id -> epoch seconds of the next occurrence
+        self.timers = {}      # id -> Timer
+        self._timer_due = {}  # id -> epoch seconds a running countdown ends
+        self._timer_seq = 0
+        self._wake = None
         self._load_alarms()
 
+    @property
+    def alarms(self):
+        with self._lock:
+            return list(self._by_id.values())
+
+    @alarms.setter
+    def alarms(self, alarms):
+        with self._lock:
+            self._by_id = {a['id']: a for a in alarms}
+            self._by_key = {(a['name'], a['time']): a['id'] for a in alarms}
+            self._last_id = max([int(i) for i in self._by_id if str(i).isdigit()], default=0)
+            self._schedules = {}
+            self._next_fire = {}
+
     def start(self):
         """Starts the clock worker loop."""
         if not self.running:
             self.running = True
             if self.socketio:
+                # An Event matching the server's async mode (green under eventlet)
+                self._wake = self.socketio.server.eio.create_event()
                 self.socketio.start_background_task(self._worker_loop)
                 clock_logger.info("Clock system started (background task).")
             else:
+                self._wake = threading.Event()
                 self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
                 self.worker_thread.start()
                 clock_logger.info("Clock system started (thread).")
 
     def stop(self):
         self.running = False
+        self._notify()
         if self.worker_thread:
             self.worker_thread.join(timeout=1)
 
+    def _notify(self):
+        """Wake the worker so it re-reads the earliest due time."""
+        if self._wake is not None:
+            self._wake.set()
+
     def _worker_loop(self):
-        """Checks alarms every second."""
+        """Sleeps until the next alarm or timer is due (or the schedule changes)."""
         while self.running:
             try:
+                # Cleared before reading the heap: a change made after this
+                # point sets it again and cuts the wait short.
+                self._wake.clear()
                 triggered = self.check_alarms()
-                if triggered:
-                    for alarm in triggered:
-                        clock_logger.info(f"Triggering alarm: {alarm['name']}")
-                        if self.socketio:
-                            self.socketio.emit('alarm_triggered', alarm, namespace='/nari')
-                            
-                # Wait for next second
-                time.sleep(1)
+                for alarm in triggered:
+                    clock_logger.info(f"Triggering alarm: {alarm['name']}")
+                    if self.socketio:
+                        self.socketio.emit('alarm_triggered', alarm, namespace='/nari')
+                delay = self.next_due()
+                delay = MAX_SLEEP if delay is None else min(MAX_SLEEP, max(0.0, delay))
+                self._wake.wait(delay)
             except Exception as e:
                 clock_logger.error(f"Error in clock worker: {e}")
                 time.sleep(5)
 
+    def _schedule(self, alarm, after=None):
+        """Compute an alarm's next fire time and push it onto the heap
+        (caller holds the lock).
+
+        The next occurrence is the first one after `after` (epoch seconds).
+        By default that is a minute ago: an alarm still fires during its own
+        minute, while earlier occurrences are missed rather than fired late.
+        """
+        alarm_id = alarm['id']
+        self._next_fire.pop(alarm_id, None)
+        if not alarm.get('enabled'):
+            return
+        if after is None:
+            after = time.time() - 60
+        if recurrence.rule_of(alarm) is None:
+            fire_at = parse_alarm_time(alarm.get('time'))
+            if fire_at is None:
+                clock_logger.warning(f"Alarm {alarm.get('name')} has an invalid time: {alarm.get('time')}")
+                return
+            if fire_at <= after:
+                return
+        else:
+            schedule = self._schedules.get(alarm_id)
+            if schedule is None:
+                try:
+                    schedule = self._schedules[alarm_id] = recurrence.compile_schedule(alarm)
+                except ValueError as e:
+                    clock_logger.warning(f"Alarm {alarm.get('name')} has an invalid recurrence: {e}")
+                    return
+            fire_at = recurrence.next_after(schedule, after)
+            if fire_at is None:
+                return  # the rule has run out, or nothing is due within the horizon
+        self._next_fire[alarm_id] = fire_at
+        self._seq += 1
+        heapq.heappush(self._heap, (fire_at, self._seq, "alarm", alarm_id))
+
+    def _forget(self, alarm_id):
+        """Drop cached schedule state for an alarm (caller holds the lock)."""
+        self._schedules.pop(alarm_id, None)
+        self._next_fire.pop(alarm_id, None)
+
+    def _rebuild_heap(self):
+        with self._lock:
+            self._heap = []
+            for alarm in self.alarms:
+                self._schedule(alarm)
+            for timer in self.timers.values():
+                self._schedule_timer(timer)
+
+    def _current(self, entry):
+        """The alarm or timer a heap entry refers to, or None if the entry is stale."""
+        fire_at, _, kind, item_id = entry
+        if kind == "timer":
+            timer = self.timers.get(item_id)
+            if timer is not None and timer.running and self._timer_due.get(item_id) == fire_at:
+                return timer
+            return None
+        alarm = self._by_id.get(item_id)
+        if alarm is not None and alarm['enabled'] and self._next_fire.get(item_id) == fire_at:
+            return alarm
+        return None
+
+    def next_fire(self, alarm_id):
+        """Next fire time of an alarm as "YYYY-MM-DD HH:MM" (IST), or None."""
+        with self._lock:
+            fire_at = self._next_fire.get(alarm_id)
+        return datetime.fromtimestamp(fire_at, IST).strftime(TIME_FORMAT) if fire_at else None
+
+    def next_due(self, now=None):
+        """Seconds until the earliest enabled alarm or running timer (negative if overdue), or None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._heap and self._current(self._heap[0]) is None:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] - now if self._heap else None
+
     def _load_alarms(self):
         """Loads alarms from JSON with integrity check."""
         self.recovery.ensure_file_integrity(ALARMS_FILE, default_content=[])
         try:
             with open(ALARMS_FILE, 'r') as f:
-                self.alarms = json.load(f)
+                alarms = json.load(f)
                 
             # Check for missed alarms
-            now_str = datetime.now(IST).strftime("%Y-%m-%d %H:%M")
+            now_str = datetime.now(IST).strftime(TIME_FORMAT)
             missed = []
-            for alarm in self.alarms:
-                if alarm['enabled'] and alarm['time'] < now_str:
+            for alarm in alarms:
+                # Repeating alarms simply continue with their next occurrence
+                if alarm['enabled'] and recurrence.rule_of(alarm) is None and alarm['time'] < now_str:
                     missed.append(alarm)
                     clock_logger.warning(f"Missed alarm detected: {alarm['name']} at {alarm['time']}")
                     
             if missed:
                 clock_logger.info(f"Found {len(missed)} missed alarms on startup.")
+            self.alarms = alarms
                 
         except Exception as e:
             clock_logger.error(f"Failed to load alarms: {e}")
             self.alarms = []
+        self._rebuild_heap()
 
     def _save_alarms(self):
         """Saves alarms to JSON and updates hash."""
+        with self._lock:
+            self._write_alarms()
+
+    def _write_alarms(self):
         try:
-            # Create backup before save if file exists
-            if os.path.exists(ALARMS_FILE):
+            # Back up the previous version, but not on every change: with
+            # thousands of alarms that copied the whole file each time.
+            if os.path.exists(ALARMS_FILE) and time.time() - self._last_backup >= BACKUP_INTERVAL:
                 self.recovery.create_backup(ALARMS_FILE)
-                
-            with open(ALARMS_FILE, 'w') as f:
-                json.dump(self.alarms, f, indent=4)
+                self._last_backup = time.time()
+
+            # Written to a temp file and swapped in, so a crash mid-write
+            # leaves the old file rather than a truncated one
+            tmp_path = ALARMS_FILE + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.alarms, f, indent=1)
+            os.replace(tmp_path, ALARMS_FILE)
             
             # Update integrity hash
             self.recovery.integrity_checker.update_hash(ALARMS_FILE)
@@ -94,31 +257,63 @@ class ClockManager:
         """Returns current IST time."""
         return datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
 
-    def add_alarm(self, name, time_str, repeat=False):
-        """
-        Adds a new alarm.
-        time_str format: "YYYY-MM-DD HH:MM"
-        """
-        # Check max alarms
-        if len(self.alarms) >= 10:
-            clock_logger.warning("Max alarms (10) reached. Cannot add more.")
-            return False
+    def _check_new(self, alarm, pending=()):
+        """Why an alarm can't be added, or None if it can."""
+        name, time_str = alarm.get('name'), alarm.get('time')
+        if not name or not time_str:
+            return "Name and time are required"
+        if not isinstance(name, str) or not isinstance(time_str, str):
+            return "Name and time must be strings"
+        error = recurrence.validate(alarm)
+        if error:
+            return error
+        if (name, time_str) in self._by_key or (name, time_str) in pending:
+            return f"Duplicate alarm: {name} at {time_str}"
+        return None
 
-        # Check for duplicates
-        for alarm in self.alarms:
-            if alarm['name'] == name and alarm['time'] == time_str:
-                clock_logger.warning(f"Duplicate alarm blocked: {name} at {time_str}")
-                return False
+    @staticmethod
+    def _recurrence_fields(rule=None, rdates=None, exdates=None):
+        """The optional recurrence keys of an alarm record, without empty ones."""
+        fields = {"rule": rule, "rdates": list(rdates or ()), "exdates": list(exdates or ())}
+        return {k: v for k, v in fields.items() if v}
 
-        new_alarm = {
-            "id": str(int(time.time() * 1000)),
+    def _insert(self, name, time_str, repeat, **extra):
+        """Create, index and schedule an alarm (caller holds the lock)."""
+        # Millisecond ids, bumped when several are created in the same ms
+        self._last_id = max(self._last_id + 1, int(time.time() * 1000))
+        alarm = {
+            "id": str(self._last_id),
             "name": name,
             "time": time_str,
-            "repeat": repeat,
-            "enabled": True
+            "repeat": bool(repeat or extra.get('rule')),
+            "enabled": True,
+            **extra
         }
-        self.alarms.append(new_alarm)
+        self._by_id[alarm['id']] = alarm
+        self._by_key[(name, time_str)] = alarm['id']
+        self._schedule(alarm)
+        return alarm
+
+    def add_alarm(self, name, time_str, repeat=False, rule=None, rdates=None, exdates=None):
+        """
+        Adds a new alarm.
+        time_str format: "YYYY-MM-DD HH:MM" (the first occurrence if it repeats)
+        repeat=True without a rule repeats daily; rule is an RRULE such as
+        "FREQ=WEEKLY;BYDAY=MO,WE" (see backend.core.recurrence).
+        """
+        with self._lock:
+            if len(self._by_id) >= MAX_ALARMS:
+                clock_logger.warning(f"Max alarms ({MAX_ALARMS}) reached. Cannot add more.")
+                return False
+            error = self._check_new({"name": name, "time": time_str, "repeat": repeat,
+                                     "rule": rule, "rdates": rdates, "exdates": exdates})
+            if error:
+                clock_logger.warning(f"Alarm blocked: {error}")
+                return False
+            extra = self._recurrence_fields(rule, rdates, exdates)
+            new_alarm = self._insert(name, time_str, repeat, **extra)
         self._save_alarms()
+        self._notify()
         clock_logger.info(f"Alarm added: {name} at {time_str}")
         
         # Emit Socket.IO event
@@ -127,61 +322,232 @@ class ClockManager:
         
         return new_alarm
 
+    def add_alarms(self, items):
+        """
+        Adds many alarms with a single save, e.g. generated from a timetable.
+        items: [{"name", "time", "repeat", "rule", "rdates", "exdates"}]. Either all are added or none:
+        returns (True, alarms) or (False, errors) with an error or None per item.
+        """
+        with self._lock:
+            if len(self._by_id) + len(items) > MAX_ALARMS:
+                return False, [f"At most {MAX_ALARMS} alarms in total"] * len(items)
+            errors = []
+            pending = set()
+            for item in items:
+                if not isinstance(item, dict):
+                    errors.append("Each alarm must be an object")
+                    continue
+                error = self._check_new(item, pending)
+                errors.append(error)
+                if not error:
+                    pending.add((item['name'], item['time']))
+            if any(errors):
+                return False, errors
+            added = [self._insert(item['name'], item['time'], bool(item.get('repeat', False)),
+                                  **self._recurrence_fields(item.get('rule'), item.get('rdates'), item.get('exdates')))
+                     for item in items]
+        self._save_alarms()
+        self._notify()
+        clock_logger.info(f"{len(added)} alarms added")
+        if self.socketio:
+            for alarm in added:
+                self.socketio.emit('alarm_added', alarm, namespace='/nari')
+        return True, added
+
     def delete_alarm(self, alarm_id):
-        self.alarms = [a for a in self.alarms if a['id'] != alarm_id]
+        with self._lock:
+            alarm = self._by_id.pop(alarm_id, None)
+            if alarm is None:
+                return False
+            if self._by_key.get((alarm['name'], alarm['time'])) == alarm_id:
+                del self._by_key[(alarm['name'], alarm['time'])]
+            self._forget(alarm_id)
+        # Its heap entry goes stale and is dropped when it reaches the top
         self._save_alarms()
+        self._notify()
         clock_logger.info(f"Alarm deleted: {alarm_id}")
         
         # Emit Socket.IO event
         if self.socketio:
             self.socketio.emit('alarm_deleted', {'id': alarm_id}, namespace='/nari')
+        return True
 
     def toggle_alarm(self, alarm_id, enabled):
-        for alarm in self.alarms:
-            if alarm['id'] == alarm_id:
-                alarm['enabled'] = enabled
-                self._save_alarms()
-                clock_logger.info(f"Alarm {alarm_id} toggled to {enabled}")
-                
-                # Emit Socket.IO event
-                if self.socketio:
-                    self.socketio.emit('alarm_updated', alarm, namespace='/nari')
-                
-                return True
-        return False
+        with self._lock:
+            alarm = self._by_id.get(alarm_id)
+            if alarm is None:
+                return False
+            was_enabled = alarm['enabled']
+            alarm['enabled'] = enabled
+            if enabled != was_enabled:
+                self._schedule(alarm)
+        self._save_alarms()
+        self._notify()
+        clock_logger.info(f"Alarm {alarm_id} toggled to {enabled}")
+        
+        # Emit Socket.IO event
+        if self.socketio:
+            self.socketio.emit('alarm_updated', alarm, namespace='/nari')
+        
+        return True
 
-    def check_alarms(self):
+    EDITABLE_FIELDS = ("name", "time", "repeat", "rule", "rdates", "exdates")
+
+    def update_alarm(self, alarm_id, fields):
         """
-        Checks if any alarms should trigger.
-        Returns a list of triggered alarms.
+        Edits an alarm's name, time or recurrence; its next fire time is
+        recomputed. Returns (True, alarm), or (False, error) with error None
+        if there is no such alarm.
         """
-        now_str = datetime.now(IST).strftime("%Y-%m-%d %H:%M")
-        triggered = []
-
-        # Debug logging
-        if self.alarms:
-            clock_logger.debug(f"Checking alarms at {now_str}, have {len(self.alarms)} alarm(s)")
-            for alarm in self.alarms:
-                clock_logger.debug(f"  Alarm: {alarm['name']} - time: {alarm['time']}, enabled: {alarm['enabled']}, match: {alarm['time'] == now_str}")
+        with self._lock:
+            alarm = self._by_id.get(alarm_id)
+            if alarm is None:
+                return False, None
+            changes = {k: v for k, v in fields.items() if k in self.EDITABLE_FIELDS}
+            updated = dict(alarm, **changes)
+            for key in ("rule", "rdates", "exdates"):
+                if not updated.get(key):
+                    updated.pop(key, None)
+            old_key, new_key = (alarm['name'], alarm['time']), (updated.get('name'), updated.get('time'))
+            if not updated.get('name'):
+                error = "Name and time are required"
+            elif not isinstance(updated['name'], str) or not isinstance(updated.get('time'), str):
+                error = "Name and time must be strings"
+            else:
+                error = recurrence.validate(updated)
+            if not error and new_key != old_key and new_key in self._by_key:
+                error = f"Duplicate alarm: {new_key[0]} at {new_key[1]}"
+            if error:
+                return False, error
+            if updated.get('rule'):
+                updated['repeat'] = True
+            alarm.clear()
+            alarm.update(updated)
+            del self._by_key[old_key]
+            self._by_key[new_key] = alarm_id
+            self._forget(alarm_id)
+            self._schedule(alarm)
+        self._save_alarms()
+        self._notify()
+        clock_logger.info(f"Alarm {alarm_id} updated")
+        if self.socketio:
+            self.socketio.emit('alarm_updated', alarm, namespace='/nari')
+        return True, alarm
 
-        for alarm in self.alarms:
-            if alarm['enabled'] and alarm['time'] == now_str:
-                triggered.append(alarm)
-                
-        # Process updates after iteration to avoid modifying list while iterating
-        if triggered:
-            for alarm in triggered:
-                if alarm['repeat']:
-                    dt = datetime.strptime(alarm['time'], "%Y-%m-%d %H:%M")
-                    # Add 1 day
-                    from datetime import timedelta
-                    next_day = dt + timedelta(days=1)
-                    alarm['time'] = next_day.strftime("%Y-%m-%d %H:%M")
-                    clock_logger.info(f"Rescheduled repeating alarm {alarm['name']} to {alarm['time']}")
+    def check_alarms(self, now=None):
+        """
+        Pops and returns the alarms that are due (fire time <= now), each
+        with the "occurrence" it fired for. Repeating alarms move on to their
+        next occurrence (nothing is saved); one-time alarms are disabled.
+        """
+        now = time.time() if now is None else now
+        triggered = []
+        finished = []
+        disabled = False
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                alarm = self._current(entry)
+                if alarm is None:
+                    continue
+                if entry[2] == "timer":
+                    # The monotonic clock has the final say; the wall clock
+                    # used for the heap may have been changed meanwhile
+                    if alarm.remaining() > 0.005:
+                        self._schedule_timer(alarm)
+                    else:
+                        alarm.finish()
+                        self._timer_due.pop(alarm.id, None)
+                        finished.append(alarm.state())
+                    continue
+                occurrence = datetime.fromtimestamp(entry[0], IST).strftime(TIME_FORMAT)
+                triggered.append(dict(alarm, occurrence=occurrence))
+                if recurrence.rule_of(alarm) is not None:
+                    self._schedule(alarm, after=entry[0])
+                    clock_logger.info(f"Next occurrence of {alarm['name']}: {self.next_fire(alarm['id'])}")
                 else:
                     alarm['enabled'] = False
+                    self._next_fire.pop(alarm['id'], None)
+                    disabled = True
                     clock_logger.info(f"Disabled one-time alarm {alarm['name']}")
-            
+
+        if disabled:
             self._save_alarms()
-            
+        for state in finished:
+            clock_logger.info(f"Timer finished: {state['name']}")
+            if self.socketio:
+                self.socketio.emit('timer_finished', state, namespace='/nari')
+
         return triggered
+
+    # -------------------------
+    # Stopwatches & timers
+    # -------------------------
+    def _schedule_timer(self, timer):
+        """Queue a running countdown's end on the heap (caller holds the lock)."""
+        self._timer_due.pop(timer.id, None)
+        if timer.kind != "timer" or not timer.running:
+            return
+        fire_at = time.time() + timer.remaining()
+        self._timer_due[timer.id] = fire_at
+        self._seq += 1
+        heapq.heappush(self._heap, (fire_at, self._seq, "timer", timer.id))
+
+    def _timer_changed(self, timer, event='timer_updated'):
+        state = timer.state()
+        if self.socketio:
+            self.socketio.emit(event, state, namespace='/nari')
+        return state
+
+    def list_timers(self):
+        with self._lock:
+            return [t.state() for t in self.timers.values()]
+
+    def create_timer(self, name, kind="stopwatch", duration=None):
+        """Create a stopwatch or a countdown timer (duration in seconds).
+
+        Returns (True, state) or (False, error).
+        """
+        if not name:
+            return False, "name is required"
+        with self._lock:
+            if len(self.timers) >= MAX_TIMERS:
+                return False, f"at most {MAX_TIMERS} timers"
+            self._timer_seq += 1
+            try:
+                timer = Timer(str(self._timer_seq), name, kind, duration)
+            except ValueError as e:
+                self._timer_seq -= 1
+                return False, str(e)
+            self.timers[timer.id] = timer
+        return True, self._timer_changed(timer)
+
+    def control_timer(self, timer_id, action):
+        """Apply start, pause, lap or reset to a timer.
+
+        Returns (True, state), or (False, error) with error None if there is
+        no such timer.
+        """
+        if action not in ("start", "pause", "lap", "reset"):
+            return False, f"unknown action {action!r}"
+        with self._lock:
+            timer = self.timers.get(timer_id)
+            if timer is None:
+                return False, None
+            try:
+                getattr(timer, action)()
+            except ValueError as e:
+                return False, str(e)
+            self._schedule_timer(timer)
+        self._notify()
+        return True, self._timer_changed(timer)
+
+    def delete_timer(self, timer_id):
+        with self._lock:
+            timer = self.timers.pop(timer_id, None)
+            self._timer_due.pop(timer_id, None)
+        if timer is None:
+            return False
+        if self.socketio:
+            self.socketio.emit('timer_deleted', {'id': timer_id}, namespace='/nari')
+        return True
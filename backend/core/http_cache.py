@@ -0,0 +1,37 @@
+# backend/core/http_cache.py
+"""Conditional GET support for the JSON list endpoints.
+
+Each list is tagged with an ETag derived from its collection's version
+token (see storage backends' version() and utils.document_version()), so an
+unchanged list is answered with 304 Not Modified before it is loaded or
+serialised.
+"""
+import hashlib
+import os
+from flask import Response, jsonify, request
+
+# Write counters restart with the process; the boot id keeps ETags handed
+# out by a previous run from matching by accident.
+BOOT_ID = os.urandom(4).hex()
+
+
+def make_etag(*parts):
+    raw = repr((BOOT_ID,) + parts).encode()
+    return hashlib.sha1(raw).hexdigest()[:20]
+
+
+def conditional_json(version, build):
+    """Return jsonify(build()) tagged with an ETag, or 304 if the client has it.
+
+    version is any token that changes whenever the underlying data does; the
+    request path and query string are part of the tag as well.
+    """
+    etag = make_etag(request.full_path, version)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    # Let browsers keep the body but always revalidate it
+    response.headers["Cache-Control"] = "no-cache"
+    return response
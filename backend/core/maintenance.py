@@ -1,13 +1,41 @@
 import os
 import json
 import hashlib
+import re
 import shutil
+import tempfile
+import threading
 import time
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from backend.core.logger import recovery_logger, system_logger
+from modules import utils
 
 HASH_FILE = os.path.join("data", "core", "hashes.json")
 BACKUP_DIR = os.path.join("data", "backups")
+OBJECTS_DIR = os.path.join(BACKUP_DIR, "objects")
+MANIFESTS_DIR = os.path.join(BACKUP_DIR, "manifests")
+LOCK_FILE = os.path.join(BACKUP_DIR, ".lock")
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+LEGACY_DIRNAME = "legacy"
+RETENTION_ENV = "NARI_BACKUP_RETENTION"
+DEFAULT_RETENTION = {"last": 10, "hourly": 24, "daily": 30}
+PRUNE_INTERVAL = 3600  # seconds between background prune runs
+
+_TIMESTAMP_DIR = re.compile(r"^\d{8}_\d{6}$")
+
+
+def _run_blocking(fn, *args):
+    """Call fn(*args). Under eventlet's monkey patching the call goes to its
+    pool of OS threads, so long file I/O doesn't stall the green threads
+    serving requests."""
+    try:
+        from eventlet import patcher, tpool
+    except ImportError:
+        return fn(*args)
+    if patcher.is_monkey_patched("thread"):
+        return tpool.execute(fn, *args)
+    return fn(*args)
 
 class IntegrityChecker:
     def __init__(self):
@@ -65,50 +93,295 @@ class IntegrityChecker:
         
         return True
 
+class BackupStore:
+    """Content-addressed backups with a per-file catalog.
+
+    Each distinct file content is stored once, named by its SHA-256::
+
+        data/backups/objects/3f/3fa9...e1
+        data/backups/manifests/data__clock__alarms.json.jsonl
+
+    and every backed-up file has a manifest with one line per backup,
+    {"time": "20251202_144907", "hash": "3fa9...e1"}, oldest first. Backing
+    up unchanged content only appends a manifest line. Parsed manifests are
+    cached (checked against the file's signature), so finding the newest
+    version of a file is a dictionary lookup.
+
+    Backups from the old data/backups/<timestamp>/<filename> layout only
+    know the file name; import_legacy() moves them into the store under
+    manifests/legacy/<filename>.jsonl and removes the folders.
+
+    prune() applies the retention policy (see retention_policy()) and
+    deletes objects no manifest refers to any more.
+    """
+    # Shared by every instance: ClockManager, AutomationEngine and the app
+    # each have their own AutoRecovery over the same directory.
+    _lock = threading.Lock()
+    _catalog = {}  # absolute manifest path -> (file signature, entries)
+
+    def __init__(self, integrity_checker):
+        self.integrity_checker = integrity_checker
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the store, across threads and processes.
+
+        The pruner runs on an OS thread (see AutoRecovery._prune_loop), so
+        the in-process lock is polled too rather than waited on: a green
+        lock can't be handed over between OS threads. Not reentrant.
+        """
+        while not self._lock.acquire(blocking=False):
+            time.sleep(utils.FILE_LOCK_POLL)
+        try:
+            with utils.file_lock(LOCK_FILE):
+                yield
+        finally:
+            self._lock.release()
+
+    def object_path(self, digest):
+        return os.path.join(OBJECTS_DIR, digest[:2], digest)
+
+    def manifest_path(self, file_path):
+        # Keyed by the whole path: files in different folders may share a name
+        name = os.path.relpath(os.path.abspath(file_path)).replace(os.sep, "__")
+        return os.path.join(MANIFESTS_DIR, name + ".jsonl")
+
+    def legacy_manifest_path(self, file_path):
+        return os.path.join(MANIFESTS_DIR, LEGACY_DIRNAME, os.path.basename(file_path) + ".jsonl")
+
+    def _store_object(self, file_path, digest):
+        """Copy a file into the object store unless its content is already there."""
+        dest = self.object_path(digest)
+        if os.path.exists(dest):
+            return digest
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copy2(file_path, tmp)
+            # The file may have been rewritten since it was hashed
+            copied = self.integrity_checker.calculate_hash(tmp)
+            if copied != digest:
+                digest, dest = copied, self.object_path(copied)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if os.path.exists(dest):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return digest
+
+    # -------------------------
+    # Manifests
+    # -------------------------
+    def _read_manifest(self, manifest):
+        """Entries of a manifest, from the catalog if the file is unchanged."""
+        key = os.path.abspath(manifest)
+        signature = utils.file_signature(manifest)
+        cached = self._catalog.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        entries = []
+        if signature is not None:
+            with open(manifest, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a torn last line from a crash mid-append
+                    if isinstance(entry, dict) and entry.get("hash"):
+                        entries.append(entry)
+        self._catalog[key] = (signature, entries)
+        return entries
+
+    def _append(self, manifest, entries):
+        """Append entries to a manifest and to its catalog entry (lock held)."""
+        current = self._read_manifest(manifest)
+        os.makedirs(os.path.dirname(manifest), exist_ok=True)
+        with open(manifest, 'a') as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+        self._catalog[os.path.abspath(manifest)] = (utils.file_signature(manifest), current + entries)
+
+    def _rewrite(self, manifest, entries):
+        """Replace a manifest's entries (lock held)."""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(manifest), prefix=".tmp-")
+        with os.fdopen(fd, 'w') as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+        os.replace(tmp, manifest)
+        self._catalog[os.path.abspath(manifest)] = (utils.file_signature(manifest), list(entries))
+
+    def _manifests(self):
+        for root, _, files in os.walk(MANIFESTS_DIR):
+            for name in files:
+                if name.endswith(".jsonl"):
+                    yield os.path.join(root, name)
+
+    # -------------------------
+    # Backup & lookup
+    # -------------------------
+    def add(self, file_path):
+        """Back up a file. Returns its manifest entry, or None if it doesn't exist."""
+        digest = self.integrity_checker.calculate_hash(file_path)
+        if digest is None:
+            return None
+        # Held across both steps so prune() can't drop the object in between
+        with self._locked():
+            digest = self._store_object(file_path, digest)
+            entry = {"time": datetime.now().strftime(TIMESTAMP_FORMAT), "hash": digest}
+            self._append(self.manifest_path(file_path), [entry])
+        return entry
+
+    def versions(self, file_path):
+        """Manifest entries of a file, oldest first."""
+        with self._locked():
+            return list(self._read_manifest(self.manifest_path(file_path)))
+
+    def latest(self, file_path):
+        """Object path of the newest intact backup of a file, or None.
+
+        Falls back to imported legacy backups of the same file name.
+        """
+        with self._locked():
+            for manifest in (self.manifest_path(file_path), self.legacy_manifest_path(file_path)):
+                for entry in reversed(self._read_manifest(manifest)):
+                    path = self.object_path(entry["hash"])
+                    if self.integrity_checker.calculate_hash(path) == entry["hash"]:
+                        return path
+                    recovery_logger.warning(f"Backup object {entry['hash']} of {file_path} is missing or damaged")
+        return None
+
+    # -------------------------
+    # Legacy folders & retention
+    # -------------------------
+    def import_legacy(self):
+        """Move data/backups/<timestamp>/ folders into the store.
+
+        Returns the number of files imported. Cheap when there is nothing
+        to import: one listing of data/backups.
+        """
+        if not os.path.isdir(BACKUP_DIR):
+            return 0
+        folders = sorted(name for name in os.listdir(BACKUP_DIR) if _TIMESTAMP_DIR.match(name))
+        if not folders:
+            return 0
+        by_name = {}
+        for folder in folders:
+            folder_path = os.path.join(BACKUP_DIR, folder)
+            for name in sorted(os.listdir(folder_path)):
+                path = os.path.join(folder_path, name)
+                digest = self.integrity_checker.calculate_hash(path) if os.path.isfile(path) else None
+                if digest is not None:
+                    by_name.setdefault(name, []).append((folder, path, digest))
+        count = 0
+        with self._locked():
+            for name, copies in by_name.items():
+                entries = [{"time": folder, "hash": self._store_object(path, digest)}
+                           for folder, path, digest in copies]
+                manifest = self.legacy_manifest_path(name)
+                merged = sorted(self._read_manifest(manifest) + entries, key=lambda e: e["time"])
+                os.makedirs(os.path.dirname(manifest), exist_ok=True)
+                self._rewrite(manifest, merged)
+                count += len(entries)
+            # Only once every copy is in the store
+            for folder in folders:
+                shutil.rmtree(os.path.join(BACKUP_DIR, folder), ignore_errors=True)
+        recovery_logger.info(f"Imported {count} backup(s) from {len(folders)} legacy folder(s)")
+        return count
+
+    def prune(self, policy=None, now=None):
+        """Apply the retention policy to every manifest and delete unreferenced
+        objects. Returns (versions dropped, objects deleted)."""
+        policy = policy or retention_policy()
+        self.import_legacy()
+        dropped = deleted = 0
+        with self._locked():
+            referenced = set()
+            for manifest in list(self._manifests()):
+                entries = self._read_manifest(manifest)
+                kept = select_versions(entries, policy, now)
+                if len(kept) < len(entries):
+                    self._rewrite(manifest, kept)
+                    dropped += len(entries) - len(kept)
+                referenced.update(e["hash"] for e in kept)
+            for root, _, files in os.walk(OBJECTS_DIR):
+                for name in files:
+                    if name not in referenced and not name.startswith(".tmp-"):
+                        os.remove(os.path.join(root, name))
+                        deleted += 1
+        if dropped or deleted:
+            recovery_logger.info(f"Pruned {dropped} backup version(s), deleted {deleted} object(s)")
+        return dropped, deleted
+
+
+def retention_policy(text=None):
+    """Retention settings from text like "last=10,hourly=24,daily=30"
+    (defaults to $NARI_BACKUP_RETENTION, then DEFAULT_RETENTION).
+
+    last:   always keep this many newest versions of each file
+    hourly: keep the newest version of every hour for this many hours
+    daily:  keep the newest version of every day for this many days
+    """
+    text = os.environ.get(RETENTION_ENV, "") if text is None else text
+    policy = dict(DEFAULT_RETENTION)
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        try:
+            value = int(value)
+        except ValueError:
+            value = -1
+        if key not in policy or value < 0:
+            recovery_logger.warning(f"Ignoring invalid backup retention setting {part!r}")
+            continue
+        policy[key] = value
+    return policy
+
+
+def select_versions(entries, policy, now=None):
+    """The entries (oldest first) that the retention policy keeps."""
+    now = now or datetime.now()
+    keep = set(range(max(0, len(entries) - policy["last"]), len(entries)))
+    hours, days = set(), set()
+    for i in range(len(entries) - 1, -1, -1):
+        try:
+            when = datetime.strptime(entries[i]["time"], TIMESTAMP_FORMAT)
+        except (KeyError, TypeError, ValueError):
+            keep.add(i)  # unknown age: never thrown away by the policy
+            continue
+        age = now - when
+        if age <= timedelta(hours=policy["hourly"]) and when.strftime("%Y%m%d%H") not in hours:
+            hours.add(when.strftime("%Y%m%d%H"))
+            keep.add(i)
+        if age <= timedelta(days=policy["daily"]) and when.date() not in days:
+            days.add(when.date())
+            keep.add(i)
+    return [entry for i, entry in enumerate(entries) if i in keep]
+
+
 class AutoRecovery:
     def __init__(self):
         self.integrity_checker = IntegrityChecker()
+        self.store = BackupStore(self.integrity_checker)
+        self._pruner = None
+        self._pruner_stop = threading.Event()
 
     def create_backup(self, file_path):
-        """Creates a timestamped backup of the file."""
-        if not os.path.exists(file_path):
-            return
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_folder = os.path.join(BACKUP_DIR, timestamp)
-        os.makedirs(backup_folder, exist_ok=True)
-        
-        filename = os.path.basename(file_path)
-        dest_path = os.path.join(backup_folder, filename)
-        
-        shutil.copy2(file_path, dest_path)
-        recovery_logger.info(f"Created backup for {file_path} at {dest_path}")
+        """Backs the file up into the content-addressed store."""
+        entry = self.store.add(file_path)
+        if entry:
+            recovery_logger.info(f"Created backup for {file_path} ({entry['hash'][:12]})")
 
     def restore_from_backup(self, file_path):
         """Restores the file from the most recent backup."""
-        filename = os.path.basename(file_path)
-        
-        # Find all backups containing this file
-        backups = []
-        if not os.path.exists(BACKUP_DIR):
-            recovery_logger.error("No backup directory found.")
-            return False
-
-        for ts_folder in os.listdir(BACKUP_DIR):
-            ts_path = os.path.join(BACKUP_DIR, ts_folder)
-            if os.path.isdir(ts_path):
-                potential_backup = os.path.join(ts_path, filename)
-                if os.path.exists(potential_backup):
-                    backups.append(potential_backup)
-        
-        if not backups:
+        self.store.import_legacy()
+        latest_backup = self.store.latest(file_path)
+        if latest_backup is None:
             recovery_logger.error(f"No backups found for {file_path}")
             return False
-        
-        # Sort by timestamp (folder name)
-        backups.sort(reverse=True)
-        latest_backup = backups[0]
-        
+
         try:
             shutil.copy2(latest_backup, file_path)
             recovery_logger.info(f"Restored {file_path} from {latest_backup}")
@@ -118,6 +391,28 @@ class AutoRecovery:
             recovery_logger.error(f"Failed to restore {file_path}: {e}")
             return False
 
+    def start_pruner(self, interval=PRUNE_INTERVAL):
+        """Prune backups now and then every `interval` seconds, in the background."""
+        if self._pruner and self._pruner.is_alive():
+            return
+        self._pruner_stop.clear()
+        self._pruner = threading.Thread(target=self._prune_loop, args=(interval,), daemon=True)
+        self._pruner.start()
+        system_logger.info("Backup pruner started")
+
+    def stop_pruner(self):
+        self._pruner_stop.set()
+        if self._pruner:
+            self._pruner.join(timeout=1)
+
+    def _prune_loop(self, interval):
+        while not self._pruner_stop.is_set():
+            try:
+                _run_blocking(self.store.prune)
+            except Exception as e:
+                recovery_logger.error(f"Backup pruning failed: {e}")
+            self._pruner_stop.wait(interval)
+
     def ensure_file_integrity(self, file_path, default_content={}):
         """
         Checks integrity, attempts repair/restore if needed.
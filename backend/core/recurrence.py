@@ -0,0 +1,187 @@
+"""Recurrence rules for alarms.
+
+A repeating alarm keeps its first occurrence in "time" and describes the
+rest with an RFC 5545 RRULE (without DTSTART), optionally with extra dates
+and exclusions::
+
+    {"time": "2025-01-06 08:50", "rule": "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+     "rdates": ["2025-02-01 10:00"], "exdates": ["2025-01-08 08:50"]}
+
+Examples: "FREQ=DAILY" (what the old repeat flag meant),
+"FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR", "FREQ=HOURLY;INTERVAL=3",
+"FREQ=MONTHLY;BYMONTHDAY=1;COUNT=6". All times are IST, "YYYY-MM-DD HH:MM".
+
+Occurrences are only looked for HORIZON_YEARS ahead, and a rule must have
+one within HORIZON_YEARS of the alarm time.
+"""
+import calendar
+import re
+from datetime import date, datetime, MAXYEAR
+import pytz
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rrule, rrulestr, rruleset
+
+IST = pytz.timezone('Asia/Kolkata')
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+# The scheduler works in minutes; finer rules would only flood clients
+FORBIDDEN_FREQS = ("SECONDLY", "MINUTELY")
+LEGACY_RULE = "FREQ=DAILY"
+# How far ahead the next occurrence is looked for; a yearly Feb 29 is at
+# most 8 years away
+HORIZON_YEARS = 10
+_UNTIL = re.compile(r"UNTIL=(\d{4})(\d{4})([^;]*);?", re.IGNORECASE)
+
+
+def parse_time(time_str):
+    """Aware IST datetime for "YYYY-MM-DD HH:MM" (ValueError if malformed)."""
+    return IST.localize(datetime.strptime(time_str, TIME_FORMAT))
+
+
+def rule_of(alarm):
+    """The RRULE text of an alarm, or None for a one-time alarm."""
+    rule = alarm.get('rule')
+    if rule:
+        return rule
+    return LEGACY_RULE if alarm.get('repeat') else None
+
+
+def _shift_years(first_year, last_year):
+    """Years to add to first_year..last_year so they end just before
+    MAXYEAR with the same weekdays and leap days.
+
+    dateutil only gives up looking for an occurrence at MAXYEAR, so a rule
+    that never matches scans the whole calendar; moved to its end, the scan
+    is short. A run of years that skips no leap day matches one in 9901..9999
+    starting on the same weekday and leap-year phase; otherwise whole 400-year
+    cycles are used.
+    """
+    def skips_leap_day(a, b):
+        return any(y % 100 == 0 and y % 400 for y in range(a, b + 1))
+
+    if not skips_leap_day(first_year, last_year):
+        weekday = date(first_year, 1, 1).weekday()
+        for target in range(MAXYEAR - (last_year - first_year), 9900, -1):
+            if target % 4 == first_year % 4 and date(target, 1, 1).weekday() == weekday:
+                return target - first_year
+    return (MAXYEAR - last_year) // 400 * 400
+
+
+def _shift(when, years):
+    return when.replace(year=when.year + years)
+
+
+def _shift_until(text, years):
+    """Move a rule's UNTIL `years` later. Only dates in the searched years
+    keep their weekday; one outside them just has to stay outside."""
+    def move(m):
+        year, month_day = int(m.group(1)) + years, m.group(2)
+        if year > MAXYEAR:
+            return ""  # after the searched years: no limit within them
+        if month_day == "0229" and not calendar.isleap(year):
+            month_day = "0228"
+        return f"UNTIL={year:04d}{month_day}{m.group(3)};"
+    return _UNTIL.sub(move, text).rstrip(";")
+
+
+class Schedule:
+    """The occurrences of a repeating alarm (see compile_schedule)."""
+
+    def __init__(self, start, text, rdates, exdates):
+        self.start = start
+        self.text = text
+        self.rdates = rdates
+        self.exdates = exdates
+        self._years = None
+        self._set = None
+
+    def build(self, years=0):
+        """The rruleset, with every date moved `years` years later (dates
+        that can't be moved are outside the searched years and left out)."""
+        text = _shift_until(self.text, years) if years else self.text
+        rule = rrulestr(text, dtstart=_shift(self.start, years))
+        if not isinstance(rule, rrule):
+            raise ValueError("rule must be a single RRULE; use rdates and exdates for extra dates")
+        schedule = rruleset()
+        schedule.rrule(rule)
+        for dates, add in ((self.rdates, schedule.rdate), (self.exdates, schedule.exdate)):
+            for when in dates:
+                try:
+                    add(_shift(when, years))
+                except ValueError:
+                    pass
+        return schedule
+
+    def next_after(self, after):
+        """Epoch seconds of the first occurrence strictly after the epoch
+        `after`, or None if there is none within HORIZON_YEARS of it (or of
+        the alarm time, if that is later)."""
+        after = datetime.fromtimestamp(after, IST)
+        limit = max(after, self.start) + relativedelta(years=HORIZON_YEARS)
+        years = _shift_years(min(after, self.start).year, limit.year)
+        if years != self._years:
+            self._set, self._years = self.build(years), years
+        when = self._set.after(_shift(after, years), inc=False)
+        if when is None or when > _shift(limit, years):
+            return None
+        return _shift(when, -years).timestamp()
+
+
+def compile_schedule(alarm):
+    """Build the occurrence set of a repeating alarm.
+
+    Raises ValueError with a readable message if the time, rule or dates are
+    invalid. Returns None for a one-time alarm.
+    """
+    rule = rule_of(alarm)
+    if rule is None:
+        return None
+    start = parse_time(alarm['time'])
+    text = rule.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+    if "DTSTART" in text.upper():
+        raise ValueError("rule must not contain DTSTART; the alarm time is the first occurrence")
+    if any(f"FREQ={freq}" in text.upper() for freq in FORBIDDEN_FREQS):
+        raise ValueError("rule frequency must be HOURLY or coarser")
+    dates = {}
+    for field in ('rdates', 'exdates'):
+        dates[field] = []
+        for when in alarm.get(field) or ():
+            try:
+                dates[field].append(parse_time(when))
+            except (TypeError, ValueError):
+                raise ValueError(f"invalid date {when!r} in {field}, expected YYYY-MM-DD HH:MM")
+    schedule = Schedule(start, text, dates['rdates'], dates['exdates'])
+    try:
+        schedule.build()
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid rule {rule!r}: {e}")
+    return schedule
+
+
+def validate(alarm):
+    """Error message for an alarm's time/rule/dates, or None if they are valid."""
+    rule = alarm.get('rule')
+    if rule is not None and not isinstance(rule, str):
+        return "rule must be a string such as FREQ=WEEKLY;BYDAY=MO"
+    for field in ('rdates', 'exdates'):
+        dates = alarm.get(field)
+        if dates is not None and (not isinstance(dates, list) or not all(isinstance(d, str) for d in dates)):
+            return f"{field} must be a list of YYYY-MM-DD HH:MM strings"
+    try:
+        parse_time(alarm.get('time'))
+    except (TypeError, ValueError):
+        return f"Invalid time {alarm.get('time')!r}, expected YYYY-MM-DD HH:MM"
+    try:
+        schedule = compile_schedule(alarm)
+    except ValueError as e:
+        return str(e)
+    if schedule is not None and schedule.next_after(schedule.start.timestamp() - 1) is None:
+        return f"rule has no occurrence within {HORIZON_YEARS} years of the alarm time"
+    return None
+
+
+def next_after(schedule, after):
+    """Epoch seconds of the next occurrence after the epoch `after`, or None
+    (see Schedule.next_after)."""
+    return schedule.next_after(after)
@@ -0,0 +1,99 @@
+"""Stopwatches and countdown timers kept on the server.
+
+Time is measured with time.monotonic(), so wall-clock changes don't move a
+running timer, and nothing ticks: a timer only stores how much time had
+accumulated when it was last paused plus the monotonic instant it was
+started. Clients get a compact state snapshot on every change::
+
+    {"id": "3", "name": "pomodoro", "kind": "timer", "running": true,
+     "elapsed_ms": 61250, "duration_ms": 1500000, "laps_ms": [],
+     "finished": false, "at": 1767700000000}
+
+and show ``elapsed_ms + (now - at)`` while ``running`` is true, where "at"
+is the server's wall clock (epoch ms) when the snapshot was taken.
+"""
+import time
+
+KINDS = ("stopwatch", "timer")
+MAX_LAPS = 1000
+
+
+class Timer:
+    def __init__(self, timer_id, name, kind="stopwatch", duration=None, clock=time.monotonic):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if kind == "timer":
+            if not isinstance(duration, (int, float)) or isinstance(duration, bool) or duration <= 0:
+                raise ValueError("a timer needs a positive duration in seconds")
+        self.id = timer_id
+        self.name = name
+        self.kind = kind
+        self.duration = float(duration) if kind == "timer" else None
+        self._clock = clock
+        self._accumulated = 0.0
+        self._started = None  # monotonic instant of the last start, while running
+        self.laps = []
+        self.finished = False
+
+    @property
+    def running(self):
+        return self._started is not None
+
+    def elapsed(self, now=None):
+        """Seconds counted so far (capped at the duration for a timer)."""
+        elapsed = self._accumulated
+        if self._started is not None:
+            elapsed += (self._clock() if now is None else now) - self._started
+        return min(elapsed, self.duration) if self.duration is not None else elapsed
+
+    def remaining(self, now=None):
+        """Seconds left on a timer (None for a stopwatch)."""
+        if self.duration is None:
+            return None
+        return max(0.0, self.duration - self.elapsed(now))
+
+    def start(self):
+        if self.finished:
+            raise ValueError("timer has finished; reset it first")
+        if self._started is None:
+            self._started = self._clock()
+
+    def pause(self):
+        if self._started is not None:
+            now = self._clock()
+            self._accumulated = self.elapsed(now)
+            self._started = None
+
+    def lap(self):
+        if self.kind != "stopwatch":
+            raise ValueError("only stopwatches record laps")
+        if len(self.laps) >= MAX_LAPS:
+            raise ValueError(f"at most {MAX_LAPS} laps")
+        self.laps.append(self.elapsed())
+
+    def reset(self):
+        self._accumulated = 0.0
+        self._started = None
+        self.laps = []
+        self.finished = False
+
+    def finish(self):
+        """Stop a timer that has run out."""
+        self._accumulated = self.duration
+        self._started = None
+        self.finished = True
+
+    def state(self):
+        """Compact snapshot for clients (see module docstring)."""
+        now = self._clock()
+        return {
+            "id": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "running": self.running,
+            "elapsed_ms": int(self.elapsed(now) * 1000),
+            "duration_ms": int(self.duration * 1000) if self.duration is not None else None,
+            "laps_ms": [int(lap * 1000) for lap in self.laps],
+            "finished": self.finished,
+            "at": int(time.time() * 1000)
+        }
@@ -1,8 +1,53 @@
-from flask import Blueprint, jsonify
-from modules import utils
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from modules import utils, activity_history
+from backend.core.http_cache import conditional_json
 
 bp = Blueprint("activity_routes", __name__)
 
+MAX_HISTORY_LIMIT = 5000
+HISTORY_PARAMS = ("from", "to", "limit", "q")
+
+def _parse_bound(value, end_of_day):
+    """Normalise a from/to bound to "YYYY-MM-DD HH:MM:SS" (None if invalid)."""
+    value = value.strip().replace("T", " ")
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y-%m-%d" and end_of_day:
+            parsed = parsed.replace(hour=23, minute=59, second=59)
+        return parsed.strftime("%Y-%m-%d %H:%M:%S")
+    return None
+
 @bp.route("/api/activity", methods=["GET"])
 def get_activity():
-    return jsonify(utils.get_activity_log())
+    """Recent activity, or a slice of the full history.
+
+    Without parameters this returns the in-memory console window. from and
+    to (inclusive; dates or "YYYY-MM-DD HH:MM[:SS]"), limit and q (text
+    search) query the day-segmented history instead, oldest first.
+    """
+    args = request.args
+    if not any(name in args for name in HISTORY_PARAMS):
+        return conditional_json(utils.activity_version(), utils.get_activity_log)
+
+    bounds = {}
+    for name in ("from", "to"):
+        if args.get(name):
+            bounds[name] = _parse_bound(args[name], end_of_day=(name == "to"))
+            if bounds[name] is None:
+                return jsonify({"error": f"{name} must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS"}), 400
+    try:
+        limit = int(args.get("limit", MAX_HISTORY_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_HISTORY_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {MAX_HISTORY_LIMIT}"}), 400
+
+    def build_history():
+        utils.flush(utils.ACTIVITY_LOG_FILE)  # include entries still being batched
+        return activity_history.query(bounds.get("from"), bounds.get("to"), limit, args.get("q"))
+
+    return conditional_json(utils.activity_version(), build_history)
@@ -0,0 +1,25 @@
+from flask import Blueprint, request, jsonify
+from backend.core.changelog import change_log
+
+bp = Blueprint("changes_routes", __name__)
+
+@bp.route("/api/changes", methods=["GET"])
+def get_changes():
+    """Task, note and subject changes after ?since=<revision>.
+
+    Without since (or when the log no longer reaches back that far) the
+    response has "resync": true and the client should refetch the lists,
+    then continue from the returned revision.
+    """
+    since = request.args.get("since")
+    if since is None:
+        return jsonify({"revision": change_log.revision, "resync": True, "changes": {}})
+    try:
+        since = int(since)
+    except ValueError:
+        return jsonify({"error": "since must be an integer revision"}), 400
+
+    changes, revision = change_log.since(since)
+    if changes is None:
+        return jsonify({"revision": revision, "resync": True, "changes": {}})
+    return jsonify({"revision": revision, "resync": False, "changes": changes})
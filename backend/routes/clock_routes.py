@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, current_app
 from backend.core.logger import clock_logger
+from backend.core.clock_system import MAX_BULK_ALARMS
 
 bp = Blueprint('clock', __name__, url_prefix='/api/clock')
 
@@ -9,7 +10,8 @@ def get_clock_manager():
 @bp.route('/alarms', methods=['GET'])
 def get_alarms():
     manager = get_clock_manager()
-    return jsonify(manager.alarms)
+    # Each alarm with its cached next fire time (null if it won't fire again)
+    return jsonify([dict(a, next=manager.next_fire(a['id'])) for a in manager.alarms])
 
 @bp.route('/alarms', methods=['POST'])
 def add_alarm():
@@ -22,13 +24,51 @@ def add_alarm():
         return jsonify({"error": "Name and time are required"}), 400
         
     manager = get_clock_manager()
-    result = manager.add_alarm(name, time_str, repeat)
+    result = manager.add_alarm(name, time_str, repeat, rule=data.get('rule'),
+                               rdates=data.get('rdates'), exdates=data.get('exdates'))
     
     if result:
         return jsonify(result), 201
     else:
         return jsonify({"error": "Duplicate alarm or invalid data"}), 400
 
+@bp.route('/alarms/bulk', methods=['POST'])
+def add_alarms():
+    """Add many alarms at once (e.g. from a class timetable).
+
+    Body: {"alarms": [{"name": ..., "time": "YYYY-MM-DD HH:MM", "repeat": false}, ...]}
+    Either every alarm is added or none is.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('alarms') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "alarms must be a non-empty list"}), 400
+    if len(items) > MAX_BULK_ALARMS:
+        return jsonify({"error": f"at most {MAX_BULK_ALARMS} alarms per request"}), 413
+
+    manager = get_clock_manager()
+    ok, result = manager.add_alarms(items)
+    if not ok:
+        return jsonify({
+            "error": "no alarms were added",
+            "results": [{"ok": False, "error": e or "not added"} for e in result]
+        }), 400
+    return jsonify({"alarms": result}), 201
+
+@bp.route('/alarms/<alarm_id>', methods=['PUT'])
+def update_alarm(alarm_id):
+    """Edit name, time, repeat, rule, rdates or exdates of an alarm."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "JSON object required"}), 400
+    manager = get_clock_manager()
+    ok, result = manager.update_alarm(alarm_id, data)
+    if ok:
+        return jsonify(dict(result, next=manager.next_fire(alarm_id)))
+    if result is None:
+        return jsonify({"error": "Alarm not found"}), 404
+    return jsonify({"error": result}), 400
+
 @bp.route('/alarms/<alarm_id>', methods=['DELETE'])
 def delete_alarm(alarm_id):
     manager = get_clock_manager()
@@ -46,6 +86,44 @@ def toggle_alarm(alarm_id):
     else:
         return jsonify({"error": "Alarm not found"}), 404
 
+@bp.route('/timers', methods=['GET'])
+def get_timers():
+    return jsonify(get_clock_manager().list_timers())
+
+@bp.route('/timers', methods=['POST'])
+def create_timer():
+    """Create a stopwatch or timer.
+
+    Body: {"name": ..., "kind": "stopwatch" | "timer", "duration": seconds}
+    (duration only for a timer). Pass "start": true to start it at once.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "JSON object required"}), 400
+    manager = get_clock_manager()
+    ok, result = manager.create_timer(data.get('name'), data.get('kind', 'stopwatch'), data.get('duration'))
+    if not ok:
+        return jsonify({"error": result}), 400
+    if data.get('start'):
+        ok, result = manager.control_timer(result['id'], 'start')
+    return jsonify(result), 201
+
+@bp.route('/timers/<timer_id>/<action>', methods=['POST'])
+def control_timer(timer_id, action):
+    """start, pause, lap or reset a timer; returns its new state."""
+    ok, result = get_clock_manager().control_timer(timer_id, action)
+    if ok:
+        return jsonify(result)
+    if result is None:
+        return jsonify({"error": "Timer not found"}), 404
+    return jsonify({"error": result}), 400
+
+@bp.route('/timers/<timer_id>', methods=['DELETE'])
+def delete_timer(timer_id):
+    if get_clock_manager().delete_timer(timer_id):
+        return jsonify({"success": True})
+    return jsonify({"error": "Timer not found"}), 404
+
 @bp.route('/alarms/dismiss', methods=['POST'])
 def dismiss_alarm():
     data = request.json
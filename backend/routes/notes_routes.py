@@ -1,83 +1,104 @@
 from flask import Blueprint, request, jsonify
-from modules import utils
-from backend.socket import socketio, NAMESPACE
+from modules import utils, repository
+from backend.socket import NAMESPACE
+from backend.socket.emitter import emitter
+from backend.core.http_cache import conditional_json
+from backend.core.changelog import record_change
 
 bp = Blueprint("notes_routes", __name__)
-NOTES_FILE = utils.NOTES_FILE
 
-def _read_notes():
-    data = utils.load_json(NOTES_FILE) or {}
-    return data.get("notes", [])
-
-def _write_notes(notes):
-    utils.save_json(NOTES_FILE, {"notes": notes})
+def _notes():
+    return repository.get_repository("notes")
 
-@bp.route("/api/notes", methods=["GET"])
-def list_notes():
-    return jsonify(_read_notes())
+def _read_notes():
+    return _notes().all()
 
-@bp.route("/api/notes", methods=["POST"])
-def create_note():
-    payload = request.get_json() or {}
+def _new_note(payload):
+    """Build a note record from a request payload; returns (note, error)."""
     title = payload.get("title")
-    content = payload.get("content", "")
-from flask import Blueprint, request, jsonify
-from modules import utils
-from backend.socket import socketio, NAMESPACE
-
-bp = Blueprint("notes_routes", __name__)
-NOTES_FILE = utils.NOTES_FILE
-
-def _read_notes():
-    data = utils.load_json(NOTES_FILE) or {}
-    return data.get("notes", [])
+    if not title:
+        return None, "title required"
+    return {"title": title, "content": payload.get("content", ""), "created": utils.timestamp()}, None
 
-def _write_notes(notes):
-    utils.save_json(NOTES_FILE, {"notes": notes})
+def _note_changes(payload):
+    """Fields to patch for an update payload."""
+    fields = {k: payload[k] for k in ("title", "content") if k in payload}
+    fields["updated"] = utils.timestamp()
+    return fields
 
 @bp.route("/api/notes", methods=["GET"])
 def list_notes():
-    return jsonify(_read_notes())
+    return conditional_json(_notes().version(), _read_notes)
 
 @bp.route("/api/notes", methods=["POST"])
 def create_note():
     payload = request.get_json() or {}
-    title = payload.get("title")
-    content = payload.get("content", "")
-    if not title:
-        return jsonify({"error": "title required"}), 400
-    notes = _read_notes()
-    new_id = utils.next_id(notes)
-    note = {"id": new_id, "title": title, "content": content, "created": utils.timestamp()}
-    notes.append(note)
-    _write_notes(notes)
-    socketio.emit("note_added", note, namespace=NAMESPACE)
-    utils.log_user_activity(f"Note added: {title}")
+    new_note, error = _new_note(payload)
+    if error:
+        return jsonify({"error": error}), 400
+    note = _notes().insert(new_note)
+    record_change("notes", "upsert", note["id"], note)
+    emitter.emit("note_added", note, namespace=NAMESPACE)
+    utils.log_user_activity(f"Note added: {note['title']}")
     return jsonify(note), 201
 
 @bp.route("/api/notes/<int:note_id>", methods=["PUT"])
 def update_note(note_id):
     payload = request.get_json() or {}
-    notes = _read_notes()
-    for i, n in enumerate(notes):
-        if int(n.get("id", -1)) == note_id:
-            n["title"] = payload.get("title", n.get("title"))
-            n["content"] = payload.get("content", n.get("content"))
-            n["updated"] = utils.timestamp()
-            notes[i] = n
-            _write_notes(notes)
-            socketio.emit("note_updated", n, namespace=NAMESPACE)
-            utils.log_user_activity(f"Note updated: {n['title']}")
-            return jsonify(n)
-    return jsonify({"error": "not found"}), 404
+    n = _notes().update(note_id, _note_changes(payload))
+    if not n:
+        return jsonify({"error": "not found"}), 404
+    record_change("notes", "upsert", note_id, n)
+    emitter.emit("note_updated", n, namespace=NAMESPACE)
+    utils.log_user_activity(f"Note updated: {n['title']}")
+    return jsonify(n)
 
 @bp.route("/api/notes/<int:note_id>", methods=["DELETE"])
 def delete_note(note_id):
-    notes = _read_notes()
-    new_notes = [n for n in notes if int(n.get("id", -1)) != note_id]
-    if len(new_notes) == len(notes):
+    if not _notes().delete(note_id):
         return jsonify({"error": "not found"}), 404
-    _write_notes(new_notes)
-    socketio.emit("note_deleted", {"id": note_id}, namespace=NAMESPACE)
+    record_change("notes", "delete", note_id)
+    emitter.emit("note_deleted", {"id": note_id}, namespace=NAMESPACE)
     utils.log_user_activity(f"Note deleted: {note_id}")
-    return jsonify({"ok": True})
\ No newline at end of file
+    return jsonify({"ok": True})
+
+@bp.route("/api/notes/bulk", methods=["POST"])
+def bulk_notes():
+    """Apply a list of create/update/delete operations in one write.
+
+    Same request and response shape as POST /api/tasks/bulk.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get("operations") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(items) > repository.MAX_BULK_OPERATIONS:
+        return jsonify({"error": f"at most {repository.MAX_BULK_OPERATIONS} operations per request"}), 413
+
+    ok, result = repository.build_operations(items, _new_note, _note_changes)
+    if ok:
+        operations = result
+        ok, result = _notes().apply(operations)
+    if not ok:
+        return jsonify({
+            "error": "no operations were applied",
+            "results": [{"ok": False, "error": e or "not applied"} for e in result]
+        }), 400
+
+    results = []
+    changes = {"created": [], "updated": [], "deleted": []}
+    for item, op, record in zip(items, operations, result):
+        if op["op"] == "delete":
+            record_change("notes", "delete", op["id"])
+            changes["deleted"].append(op["id"])
+            results.append({"ok": True, "op": item["op"], "id": op["id"]})
+        else:
+            record_change("notes", "upsert", record["id"], record)
+            changes["created" if op["op"] == "create" else "updated"].append(record)
+            results.append({"ok": True, "op": item["op"], "id": record["id"], "note": record})
+
+    emitter.emit("notes_bulk", changes, namespace=NAMESPACE)
+    utils.log_user_activity(
+        f"Notes bulk: {len(changes['created'])} added, "
+        f"{len(changes['updated'])} updated, {len(changes['deleted'])} deleted")
+    return jsonify({"results": results})
\ No newline at end of file
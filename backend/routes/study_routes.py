@@ -1,7 +1,9 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from backend import session_manager
-from modules import utils
-from backend.socket import socketio, NAMESPACE
+from modules import storage, study_stats, session_columns
+from backend.socket.emitter import emitter
+from backend.core.http_cache import conditional_json
 
 bp = Blueprint("study_routes", __name__)
 
@@ -11,7 +13,7 @@ def start_study():
     subject = payload.get("subject")
     if not subject:
         return jsonify({"error": "subject is required"}), 400
-    ok, result = session_manager.start_session(subject)
+    ok, result = session_manager.start_session(subject, session_manager.owner_from(request))
     if not ok:
         return jsonify({"error": result}), 400
     return jsonify(result), 201
@@ -20,21 +22,90 @@ def start_study():
 def stop_study():
     payload = request.json or {}
     save = payload.get("save", True)
-    ok, result = session_manager.stop_session(save=save)
+    ok, result = session_manager.stop_session(save=save, owner=session_manager.owner_from(request))
     if not ok:
         return jsonify({"error": result}), 400
     return jsonify(result)
 
+@bp.route("/api/study/sessions", methods=["GET"])
+def list_study_sessions():
+    store = storage.get_backend()
+    return conditional_json(store.version("sessions"), lambda: store.all("sessions"))
+
+def _parse_day(value):
+    """Return value if it is a YYYY-MM-DD date, else None."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+@bp.route("/api/study/stats", methods=["GET"])
+def get_study_stats():
+    """Study totals for ?from=&to= (inclusive dates), grouped by ?group_by=day|week|subject|hour."""
+    bounds = {}
+    for name in ("from", "to"):
+        if request.args.get(name):
+            bounds[name] = _parse_day(request.args[name])
+            if bounds[name] is None:
+                return jsonify({"error": f"{name} must be YYYY-MM-DD"}), 400
+    group_by = request.args.get("group_by", "day")
+    groupings = study_stats.GROUP_BY + ("hour",)
+    if group_by not in groupings:
+        return jsonify({"error": f"group_by must be one of {', '.join(groupings)}"}), 400
+
+    stats = study_stats.get_stats()
+    def build():
+        if group_by == "hour":
+            # Start times aren't in the per-day table; reduce the session columns
+            totals = session_columns.get_columns().totals(bounds.get("from"), bounds.get("to"), "hour")
+            result = {"groups": [dict(figures, key=key) for key, figures in totals.items()],
+                      "total": {"minutes": sum(f["minutes"] for f in totals.values()),
+                                "sessions": sum(f["sessions"] for f in totals.values()),
+                                "longest": max((f["longest"] for f in totals.values()), default=0)}}
+        else:
+            result = stats.query(bounds.get("from"), bounds.get("to"), group_by)
+        return dict(result, group_by=group_by, **{"from": bounds.get("from"), "to": bounds.get("to")})
+    return conditional_json(stats.version(), build)
+
+@bp.route("/api/study/heatmap", methods=["GET"])
+def get_study_heatmap():
+    """Minutes per day of ?year= (default: this year) as a 366-entry array."""
+    try:
+        year = int(request.args.get("year", datetime.now().year))
+        if not 1 <= year <= 9999:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "year must be a number between 1 and 9999"}), 400
+    stats = study_stats.get_stats()
+    return conditional_json(stats.version(), lambda: {
+        "year": year,
+        "start": f"{year:04d}-01-01",
+        "minutes": stats.heatmap(year)
+    })
+
+@bp.route("/api/study/streak", methods=["GET"])
+def get_study_streak():
+    stats = study_stats.get_stats()
+    today = datetime.now().date()
+    # The streak also depends on the date, so it is part of the validator
+    return conditional_json((stats.version(), today.isoformat()),
+                            lambda: dict(stats.streak(today), today=today.isoformat()))
+
 @bp.route("/api/study/status", methods=["GET"])
 def get_study_status():
-    status = session_manager.get_status()
+    status = session_manager.get_status(session_manager.owner_from(request))
     return jsonify(status)
 
+@bp.route("/api/study/active", methods=["GET"])
+def list_active_sessions():
+    """Every running session, across users and devices."""
+    return jsonify(session_manager.list_sessions())
+
 @bp.route("/api/health", methods=["GET"])
 def health_check():
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "socket": emitter.stats()})
 
 @bp.route("/api/time", methods=["GET"])
 def get_server_time():
-    from datetime import datetime
+    # Browsers sync over the socket instead (time_sync in backend/socket/events.py)
     return jsonify({"serverTime": datetime.utcnow().isoformat() + "Z"})
@@ -1,49 +1,34 @@
 from flask import Blueprint, request, jsonify
-from modules import subjects as subjects_mod, utils
-from backend.socket import socketio, NAMESPACE
+from modules import subjects as subjects_mod, utils, storage
+from backend.socket import NAMESPACE
+from backend.socket.emitter import emitter
+from backend.core.http_cache import conditional_json
+from backend.core.changelog import record_change
 
 bp = Blueprint("subjects_routes", __name__)
 
 @bp.route("/api/subjects", methods=["GET"])
 def get_subjects():
-    return jsonify(subjects_mod.load_subjects())
+    return conditional_json(storage.get_backend().version("subjects"), subjects_mod.load_subjects)
 
 @bp.route("/api/subjects", methods=["POST"])
 def add_subject():
     payload = request.get_json() or {}
     name = payload.get("name")
-from flask import Blueprint, request, jsonify
-from modules import subjects as subjects_mod, utils
-from backend.socket import socketio, NAMESPACE
-
-bp = Blueprint("subjects_routes", __name__)
-
-@bp.route("/api/subjects", methods=["GET"])
-def get_subjects():
-    return jsonify(subjects_mod.load_subjects())
-
-@bp.route("/api/subjects", methods=["POST"])
-def add_subject():
-    payload = request.get_json() or {}
-    name = payload.get("name")
-    if not name:
-        return jsonify({"error": "name required"}), 400
-    subjects = subjects_mod.load_subjects()
-    if name in subjects:
+    if not isinstance(name, str) or not name:
+        return jsonify({"error": "name must be a non-empty string"}), 400
+    if not storage.get_backend().insert("subjects", name):
         return jsonify({"error": "exists"}), 409
-    subjects.append(name)
-    subjects_mod.save_subjects(subjects)
-    socketio.emit("subject_added", {"name": name}, namespace=NAMESPACE)
+    record_change("subjects", "upsert", name, {"name": name})
+    emitter.emit("subject_added", {"name": name}, namespace=NAMESPACE)
     utils.log_user_activity(f"Subject added: {name}")
     return jsonify({"name": name}), 201
 
 @bp.route("/api/subjects/<string:name>", methods=["DELETE"])
 def remove_subject(name):
-    subjects = subjects_mod.load_subjects()
-    if name not in subjects:
+    if not storage.get_backend().delete("subjects", name):
         return jsonify({"error": "not found"}), 404
-    subjects.remove(name)
-    subjects_mod.save_subjects(subjects)
-    socketio.emit("subject_removed", {"name": name}, namespace=NAMESPACE)
+    record_change("subjects", "delete", name)
+    emitter.emit("subject_removed", {"name": name}, namespace=NAMESPACE)
     utils.log_user_activity(f"Subject removed: {name}")
     return jsonify({"ok": True})
\ No newline at end of file
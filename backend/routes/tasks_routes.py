@@ -1,52 +1,109 @@
-import os
-import json
-from flask import Blueprint, request, jsonify, current_app
-from modules import utils
-from backend.socket import socketio, NAMESPACE
+from flask import Blueprint, request, jsonify
+from modules import utils, repository
+from backend.socket import NAMESPACE
+from backend.socket.emitter import emitter
+from backend.core.http_cache import conditional_json
+from backend.core.changelog import record_change
 
 bp = Blueprint("tasks_routes", __name__)
 
-TASKS_FILE = utils.TASKS_FILE
+def _tasks():
+    return repository.get_repository("tasks")
 
 def _read_tasks():
-    data = utils.load_json(TASKS_FILE) or {}
-    return data.get("tasks", [])
+    return _tasks().all()
 
-def _write_tasks(tasks):
-    utils.save_json(TASKS_FILE, {"tasks": tasks})
+def _new_task(payload):
+    """Build a task record from a request payload; returns (task, error)."""
+    title = payload.get("title")
+    if not title:
+        return None, "title is required"
+    return {
+        "title": title,
+        "priority": payload.get("priority", "normal"),
+        "due": payload.get("due"),
+        "status": "pending",
+        "created": utils.timestamp()
+    }, None
+
+def _task_changes(payload):
+    """Fields to patch for an update payload."""
+    fields = {k: payload[k] for k in ("title", "priority", "due", "status") if k in payload}
+    if payload.get("status") == "completed":
+        fields["completed_at"] = utils.timestamp()
+    fields["updated_at"] = utils.timestamp()
+    return fields
+
+MAX_PAGE_SIZE = 500
+LIST_PARAMS = ("status", "priority", "due_before", "due_after", "sort", "limit", "cursor")
 
 @bp.route("/api/tasks", methods=["GET"])
 def list_tasks():
-    return jsonify(_read_tasks())
+    """List tasks.
+
+    Without query parameters this returns the full array. With any of
+    status, priority, due_before, due_after (exclusive, compared as ISO
+    date strings), sort (id, due, -id, -due), limit and cursor it returns
+    {"tasks": [...], "next_cursor": ...}; pass next_cursor back as cursor
+    to fetch the following page.
+    """
+    args = request.args
+    if not any(name in args for name in LIST_PARAMS):
+        return conditional_json(_tasks().version(), _read_tasks)
+
+    equals = {field: args[field] for field in ("status", "priority") if field in args}
+    ranges = {}
+    if "due_before" in args or "due_after" in args:
+        ranges["due"] = (args.get("due_after"), args.get("due_before"))
+
+    sort = args.get("sort", "id")
+    descending = sort.startswith("-")
+    sort = sort.lstrip("-")
+    if sort not in ("id", "due"):
+        return jsonify({"error": "sort must be one of id, due, -id, -due"}), 400
+
+    limit = None
+    if "limit" in args:
+        try:
+            limit = int(args["limit"])
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    after = None
+    if args.get("cursor"):
+        after = repository.decode_cursor(args["cursor"])
+        if after is None:
+            return jsonify({"error": "invalid cursor"}), 400
+
+    def build_page():
+        page, position = _tasks().query(equals, ranges, sort, descending, limit, after)
+        return {
+            "tasks": page,
+            "next_cursor": repository.encode_cursor(position) if position else None
+        }
+
+    try:
+        return conditional_json(_tasks().version(), build_page)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 @bp.route("/api/tasks", methods=["POST"])
 def create_task():
     payload = request.get_json() or {}
-    title = payload.get("title")
-    if not title:
-        return jsonify({"error": "title is required"}), 400
-    priority = payload.get("priority", "normal")
-    due = payload.get("due")
-    tasks = _read_tasks()
-    new_id = utils.next_id(tasks)
-    item = {
-        "id": new_id,
-        "title": title,
-        "priority": priority,
-        "due": due,
-        "status": "pending",
-        "created": utils.timestamp()
-    }
-    tasks.append(item)
-    _write_tasks(tasks)
-    socketio.emit("task_added", item, namespace=NAMESPACE)
-    utils.log_user_activity(f"Task added: {title}")
+    task, error = _new_task(payload)
+    if error:
+        return jsonify({"error": error}), 400
+    item = _tasks().insert(task)
+    record_change("tasks", "upsert", item["id"], item)
+    emitter.emit("task_added", item, namespace=NAMESPACE)
+    utils.log_user_activity(f"Task added: {item['title']}")
     return jsonify(item), 201
 
 @bp.route("/api/tasks/<int:task_id>", methods=["GET"])
 def get_task(task_id):
-    tasks = _read_tasks()
-    t = next((x for x in tasks if int(x.get("id", -1)) == task_id), None)
+    t = _tasks().get(task_id)
     if not t:
         return jsonify({"error": "not found"}), 404
     return jsonify(t)
@@ -54,40 +111,64 @@ def get_task(task_id):
 @bp.route("/api/tasks/<int:task_id>", methods=["PUT"])
 def update_task(task_id):
     payload = request.get_json() or {}
-    tasks = _read_tasks()
-    found = False
-    updated = None
-    for i, t in enumerate(tasks):
-        if int(t.get("id", -1)) == task_id:
-            found = True
-            if "title" in payload:
-                t["title"] = payload["title"]
-            if "priority" in payload:
-                t["priority"] = payload["priority"]
-            if "due" in payload:
-                t["due"] = payload["due"]
-            if "status" in payload:
-                t["status"] = payload["status"]
-                if payload["status"] == "completed":
-                    t["completed_at"] = utils.timestamp()
-            t["updated_at"] = utils.timestamp()
-            tasks[i] = t
-            updated = t
-            break
-    if not found:
+    updated = _tasks().update(task_id, _task_changes(payload))
+    if not updated:
         return jsonify({"error": "not found"}), 404
-    _write_tasks(tasks)
-    socketio.emit("task_updated", updated, namespace=NAMESPACE)
+    record_change("tasks", "upsert", task_id, updated)
+    emitter.emit("task_updated", updated, namespace=NAMESPACE)
     utils.log_user_activity(f"Task updated: {updated['title']}")
     return jsonify(updated)
 
 @bp.route("/api/tasks/<int:task_id>", methods=["DELETE"])
 def delete_task(task_id):
-    tasks = _read_tasks()
-    new_tasks = [t for t in tasks if int(t.get("id", -1)) != task_id]
-    if len(new_tasks) == len(tasks):
+    if not _tasks().delete(task_id):
         return jsonify({"error": "not found"}), 404
-    _write_tasks(new_tasks)
-    socketio.emit("task_deleted", {"id": task_id}, namespace=NAMESPACE)
+    record_change("tasks", "delete", task_id)
+    emitter.emit("task_deleted", {"id": task_id}, namespace=NAMESPACE)
     utils.log_user_activity(f"Task deleted: {task_id}")
-    return jsonify({"ok": True})
\ No newline at end of file
+    return jsonify({"ok": True})
+
+@bp.route("/api/tasks/bulk", methods=["POST"])
+def bulk_tasks():
+    """Apply a list of create/update/delete operations in one write.
+
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 3, "data": {...}},
+                          {"op": "delete", "id": 4}]}
+    Either every operation is applied or none is; results come back in
+    request order.
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get("operations") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "operations must be a non-empty list"}), 400
+    if len(items) > repository.MAX_BULK_OPERATIONS:
+        return jsonify({"error": f"at most {repository.MAX_BULK_OPERATIONS} operations per request"}), 413
+
+    ok, result = repository.build_operations(items, _new_task, _task_changes)
+    if ok:
+        operations = result
+        ok, result = _tasks().apply(operations)
+    if not ok:
+        return jsonify({
+            "error": "no operations were applied",
+            "results": [{"ok": False, "error": e or "not applied"} for e in result]
+        }), 400
+
+    results = []
+    changes = {"created": [], "updated": [], "deleted": []}
+    for item, op, record in zip(items, operations, result):
+        if op["op"] == "delete":
+            record_change("tasks", "delete", op["id"])
+            changes["deleted"].append(op["id"])
+            results.append({"ok": True, "op": item["op"], "id": op["id"]})
+        else:
+            record_change("tasks", "upsert", record["id"], record)
+            changes["created" if op["op"] == "create" else "updated"].append(record)
+            results.append({"ok": True, "op": item["op"], "id": record["id"], "task": record})
+
+    emitter.emit("tasks_bulk", changes, namespace=NAMESPACE)
+    utils.log_user_activity(
+        f"Tasks bulk: {len(changes['created'])} added, "
+        f"{len(changes['updated'])} updated, {len(changes['deleted'])} deleted")
+    return jsonify({"results": results})
\ No newline at end of file
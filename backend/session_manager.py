@@ -1,66 +1,125 @@
+"""Active study sessions, one per owner (a user or a device).
+
+Every entry point (backend routes, the legacy app routes via StudyManager,
+and the CLI) goes through this module, so they all see the same sessions.
+The registry maps owner -> ActiveSession; the registry lock is only held to
+look up, add or remove an entry, and each session has its own lock, so
+owners never wait on each other.
+"""
 import threading
-from datetime import datetime
+from datetime import datetime, timezone
 from modules import study as study_mod
 from modules import utils
-from backend.socket import socketio, NAMESPACE
-
-_lock = threading.Lock()
-_current = {
-    "subject": None,
-    "start_time": None  # datetime
-}
-
-# ...existing code...
-def start_session(subject: str):
-    with _lock:
-        if _current["subject"] is not None:
+from backend.socket import NAMESPACE
+from backend.socket.emitter import emitter
+
+DEFAULT_OWNER = "default"
+USER_HEADER = "X-NARI-User"
+DEVICE_HEADER = "X-NARI-Device"
+
+
+class ActiveSession:
+    def __init__(self, owner, subject, start_time):
+        self.owner = owner
+        self.subject = subject
+        self.start_time = start_time  # naive UTC datetime
+        self.lock = threading.Lock()
+        self.stopped = False
+
+    def status(self):
+        return {
+            "owner": self.owner,
+            "subject": self.subject,
+            "start": self.start_time.isoformat() + "Z"
+        }
+
+
+_registry_lock = threading.Lock()
+_sessions = {}  # owner -> ActiveSession
+
+
+def owner_from(request):
+    """Owner key for a Flask request: X-NARI-User, else X-NARI-Device, else
+    "user"/"device" in the JSON body or query string, else DEFAULT_OWNER."""
+    payload = request.get_json(silent=True) if request.is_json else None
+    payload = payload if isinstance(payload, dict) else {}
+    for header, field in ((USER_HEADER, "user"), (DEVICE_HEADER, "device")):
+        value = request.headers.get(header) or payload.get(field) or request.args.get(field)
+        if value:
+            return str(value).strip() or DEFAULT_OWNER
+    return DEFAULT_OWNER
+
+
+def local_time(utc_time):
+    """Naive local datetime for a naive UTC one (stored sessions use local time)."""
+    return utc_time.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def start_session(subject: str, owner: str = DEFAULT_OWNER):
+    session = ActiveSession(owner, subject, datetime.utcnow())
+    with _registry_lock:
+        if owner in _sessions:
             # already running
             return False, "session_already_running"
-        _current["subject"] = subject
-        _current["start_time"] = datetime.utcnow() # <--- CHANGED TO UTC
-        # emit event
-        socketio.emit("study_started", {"subject": subject, "start": _current["start_time"].isoformat() + "Z"}, namespace=NAMESPACE) # <--- ADDED "Z" for UTC
-        return True, {"subject": subject, "start": _current["start_time"].isoformat() + "Z"} # <--- ADDED "Z" for UTC
-# ...existing code...
-
-# ...existing code...
-def stop_session(save: bool = True):
-    with _lock:
-        if _current["subject"] is None:
+        _sessions[owner] = session
+    result = session.status()
+    emitter.emit("study_started", result, namespace=NAMESPACE)
+    return True, result
+
+
+def stop_session(save: bool = True, owner: str = DEFAULT_OWNER):
+    with _registry_lock:
+        session = _sessions.get(owner)
+    if session is None:
+        return False, "no_active_session"
+    with session.lock:
+        if session.stopped:
+            # a concurrent stop for the same owner got here first
             return False, "no_active_session"
-        subject = _current["subject"]
-        start_time = _current["start_time"]
-        end_time = datetime.utcnow() # <--- CHANGED TO UTC
-        elapsed_seconds = int((end_time - start_time).total_seconds())
-        # clear current BEFORE potentially slow persistence to keep status consistent
-        _current["subject"] = None
-        _current["start_time"] = None
+        session.stopped = True
+        end_time = datetime.utcnow()
+        # unregister BEFORE potentially slow persistence to keep status consistent
+        with _registry_lock:
+            if _sessions.get(owner) is session:
+                del _sessions[owner]
 
+    subject, start_time = session.subject, session.start_time
+    elapsed_seconds = int((end_time - start_time).total_seconds())
+    saved = None
     # if saving, call study.save_session (this writes the JSON)
     if save:
         try:
             # study.save_session expects (subject, start_time: datetime, end_time: datetime)
-            study_mod.save_session(subject, start_time, end_time)
+            # in local time, like sessions saved by the CLI
+            saved = study_mod.save_session(subject, local_time(start_time), local_time(end_time))
         except Exception as e:
             # persistence failed — log and emit event anyway
             utils.append_log("api_errors.log", f"Failed to save session: {e}")
 
-    # emit event
-    socketio.emit("study_stopped", {
+    result = {
+        "owner": owner,
         "subject": subject,
-        "start": start_time.isoformat() + "Z", # <--- ADDED "Z" for UTC
-        "end": end_time.isoformat() + "Z",     # <--- ADDED "Z" for UTC
+        "start": start_time.isoformat() + "Z",
+        "end": end_time.isoformat() + "Z",
         "elapsed_seconds": elapsed_seconds
-    }, namespace=NAMESPACE)
-    return True, {"subject": subject, "start": start_time.isoformat() + "Z", "end": end_time.isoformat() + "Z", "elapsed_seconds": elapsed_seconds}
-# ...existing code...
-
-# ...existing code...
-def get_status():
-    with _lock:
-        if _current["subject"] is None:
-            return None
-        return {
-            "subject": _current["subject"],
-            "start": _current["start_time"].isoformat() + "Z" # <--- ADDED "Z" for UTC
-        }
+    }
+    emitter.emit("study_stopped", result, namespace=NAMESPACE)
+    return True, dict(result, saved=saved)
+
+
+def get_session(owner: str = DEFAULT_OWNER):
+    """The owner's ActiveSession, or None."""
+    with _registry_lock:
+        return _sessions.get(owner)
+
+
+def get_status(owner: str = DEFAULT_OWNER):
+    session = get_session(owner)
+    return session.status() if session else None
+
+
+def list_sessions():
+    """Status of every running session, oldest first."""
+    with _registry_lock:
+        sessions = list(_sessions.values())
+    return [s.status() for s in sorted(sessions, key=lambda s: s.start_time)]
@@ -0,0 +1,114 @@
+# backend/socket/emitter.py
+"""Coalescing layer over backend.socket.socketio.
+
+Routes and core systems call emitter.emit() exactly like socketio.emit().
+Instead of one frame per event, events are buffered per namespace and sent
+every FLUSH_INTERVAL_MS as a single "batch" message::
+
+    {"events": [{"event": "activity_logged", "items": [{...}, {...}]},
+                {"event": "task_updated", "items": [{...}]}]}
+
+Consecutive events of the same type share one group; group order follows
+emit order, so a client replaying the batch sees the same sequence. A flush
+holding just one event sends it unbatched. PRIORITY_EVENTS (alarms and
+timers running out) skip the buffer and go out immediately, after anything
+already buffered for their namespace.
+
+The frontend socket helper unpacks "batch" into the usual per-event
+listeners.
+"""
+import threading
+from backend.socket import socketio
+
+FLUSH_INTERVAL_MS = 100
+BATCH_EVENT = "batch"
+PRIORITY_EVENTS = frozenset({"alarm_triggered", "timer_finished", "connected"})
+
+
+class CoalescingEmitter:
+    def __init__(self, sio, interval_ms=FLUSH_INTERVAL_MS, priority=PRIORITY_EVENTS):
+        self.socketio = sio
+        self.interval = interval_ms / 1000
+        self.priority = priority
+        self._lock = threading.Lock()
+        self._buffers = {}  # namespace -> [(event, data), ...] in emit order
+        self._flushing = False  # a flush loop is scheduled
+        self._stats = {"events_in": 0, "frames_out": 0}
+
+    # Same surface as SocketIO, so core systems can take either
+    @property
+    def server(self):
+        return self.socketio.server
+
+    def start_background_task(self, target, *args, **kwargs):
+        return self.socketio.start_background_task(target, *args, **kwargs)
+
+    def sleep(self, seconds=0):
+        return self.socketio.sleep(seconds)
+
+    def emit(self, event, data=None, namespace=None, **kwargs):
+        """Queue an event for the next batch (or send it now if it is a priority event).
+
+        Extra socketio.emit arguments (to=, room=, ...) can't be batched
+        and bypass the buffer.
+        """
+        if kwargs or event in self.priority:
+            self.flush(namespace)
+            with self._lock:
+                self._stats["events_in"] += 1
+                self._stats["frames_out"] += 1
+            self.socketio.emit(event, data, namespace=namespace, **kwargs)
+            return
+        with self._lock:
+            self._stats["events_in"] += 1
+            self._buffers.setdefault(namespace, []).append((event, data))
+            start = not self._flushing
+            self._flushing = True
+        if start:
+            self.socketio.start_background_task(self._flush_loop)
+
+    def flush(self, namespace=None):
+        """Send everything buffered (for one namespace, or for all if None)."""
+        with self._lock:
+            if namespace is None:
+                buffers, self._buffers = self._buffers, {}
+            else:
+                pending = self._buffers.pop(namespace, None)
+                buffers = {namespace: pending} if pending else {}
+            self._stats["frames_out"] += len(buffers)
+        for ns, events in buffers.items():
+            if len(events) == 1:
+                event, data = events[0]
+                self.socketio.emit(event, data, namespace=ns)
+                continue
+            groups = []
+            for event, data in events:
+                if groups and groups[-1]["event"] == event:
+                    groups[-1]["items"].append(data)
+                else:
+                    groups.append({"event": event, "items": [data]})
+            self.socketio.emit(BATCH_EVENT, {"events": groups}, namespace=ns)
+
+    def stats(self):
+        """Counters for events emitted, frames sent and events per frame."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = sum(len(events) for events in self._buffers.values())
+        stats["coalescing_ratio"] = round(stats["events_in"] / stats["frames_out"], 2) if stats["frames_out"] else None
+        return stats
+
+    def _flush_loop(self):
+        # Runs only while there is something to send; emit() restarts it.
+        while True:
+            self.socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f" ERROR flushing socket events: {e}")
+            with self._lock:
+                if not self._buffers:
+                    self._flushing = False
+                    return
+
+
+emitter = CoalescingEmitter(socketio)
@@ -1,3 +1,4 @@
+import time
 from backend.socket import socketio, NAMESPACE
 from flask_socketio import emit
 from flask import current_app
@@ -8,6 +9,15 @@ def handle_connect():
     # When client connects, we can emit a welcome or initial summary if needed.
     emit("connected", {"ok": True, "namespace": NAMESPACE})
 
+@socketio.on("time_sync", namespace=NAMESPACE)
+def handle_time_sync(data):
+    # NTP-style probe (frontend/src/lib/timeSync.js): the client sends its
+    # send time t0, the ack carries our receive (t1) and reply (t2) times,
+    # all epoch ms. Answered as an ack, so it skips the emit coalescing.
+    t1 = time.time() * 1000
+    t0 = data.get("t0") if isinstance(data, dict) else None
+    return {"t0": t0, "t1": t1, "t2": time.time() * 1000}
+
 @socketio.on("disconnect", namespace=NAMESPACE)
 def handle_disconnect():
     # optional logging
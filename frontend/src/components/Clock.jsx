@@ -1,38 +1,13 @@
 import React, { useState, useEffect } from 'react';
-import { getServerTime } from '../lib/api';
+import { serverNow } from '../lib/timeSync';
 
+// Server time, from the offset kept by lib/timeSync (no /api/time polling)
 export default function Clock() {
-  const [time, setTime] = useState(new Date());
+  const [time, setTime] = useState(new Date(serverNow()));
 
   useEffect(() => {
-    async function fetchAndSetTime() {
-      try {
-        const response = await getServerTime();
-        if (response && response.serverTime) {
-          const serverDate = new Date(response.serverTime);
-          setTime(serverDate);
-          console.log("Clock: Initialized with server time:", serverDate); // Log initial server time
-        }
-      } catch (error) {
-        console.error("Clock: Failed to fetch server time:", error);
-        setTime(new Date()); // Fallback to local time if server time fetch fails
-      }
-    }
-
-    fetchAndSetTime();
-
-    const timerId = setInterval(() => {
-      setTime(prevTime => {
-        const newTime = new Date(prevTime.getTime() + 1000);
-        console.log("Clock: Updating time to:", newTime); // Log every update
-        return newTime;
-      });
-    }, 1000);
-
-    return () => {
-      console.log("Clock: Clearing interval."); // Log when interval is cleared
-      clearInterval(timerId);
-    };
+    const timerId = setInterval(() => setTime(new Date(serverNow())), 1000);
+    return () => clearInterval(timerId);
   }, []);
 
   const formatTime = (date) => {
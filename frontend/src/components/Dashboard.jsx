@@ -110,7 +110,7 @@ const Dashboard = () => {
         // Note events
         socket.on('note_added', (note) => {
             console.log('Note added via socket:', note);
-            setNotes(prev => [note, ...prev]);
+            setNotes(prev => [note, ...prev.filter(n => n.id !== note.id)]);
         });
 
         socket.on('note_updated', (note) => {
@@ -123,6 +123,18 @@ const Dashboard = () => {
             setNotes(prev => prev.filter(n => n.id !== id));
         });
 
+        // Missed too much while disconnected: refetch everything
+        socket.on('resync', async () => {
+            const [s, t, n] = await Promise.all([
+                getSubjects().catch(() => null),
+                getTasks().catch(() => null),
+                getNotes().catch(() => null)
+            ]);
+            if (s) setSubjects(s);
+            if (t) setTasks(t);
+            if (n) setNotes(n);
+        });
+
         // Alarm events
         socket.on('alarm_triggered', (alarm) => {
             console.log('Alarm triggered via socket:', alarm);
@@ -149,6 +161,7 @@ const Dashboard = () => {
             socket.off('note_added');
             socket.off('note_updated');
             socket.off('note_deleted');
+            socket.off('resync');
             socket.off('alarm_triggered');
         };
     }, []);
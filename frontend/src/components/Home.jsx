@@ -15,8 +15,10 @@ import {
   deleteSubject,
   createTask,
   createNote,
+  isOwnSession,
 } from "@lib/api.js";
 import { getSocket } from "@lib/socket.js";
+import { serverNow } from "@lib/timeSync.js";
 import { CircularProgressbar, buildStyles } from "react-circular-progressbar";
 import "react-circular-progressbar/dist/styles.css";
 import Clock from "./Clock";
@@ -89,7 +91,7 @@ export default function Home() {
     });
 
     socket.on("note_added", (n) => {
-      setNotes((prev) => [n, ...prev]);
+      setNotes((prev) => [n, ...prev.filter((x) => x.id !== n.id)]);
       addActivity(`📒 Note created: ${n.title}`);
     });
     socket.on("note_updated", (n) => {
@@ -112,11 +114,13 @@ export default function Home() {
     });
 
     socket.on("study_started", (s) => {
+      if (!isOwnSession(s)) return;
       setStudy(s);
       setElapsed(0);
       addActivity(`⚡ Focus started: ${s.subject}`);
     });
     socket.on("study_stopped", (s) => {
+      if (!isOwnSession(s)) return;
       setStudy(null);
       addActivity(`💤 Focus stopped: ${s.subject}`);
       setElapsed(0);
@@ -138,8 +142,8 @@ export default function Home() {
 
     const startTime = new Date(study.start);
     timerRef.current = setInterval(() => {
-      const now = Date.now();
-      const diff = now - startTime.getTime();
+      // study.start is the server's clock; compare it with the server's now
+      const diff = serverNow() - startTime.getTime();
       setElapsed(Math.floor(diff / 1000));
     }, 1000);
 
@@ -10,6 +10,7 @@ import {
   getActivityLog,
 } from "../lib/api";
 import { getSocket } from "../lib/socket";
+import { serverNow } from "../lib/timeSync";
 import TasksPanel from "./Panels/TasksPanel";
 import NotesPanel from "./Panels/NotesPanel";
 import SubjectsPanel from "./Panels/SubjectsPanel";
@@ -87,7 +88,11 @@ export default function NariFrontend() {
     // notes
     // notes
     socket.on("note_added", (n) => {
-      setNotes((prev) => [n, ...prev]);
+      setNotes((prev) =>
+        prev.some((x) => x.id === n.id)
+          ? prev.map((x) => (x.id === n.id ? n : x))
+          : [n, ...prev]
+      );
     });
     socket.on("note_updated", (n) => {
       setNotes((prev) => prev.map((x) => (x.id === n.id ? n : x)));
@@ -133,7 +138,7 @@ export default function NariFrontend() {
     if (studyStatus && studyStatus.start) {
       const startTime = new Date(studyStatus.start).getTime();
       elapsedTimerId = setInterval(() => {
-        setElapsedTime(Math.floor((Date.now() - startTime) / 1000));
+        setElapsedTime(Math.floor((serverNow() - startTime) / 1000));
       }, 1000);
     } else if (elapsedTimerId) {
       clearInterval(elapsedTimerId);
@@ -2,27 +2,37 @@ import React, { useState, useEffect } from 'react';
 import ModuleCard from '../layout/ModuleCard';
 import { Bell, X, Plus, Check, Clock as ClockIcon, Timer, Play, Pause, RotateCcw } from 'lucide-react';
 import { getSocket } from '@lib/socket';
+import { serverNow } from '@lib/timeSync';
 import { API_BASE } from '../../config';
 
+// Stopwatch/timer snapshots from the server (backend/core/timers.py) are
+// stamped with their local arrival time; while one runs the display adds
+// the time since then, so the server never has to send ticks.
+const withReceipt = (state) => ({ ...state, received: Date.now() });
+const elapsedOf = (t) => {
+    if (!t) return 0;
+    const elapsed = t.elapsed_ms + (t.running ? Date.now() - t.received : 0);
+    return t.duration_ms != null ? Math.min(elapsed, t.duration_ms) : elapsed;
+};
+
 const ClockModule = () => {
     const [activeTab, setActiveTab] = useState('clock');
-    const [currentTime, setCurrentTime] = useState(new Date());
+    const [currentTime, setCurrentTime] = useState(new Date(serverNow()));
     const [alarms, setAlarms] = useState([]);
     const [isAdding, setIsAdding] = useState(false);
     const [newAlarmName, setNewAlarmName] = useState('');
     const [newAlarmDate, setNewAlarmDate] = useState('');
     const [newAlarmTime, setNewAlarmTime] = useState('');
 
-    // Stopwatch state
-    const [stopwatchTime, setStopwatchTime] = useState(0);
-    const [stopwatchRunning, setStopwatchRunning] = useState(false);
-    const [stopwatchInterval, setStopwatchInterval] = useState(null);
-
-    // Timer state
+    // Server-side stopwatch and timer, by id
+    const [timers, setTimers] = useState({});
+    const [, setTick] = useState(0);
     const [timerMinutes, setTimerMinutes] = useState(5);
     const [timerSeconds, setTimerSeconds] = useState(0);
-    const [timerRunning, setTimerRunning] = useState(false);
-    const [timerInterval, setTimerInterval] = useState(null);
+
+    const stopwatch = Object.values(timers).find(t => t.kind === 'stopwatch' && t.name === 'stopwatch');
+    const countdown = Object.values(timers).find(t => t.kind === 'timer' && t.name === 'timer');
+    const anyRunning = Object.values(timers).some(t => t.running);
 
     // Fetch alarms on mount
     useEffect(() => {
@@ -31,8 +41,30 @@ const ClockModule = () => {
             .then(data => setAlarms(data || []))
             .catch(err => console.error("Failed to fetch alarms", err));
 
+        fetch(`${API_BASE}/clock/timers`)
+            .then(res => res.json())
+            .then(data => setTimers(Object.fromEntries((data || []).map(t => [t.id, withReceipt(t)]))))
+            .catch(err => console.error("Failed to fetch timers", err));
+
         const socket = getSocket();
 
+        const upsertTimer = (state) => setTimers(prev => ({ ...prev, [state.id]: withReceipt(state) }));
+        socket.on('timer_updated', upsertTimer);
+        socket.on('timer_deleted', ({ id }) => setTimers(prev => {
+            const { [id]: _removed, ...rest } = prev;
+            return rest;
+        }));
+        socket.on('timer_finished', (state) => {
+            upsertTimer(state);
+            if ('Notification' in window && Notification.permission === 'granted') {
+                new Notification('⏲️ NARI Timer', {
+                    body: `${state.name} finished!`,
+                    icon: '/favicon.ico'
+                });
+            }
+            alert('⏲️ Timer finished!');
+        });
+
         socket.on('alarm_added', (alarm) => {
             console.log('Alarm added via socket:', alarm);
             setAlarms(prev => prev.some(a => a.id === alarm.id) ? prev : [...prev, alarm]);
@@ -70,57 +102,69 @@ const ClockModule = () => {
             socket.off('alarm_deleted');
             socket.off('alarm_updated');
             socket.off('alarm_triggered');
+            socket.off('timer_updated');
+            socket.off('timer_deleted');
+            socket.off('timer_finished');
         };
     }, []);
 
     // Update time every second
     useEffect(() => {
-        const interval = setInterval(() => setCurrentTime(new Date()), 1000);
+        const interval = setInterval(() => setCurrentTime(new Date(serverNow())), 1000);
         return () => clearInterval(interval);
     }, []);
 
-    // Stopwatch effect
+    // Redraw running stopwatch/timer displays; nothing is counted here
     useEffect(() => {
-        if (stopwatchRunning) {
-            const interval = setInterval(() => {
-                setStopwatchTime(prev => prev + 10);
-            }, 10);
-            setStopwatchInterval(interval);
-            return () => clearInterval(interval);
-        } else if (stopwatchInterval) {
-            clearInterval(stopwatchInterval);
-        }
-    }, [stopwatchRunning]);
+        if (!anyRunning) return;
+        const interval = setInterval(() => setTick(n => n + 1), 50);
+        return () => clearInterval(interval);
+    }, [anyRunning]);
 
-    // Timer effect
-    useEffect(() => {
-        if (timerRunning && (timerMinutes > 0 || timerSeconds > 0)) {
-            const interval = setInterval(() => {
-                if (timerSeconds === 0) {
-                    if (timerMinutes === 0) {
-                        setTimerRunning(false);
-                        // Show notification when timer ends
-                        if ('Notification' in window && Notification.permission === 'granted') {
-                            new Notification('⏲️ NARI Timer', {
-                                body: 'Timer finished!',
-                                icon: '/favicon.ico'
-                            });
-                        }
-                        alert('⏲️ Timer finished!');
-                    } else {
-                        setTimerMinutes(prev => prev - 1);
-                        setTimerSeconds(59);
-                    }
-                } else {
-                    setTimerSeconds(prev => prev - 1);
-                }
-            }, 1000);
-            setTimerInterval(interval);
-            return () => clearInterval(interval);
-        } else if (timerInterval) {
-            clearInterval(timerInterval);
+    const timerRequest = (path, body) =>
+        fetch(`${API_BASE}/clock/timers${path}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body || {})
+        })
+            .then(res => res.json())
+            .then(state => {
+                if (state && state.id) setTimers(prev => ({ ...prev, [state.id]: withReceipt(state) }));
+            })
+            .catch(err => console.error("Timer request failed", err));
+
+    const toggleStopwatch = () => {
+        if (!stopwatch) return timerRequest('', { name: 'stopwatch', kind: 'stopwatch', start: true });
+        return timerRequest(`/${stopwatch.id}/${stopwatch.running ? 'pause' : 'start'}`);
+    };
+
+    const resetStopwatch = () => stopwatch && timerRequest(`/${stopwatch.id}/reset`);
+
+    const toggleTimer = async () => {
+        if (countdown && countdown.running) return timerRequest(`/${countdown.id}/pause`);
+        // Resume a paused countdown, otherwise start one with the entered duration
+        if (countdown && !countdown.finished && countdown.elapsed_ms > 0) {
+            return timerRequest(`/${countdown.id}/start`);
+        }
+        const duration = timerMinutes * 60 + timerSeconds;
+        if (duration <= 0) return;
+        if (countdown) {
+            await fetch(`${API_BASE}/clock/timers/${countdown.id}`, { method: 'DELETE' });
+            setTimers(prev => {
+                const { [countdown.id]: _removed, ...rest } = prev;
+                return rest;
+            });
         }
-    }, [timerRunning, timerMinutes, timerSeconds]);
+        return timerRequest('', { name: 'timer', kind: 'timer', duration, start: true });
+    };
+
+    const resetTimer = () => countdown && timerRequest(`/${countdown.id}/reset`);
+
+    const timerRunning = Boolean(countdown && countdown.running);
+    const countdownActive = Boolean(countdown && !countdown.finished && (countdown.running || countdown.elapsed_ms > 0));
+    const remainingSeconds = countdownActive
+        ? Math.ceil((countdown.duration_ms - elapsedOf(countdown)) / 1000)
+        : timerMinutes * 60 + timerSeconds;
 
     const formatTime = (date) => {
         const hours = date.getHours().toString().padStart(2, '0');
@@ -320,9 +364,9 @@ const ClockModule = () => {
             {activeTab === 'timer' && (
                 <div className="flex flex-col items-center py-8">
                     <div className="text-6xl font-mono font-light tracking-wider text-white mb-6">
-                        {timerMinutes.toString().padStart(2, '0')}:{timerSeconds.toString().padStart(2, '0')}
+                        {Math.floor(remainingSeconds / 60).toString().padStart(2, '0')}:{(remainingSeconds % 60).toString().padStart(2, '0')}
                     </div>
-                    {!timerRunning && (
+                    {!countdownActive && (
                         <div className="flex gap-4 mb-6">
                             <div>
                                 <label className="text-xs text-gray-500 block mb-1">Minutes</label>
@@ -346,13 +390,13 @@ const ClockModule = () => {
                     )}
                     <div className="flex gap-3">
                         <button
-                            onClick={() => setTimerRunning(!timerRunning)}
+                            onClick={toggleTimer}
                             className="px-6 py-3 rounded-lg bg-blue-600 hover:bg-blue-700 text-white font-medium flex items-center gap-2"
                         >
                             {timerRunning ? <><Pause size={18} /> Pause</> : <><Play size={18} /> Start</>}
                         </button>
                         <button
-                            onClick={() => { setTimerRunning(false); setTimerMinutes(5); setTimerSeconds(0); }}
+                            onClick={resetTimer}
                             className="px-6 py-3 rounded-lg bg-gray-700 hover:bg-gray-600 text-white font-medium flex items-center gap-2"
                         >
                             <RotateCcw size={18} /> Reset
@@ -365,17 +409,17 @@ const ClockModule = () => {
             {activeTab === 'stopwatch' && (
                 <div className="flex flex-col items-center py-8">
                     <div className="text-6xl font-mono font-light tracking-wider text-white mb-6">
-                        {formatStopwatch(stopwatchTime)}
+                        {formatStopwatch(elapsedOf(stopwatch))}
                     </div>
                     <div className="flex gap-3">
                         <button
-                            onClick={() => setStopwatchRunning(!stopwatchRunning)}
+                            onClick={toggleStopwatch}
                             className="px-6 py-3 rounded-lg bg-blue-600 hover:bg-blue-700 text-white font-medium flex items-center gap-2"
                         >
-                            {stopwatchRunning ? <><Pause size={18} /> Pause</> : <><Play size={18} /> Start</>}
+                            {stopwatch && stopwatch.running ? <><Pause size={18} /> Pause</> : <><Play size={18} /> Start</>}
                         </button>
                         <button
-                            onClick={() => { setStopwatchRunning(false); setStopwatchTime(0); }}
+                            onClick={resetStopwatch}
                             className="px-6 py-3 rounded-lg bg-gray-700 hover:bg-gray-600 text-white font-medium flex items-center gap-2"
                         >
                             <RotateCcw size={18} /> Reset
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import ModuleCard from '../layout/ModuleCard';
-import { getStudyStatus, startStudy, stopStudy } from '@lib/api';
+import { getStudyStatus, startStudy, stopStudy, isOwnSession } from '@lib/api';
 import { getSocket } from '@lib/socket';
 import { CircularProgressbar, buildStyles } from 'react-circular-progressbar';
 import 'react-circular-progressbar/dist/styles.css';
@@ -24,12 +24,14 @@ const FocusModule = ({ selectedSubject }) => {
         const socket = getSocket();
 
         socket.on('study_started', (s) => {
+            if (!isOwnSession(s)) return;
             console.log('Study started via socket:', s);
             setStudy(s);
             setElapsed(0);
         });
 
-        socket.on('study_stopped', () => {
+        socket.on('study_stopped', (s) => {
+            if (!isOwnSession(s)) return;
             console.log('Study stopped via socket');
             setStudy(null);
             setElapsed(0);
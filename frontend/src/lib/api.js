@@ -76,15 +76,35 @@ export async function deleteNote(id) {
 }
 
 // Study sessions
+// The server keeps one active session per device, so several people can
+// share it; this browser's id is kept in localStorage.
+function loadDeviceId() {
+    let id = localStorage.getItem('nari_device_id');
+    if (!id) {
+        id = (crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`);
+        localStorage.setItem('nari_device_id', id);
+    }
+    return id;
+}
+
+export const DEVICE_ID = loadDeviceId();
+
+// True for study_started/study_stopped events that belong to this device
+export function isOwnSession(s) {
+    return !s || !s.owner || s.owner === DEVICE_ID;
+}
+
 export async function getStudyStatus() {
-    const res = await fetch(`${API_BASE}/study/status`);
+    const res = await fetch(`${API_BASE}/study/status`, {
+        headers: { 'X-NARI-Device': DEVICE_ID }
+    });
     return res.json();
 }
 
 export async function startStudy(subject) {
     const res = await fetch(`${API_BASE}/study/start`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'X-NARI-Device': DEVICE_ID },
         body: JSON.stringify({ subject })
     });
     return res.json();
@@ -93,12 +113,23 @@ export async function startStudy(subject) {
 export async function stopStudy(save = true) {
     const res = await fetch(`${API_BASE}/study/stop`, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', 'X-NARI-Device': DEVICE_ID },
         body: JSON.stringify({ save })
     });
     return res.json();
 }
 
+// Study heatmap (minutes per day of a year) and streak
+export async function getStudyHeatmap(year) {
+    const res = await fetch(`${API_BASE}/study/heatmap?year=${year}`);
+    return res.json();
+}
+
+export async function getStudyStreak() {
+    const res = await fetch(`${API_BASE}/study/streak`);
+    return res.json();
+}
+
 // Health check
 export async function getHealth() {
     try {
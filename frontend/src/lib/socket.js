@@ -1,7 +1,57 @@
 import io from 'socket.io-client';
-import { SOCKET_URL } from '../config';
+import { SOCKET_URL, API_BASE } from '../config';
+import { startTimeSync } from './timeSync';
 
 let socket = null;
+let revision = null; // last change-log revision this client has caught up to
+
+// Deliver an event to this client's own listeners, as if the server sent it.
+function dispatchLocal(sock, event, payload) {
+    sock.listeners(event).forEach((fn) => fn(payload));
+}
+
+// Bulk endpoints emit one event per request; replay it as the per-item
+// events the components already listen for.
+const BULK_EVENTS = {
+    tasks_bulk: ['task_added', 'task_updated', 'task_deleted'],
+    notes_bulk: ['note_added', 'note_updated', 'note_deleted']
+};
+
+function unpackBulk(sock, [added, updated, deleted], changes) {
+    (changes.created || []).forEach((item) => dispatchLocal(sock, added, item));
+    (changes.updated || []).forEach((item) => dispatchLocal(sock, updated, item));
+    (changes.deleted || []).forEach((id) => dispatchLocal(sock, deleted, { id }));
+}
+
+// After a reconnect, replay what was missed from GET /api/changes as the
+// usual per-item events (the *_added handlers treat known ids as updates).
+// If the server's log no longer reaches back, listeners of 'resync' refetch.
+const CHANGE_EVENTS = {
+    tasks: ['task_added', 'task_deleted', (id) => ({ id })],
+    notes: ['note_added', 'note_deleted', (id) => ({ id })],
+    subjects: ['subject_added', 'subject_removed', (name) => ({ name })]
+};
+
+async function catchUp(sock) {
+    const query = revision === null ? '' : `?since=${revision}`;
+    try {
+        const res = await fetch(`${API_BASE}/changes${query}`);
+        const body = await res.json();
+        if (body.resync) {
+            if (revision !== null) dispatchLocal(sock, 'resync', body);
+        } else {
+            Object.entries(body.changes).forEach(([collection, { upserts, deletes }]) => {
+                const [upserted, deleted, deletedPayload] = CHANGE_EVENTS[collection] || [];
+                if (!upserted) return;
+                upserts.forEach((item) => dispatchLocal(sock, upserted, item));
+                deletes.forEach((key) => dispatchLocal(sock, deleted, deletedPayload(key)));
+            });
+        }
+        revision = body.revision;
+    } catch (e) {
+        console.warn('Change catch-up failed:', e);
+    }
+}
 
 export function getSocket() {
     if (!socket) {
@@ -19,6 +69,23 @@ export function getSocket() {
         socket.on('disconnect', () => {
             console.log('Socket.IO disconnected');
         });
+
+        Object.entries(BULK_EVENTS).forEach(([event, names]) => {
+            socket.on(event, (changes) => unpackBulk(socket, names, changes));
+        });
+
+        // The server coalesces events into {events: [{event, items}]} frames
+        socket.on('batch', ({ events }) => {
+            events.forEach(({ event, items }) => {
+                items.forEach((item) => dispatchLocal(socket, event, item));
+            });
+        });
+
+        // Manager-level event, so components calling socket.off('connect')
+        // don't remove it.
+        socket.io.on('reconnect', () => catchUp(socket));
+        catchUp(socket);
+        startTimeSync(socket);
     }
     return socket;
 }
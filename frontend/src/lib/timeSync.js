@@ -0,0 +1,94 @@
+// NTP-style clock sync over the /nari socket (replaces polling /api/time).
+//
+// Each probe sends t0 (client send time); the server's ack carries t1
+// (receive) and t2 (reply), and t3 is when the ack arrives:
+//
+//     offset = ((t1 - t0) + (t2 - t3)) / 2      server clock - client clock
+//     rtt    = (t3 - t0) - (t2 - t1)
+//
+// A sync is a short burst of probes keeping the one with the smallest rtt,
+// the least distorted by queueing. The pause between syncs adapts: it
+// doubles while the offset holds steady and falls back to the minimum
+// when it drifts.
+
+const PROBES = 4;
+const PROBE_TIMEOUT = 5000;
+const MIN_INTERVAL = 30 * 1000;
+const MAX_INTERVAL = 30 * 60 * 1000;
+const DRIFT_TOLERANCE = 50; // ms the offset may move between syncs and still count as steady
+
+let offset = 0;
+let rtt = null;
+let synced = false;
+let interval = MIN_INTERVAL;
+let timer = null;
+let running = false;
+const listeners = new Set();
+
+function probe(socket) {
+    return new Promise((resolve) => {
+        const t0 = Date.now();
+        const timeout = setTimeout(() => resolve(null), PROBE_TIMEOUT);
+        socket.emit('time_sync', { t0 }, (reply) => {
+            clearTimeout(timeout);
+            const t3 = Date.now();
+            if (!reply || typeof reply.t1 !== 'number') return resolve(null);
+            resolve({
+                offset: ((reply.t1 - t0) + (reply.t2 - t3)) / 2,
+                rtt: (t3 - t0) - (reply.t2 - reply.t1)
+            });
+        });
+    });
+}
+
+async function sync(socket) {
+    clearTimeout(timer);
+    if (running) return;
+    if (!socket.connected) {
+        // Not connected yet: check again shortly (no traffic until then)
+        timer = setTimeout(() => sync(socket), 1000);
+        return;
+    }
+    running = true;
+    let best = null;
+    for (let i = 0; i < PROBES && socket.connected; i++) {
+        const sample = await probe(socket);
+        if (sample && (!best || sample.rtt < best.rtt)) best = sample;
+    }
+    running = false;
+    if (best) {
+        const drift = synced ? Math.abs(best.offset - offset) : Infinity;
+        interval = drift <= DRIFT_TOLERANCE ? Math.min(interval * 2, MAX_INTERVAL) : MIN_INTERVAL;
+        offset = best.offset;
+        rtt = best.rtt;
+        synced = true;
+        listeners.forEach((fn) => fn(getClockOffset()));
+    }
+    timer = setTimeout(() => sync(socket), best ? interval : MIN_INTERVAL);
+}
+
+// Called once by getSocket(). Reconnects resync at once, with the short
+// interval: the server may have restarted with a different clock. Uses the
+// manager-level event, which components calling socket.off('connect') keep.
+export function startTimeSync(socket) {
+    socket.io.on('reconnect', () => {
+        interval = MIN_INTERVAL;
+        sync(socket);
+    });
+    sync(socket);
+}
+
+// Current server time in epoch ms (local time until the first sync).
+export function serverNow() {
+    return Date.now() + offset;
+}
+
+export function getClockOffset() {
+    return { offset, rtt, synced, interval };
+}
+
+// Subscribe to sync results; returns the unsubscribe function.
+export function onTimeSync(fn) {
+    listeners.add(fn);
+    return () => listeners.delete(fn);
+}
@@ -0,0 +1,139 @@
+# modules/activity_history.py
+"""Append-only, day-segmented activity history.
+
+The console keeps only the last few hundred entries (see
+utils.log_user_activity); every entry is also appended to
+``data/activity/<YYYY-MM-DD>.jsonl``, one JSON object per line. Next to each
+segment, ``<YYYY-MM-DD>.idx`` holds a sparse index of ``full_date<TAB>offset``
+lines, one at least every INDEX_STRIDE bytes, so a range query opens only the
+segments for the days it covers and seeks near its start time instead of
+reading whole files.
+
+Appends are batched: the background flusher in utils hands over everything
+logged since the last flush in one call.
+"""
+import bisect
+import json
+import os
+import threading
+from modules import utils
+
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+INDEX_STRIDE = 16 * 1024  # bytes of segment between index entries
+
+_lock = threading.Lock()
+_last_indexed = {}  # segment path -> offset of its last index entry
+
+
+def history_dir():
+    return os.path.join(utils.DATA_DIR, "activity")
+
+
+def _segment_path(day):
+    return os.path.join(history_dir(), day + SEGMENT_SUFFIX)
+
+
+def _read_index(day):
+    """Return [(full_date, offset), ...] for a segment, in file order."""
+    index = []
+    try:
+        with open(os.path.join(history_dir(), day + INDEX_SUFFIX), encoding="utf-8") as f:
+            for line in f:
+                stamp, _, offset = line.rstrip("\n").partition("\t")
+                if offset.isdigit():
+                    index.append((stamp, int(offset)))
+    except OSError:
+        pass
+    return index
+
+
+def append(entries):
+    """Append activity entries (dicts with a "full_date") to their day segments."""
+    by_day = {}
+    for entry in entries:
+        stamp = entry.get("full_date") or utils.timestamp()
+        by_day.setdefault(stamp[:10], []).append((stamp, entry))
+
+    with _lock:
+        os.makedirs(history_dir(), exist_ok=True)
+        for day, items in by_day.items():
+            path = _segment_path(day)
+            try:
+                offset = os.path.getsize(path)
+            except OSError:
+                offset = 0
+            last = _last_indexed.get(path)
+            if last is None:
+                index = _read_index(day)
+                last = index[-1][1] if index else None
+
+            chunks = []
+            index_lines = []
+            for stamp, entry in items:
+                line = (json.dumps(entry) + "\n").encode("utf-8")
+                if last is None or offset - last >= INDEX_STRIDE:
+                    index_lines.append(f"{stamp}\t{offset}\n")
+                    last = offset
+                chunks.append(line)
+                offset += len(line)
+
+            with open(path, "ab") as f:
+                f.write(b"".join(chunks))
+            if index_lines:
+                with open(os.path.join(history_dir(), day + INDEX_SUFFIX), "a", encoding="utf-8") as f:
+                    f.writelines(index_lines)
+            _last_indexed[path] = last
+
+
+def days():
+    """Dates (YYYY-MM-DD) that have a segment, oldest first."""
+    try:
+        names = os.listdir(history_dir())
+    except OSError:
+        return []
+    return sorted(name[:-len(SEGMENT_SUFFIX)] for name in names if name.endswith(SEGMENT_SUFFIX))
+
+
+def query(start=None, end=None, limit=None, text=None):
+    """Return entries with start <= full_date <= end, oldest first.
+
+    start and end are "YYYY-MM-DD HH:MM:SS" strings (either may be None);
+    text filters on a case-insensitive substring of the entry text.
+    """
+    needle = text.lower() if text else None
+    all_days = days()
+    lo = 0 if start is None else bisect.bisect_left(all_days, start[:10])
+    hi = len(all_days) if end is None else bisect.bisect_right(all_days, end[:10])
+
+    results = []
+    for day in all_days[lo:hi]:
+        offset = 0
+        if start is not None and day == start[:10]:
+            # Last indexed entry strictly before start: nothing earlier can match
+            index = _read_index(day)
+            i = bisect.bisect_left([stamp for stamp, _ in index], start)
+            if i:
+                offset = index[i - 1][1]
+        try:
+            f = open(_segment_path(day), "rb")
+        except OSError:
+            continue
+        with f:
+            f.seek(offset)
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    continue  # half-written line
+                stamp = entry.get("full_date", "")
+                if start is not None and stamp < start:
+                    continue
+                if end is not None and stamp > end:
+                    break
+                if needle and needle not in str(entry.get("text", "")).lower():
+                    continue
+                results.append(entry)
+                if limit is not None and len(results) >= limit:
+                    return results
+    return results
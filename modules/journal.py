@@ -0,0 +1,323 @@
+# modules/journal.py
+"""Append-only mutation journal for JSON record collections.
+
+Instead of rewriting ``{"tasks": [...]}`` on every change, each mutation is
+appended as one JSON line to ``<document>.journal``::
+
+    {"op": "create", "id": 3, "data": {...}}
+    {"op": "patch", "id": 3, "data": {"status": "completed"}}
+    {"op": "delete", "id": 3}
+
+Readers replay the journal on top of the last snapshot (the original JSON
+document). A background compactor folds the journal into a new snapshot,
+written atomically through utils.save_json, once it grows past
+COMPACT_MAX_BYTES or its oldest entry is older than COMPACT_MAX_AGE.
+
+Every operation sets state rather than changing it relatively (create is an
+upsert), so replaying a journal that is already part of the snapshot - e.g.
+after a crash mid-compaction - yields the same result.
+
+Appends and compactions hold ``<document>.lock`` (utils.file_lock), so
+another process can neither write to a journal that is being retired nor
+hand out the same id.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from modules import utils
+
+JOURNAL_SUFFIX = ".journal"
+LOCK_SUFFIX = ".lock"
+COMPACT_MAX_BYTES = 256 * 1024
+COMPACT_MAX_AGE = 300  # seconds
+COMPACT_INTERVAL = 5  # seconds between compactor checks
+
+_UNLOADED = object()
+
+
+class JournaledCollection:
+    """A list of ``{"id": ...}`` records persisted as snapshot + journal."""
+
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.lock_path = path + LOCK_SUFFIX
+        self._lock = threading.RLock()
+        # id -> record; dict insertion order doubles as the stable list order
+        self._by_id = {}
+        self._last_id = 0
+        self._snapshot_sig = _UNLOADED
+        self._journal_ino = None
+        self._offset = 0
+        self._first_entry_at = None
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def records(self):
+        with self._lock:
+            self._refresh()
+            return list(self._by_id.values())
+
+    @property
+    def last_id(self):
+        with self._lock:
+            self._refresh()
+            return self._last_id
+
+    def get(self, record_id):
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(record_id)
+
+    def generation(self):
+        """Cheap token that changes whenever the snapshot or journal does."""
+        try:
+            st = os.stat(self.journal_path)
+            journal_state = (st.st_ino, st.st_size)
+        except OSError:
+            journal_state = None
+        return (utils.file_signature(self.path), journal_state)
+
+    def _refresh(self):
+        """Bring the in-memory state up to date with snapshot and journal."""
+        signature = utils.file_signature(self.path)
+        if signature != self._snapshot_sig:
+            self._rebuild(signature)
+            return
+
+        try:
+            st = os.stat(self.journal_path)
+        except OSError:
+            if self._offset:
+                # Journal was folded away by another process
+                self._rebuild(signature)
+            return
+        if st.st_ino != self._journal_ino or st.st_size < self._offset:
+            self._rebuild(signature)
+        elif st.st_size > self._offset:
+            self._offset = self._replay(self.journal_path, self._offset)
+
+    def _rebuild(self, signature):
+        self._snapshot_sig = signature
+        doc = utils.load_json(self.path)
+        records = doc.get(self.key, []) if isinstance(doc, dict) else []
+        # Copy records so patches never leak into the cached snapshot
+        self._by_id = {int(r.get("id", -1)): dict(r) for r in records}
+        # Highest id ever handed out; older snapshots predate the counter
+        last_id = doc.get("last_id", 0) if isinstance(doc, dict) else 0
+        self._last_id = max(int(last_id), max(self._by_id, default=0))
+        self._offset = 0
+        self._journal_ino = None
+        self._first_entry_at = None
+
+        # Leftovers from an interrupted compaction come before the live journal
+        for retired in sorted(glob.glob(self.journal_path + ".*")):
+            self._replay(retired, 0)
+        try:
+            st = os.stat(self.journal_path)
+        except OSError:
+            return
+        self._journal_ino = st.st_ino
+        self._offset = self._replay(self.journal_path, 0)
+        if self._offset:
+            self._first_entry_at = st.st_mtime
+
+    def _replay(self, path, offset):
+        """Apply complete journal lines from offset; return the new offset."""
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read()
+        except OSError:
+            return offset
+        end = chunk.rfind(b"\n") + 1  # ignore a half-written trailing line
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                utils.append_log("file_errors.log", f"Skipping bad journal entry in {path}: {e}")
+        return offset + end
+
+    def _apply(self, entry):
+        op = entry["op"]
+        record_id = int(entry["id"])
+        record = self._by_id.get(record_id)
+        if op == "create":
+            self._last_id = max(self._last_id, record_id)
+            data = dict(entry["data"], id=record_id)
+            if record is None:
+                self._by_id[record_id] = data
+            else:
+                record.clear()
+                record.update(data)
+        elif op == "patch":
+            if record is not None:
+                record.update(entry["data"])
+        elif op == "delete":
+            if record is not None:
+                del self._by_id[record_id]
+        else:
+            raise KeyError(f"unknown op {op!r}")
+
+    # -------------------------
+    # Writing
+    # -------------------------
+    def append(self, op, record_id, data=None):
+        """Append one mutation and return the affected record (None on delete)."""
+        entry = {"op": op, "id": record_id}
+        if data is not None:
+            entry["data"] = data
+        return self.commit([entry])[0]
+
+    def create(self, data):
+        """Append a create with the next id and return the new record.
+
+        Ids come from a monotonic counter that is persisted with the journal
+        entry itself, so they are never reused after a delete.
+        """
+        return self.commit([{"op": "create", "data": data}])[0]
+
+    def commit(self, entries):
+        """Append several mutations with a single write.
+
+        Creates without an id get the next ids from the counter. Returns the
+        resulting record for each entry (None for deletes), in order.
+        """
+        with self._lock, utils.file_lock(self.lock_path):
+            self._refresh()
+            next_id = self._last_id
+            lines = []
+            for entry in entries:
+                if entry["op"] == "create" and entry.get("id") is None:
+                    next_id += 1
+                    entry = dict(entry, id=next_id)
+                lines.append(entry)
+            payload = "".join(json.dumps(entry) + "\n" for entry in lines)
+
+            parent = os.path.dirname(self.journal_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(payload)
+            utils.bump_version(self.path)
+            if self._journal_ino is None:
+                self._journal_ino = os.stat(self.journal_path).st_ino
+            if self._first_entry_at is None:
+                self._first_entry_at = time.time()
+            # Per-entry results, as of that point in the batch (a record that
+            # is patched and then deleted still reports the patched state)
+            overlay = {}
+            results = []
+            for entry in lines:
+                record_id = int(entry["id"])
+                if entry["op"] == "create":
+                    record = dict(entry["data"], id=record_id)
+                elif entry["op"] == "patch":
+                    base = overlay[record_id] if record_id in overlay else self._by_id.get(record_id)
+                    record = None if base is None else dict(base, **entry["data"])
+                else:
+                    record = None
+                overlay[record_id] = record
+                results.append((record_id, record))
+
+            # Tail rather than apply directly, so the offset stays in step
+            # with the file.
+            self._refresh()
+            # Hand back the live record where it is the entry's final state
+            return [self._by_id.get(record_id, record)
+                    if record is not None and overlay[record_id] is record else record
+                    for record_id, record in results]
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+    def needs_compaction(self):
+        with self._lock:
+            try:
+                size = os.path.getsize(self.journal_path)
+            except OSError:
+                return False
+            if size >= COMPACT_MAX_BYTES:
+                return True
+            return (size > 0 and self._first_entry_at is not None
+                    and time.time() - self._first_entry_at >= COMPACT_MAX_AGE)
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot. Returns True if it did."""
+        with self._lock, utils.file_lock(self.lock_path):
+            self._refresh()
+            if not os.path.exists(self.journal_path):
+                return False
+
+            # Appenders are locked out, so nothing is written to the retired
+            # journal after it is replayed. Retiring it (rather than removing
+            # it after the snapshot) lets a crash mid-compaction recover.
+            retired = f"{self.journal_path}.{int(time.time() * 1000)}"
+            os.replace(self.journal_path, retired)
+            self._replay(retired, self._offset)
+
+            snapshot = {self.key: [dict(r) for r in self._by_id.values()], "last_id": self._last_id}
+            # Must be on disk before the retired journal is removed
+            utils.save_json(self.path, snapshot, sync=True)
+            for path in glob.glob(self.journal_path + ".*"):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    utils.append_log("file_errors.log", f"Could not remove {path}: {e}")
+
+            self._snapshot_sig = utils.file_signature(self.path)
+            self._journal_ino = None
+            self._offset = 0
+            self._first_entry_at = None
+            return True
+
+
+# -------------------------
+# Registry & background compactor
+# -------------------------
+_collections = {}
+_registry_lock = threading.Lock()
+_compactor_thread = None
+
+
+def get_collection(path, key):
+    """Return the process-wide JournaledCollection for path."""
+    abspath = os.path.abspath(path)
+    with _registry_lock:
+        collection = _collections.get(abspath)
+        if collection is None:
+            collection = JournaledCollection(abspath, key)
+            _collections[abspath] = collection
+        _ensure_compactor()
+        return collection
+
+
+def compact_all(force=False):
+    """Compact every journal that crossed a threshold (or all, if force)."""
+    with _registry_lock:
+        collections = list(_collections.values())
+    for collection in collections:
+        try:
+            if force or collection.needs_compaction():
+                collection.compact()
+        except Exception as e:
+            utils.append_log("file_errors.log", f"Journal compaction failed for {collection.path}: {e}")
+
+
+def _compactor_loop():
+    while True:
+        time.sleep(COMPACT_INTERVAL)
+        compact_all()
+
+
+def _ensure_compactor():
+    global _compactor_thread
+    if _compactor_thread is None:
+        _compactor_thread = threading.Thread(target=_compactor_loop, daemon=True)
+        _compactor_thread.start()
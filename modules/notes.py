@@ -1,18 +1,15 @@
 # modules/notes.py
 import argparse
 import os
-from modules import utils
+from modules import utils, repository
 
-NOTES_FILE = utils.NOTES_FILE
-NOTES_DIR = os.path.dirname(NOTES_FILE)
+NOTES_DIR = os.path.dirname(utils.NOTES_FILE)
 
-def _load_notes():
-    data = utils.load_json(NOTES_FILE)
-    return data.get("notes", [])
+def _repo():
+    return repository.get_repository("notes")
 
-def _save_notes(notes):
-    data = {"notes": notes}
-    utils.save_json(NOTES_FILE, data)
+def _load_notes():
+    return _repo().all()
 
 def add_note(argv):
     """add-note "title" """
@@ -25,17 +22,12 @@ def add_note(argv):
         return
 
     title = args.title[0]
-    notes = _load_notes()
-    new_id = utils.next_id(notes)
-    note = {
-        "id": new_id,
+    note = _repo().insert({
         "title": title,
         "content": "",
         "created": utils.timestamp()
-    }
-    notes.append(note)
-    _save_notes(notes)
-    print(f'Note added: [{new_id}] "{title}"')
+    })
+    print(f'Note added: [{note["id"]}] "{title}"')
 
 def list_notes(argv=None):
     notes = _load_notes()
@@ -58,8 +50,7 @@ def view_note(argv):
         print("Invalid id. Use integer.")
         return
 
-    notes = _load_notes()
-    note = next((n for n in notes if int(n.get("id", -1)) == id_), None)
+    note = _repo().get(id_)
     if not note:
         print(f"No note with id {id_}")
         return
@@ -80,8 +71,7 @@ def open_note(argv):
         print("Invalid id. Use integer.")
         return
 
-    notes = _load_notes()
-    note = next((n for n in notes if int(n.get("id", -1)) == id_), None)
+    note = _repo().get(id_)
     if not note:
         print(f"No note with id {id_}")
         return
@@ -102,9 +92,9 @@ def open_note(argv):
 
     # read back updated content
     with open(note_path, "r") as f:
-        note["content"] = f.read()
-    # save updated content back to notes.json
-    _save_notes(notes)
+        content = f.read()
+    # save updated content back to the notes store
+    _repo().update(id_, {"content": content})
     print(f"Note {id_} updated.")
 
 def delete_note(argv):
@@ -117,9 +107,7 @@ def delete_note(argv):
         print("Invalid id. Use integer.")
         return
 
-    notes = _load_notes()
-    new_notes = [n for n in notes if int(n.get("id", -1)) != id_]
-    if len(new_notes) == len(notes):
+    if not _repo().get(id_):
         print(f"No note with id {id_}")
         return
 
@@ -132,6 +120,6 @@ def delete_note(argv):
         # non-fatal: continue even if file removal fails
         pass
 
-    _save_notes(new_notes)
+    _repo().delete(id_)
     print(f"Note {id_} deleted.")
 
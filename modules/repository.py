@@ -0,0 +1,366 @@
+# modules/repository.py
+"""Shared in-memory id index over a storage collection.
+
+A Repository loads a record collection once into a dict of id -> record
+(insertion order is the stable list order) and keeps it in sync with its
+own writes, so lookups, updates and deletes by id are O(1) instead of a
+scan over every record. If another process (e.g. the CLI next to a running
+server) changes the collection, the backend's generation token changes
+and the index is reloaded on the next access.
+
+Collections can also keep secondary indexes - value -> ids buckets for
+equality filters and sorted (key, id) lists for ordering and range filters -
+so query() costs roughly the page size instead of a scan of every record.
+
+The Flask routes, the legacy app/ routes (through the *_manager classes)
+and the CLI all share the instance returned by get_repository().
+"""
+import base64
+import bisect
+import json
+import threading
+from modules import storage
+
+# Sort keys are (0, value) for records that have the field and (1, "") for
+# those that don't, so records without e.g. a due date sort last.
+_MISSING = (1, "")
+_LOWEST_ID = float("-inf")
+_HIGHEST_ID = float("inf")
+
+
+def encode_cursor(position):
+    """Opaque string for a query() position."""
+    (flag, key), record_id = position
+    raw = json.dumps([flag, key, record_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); returns None if cursor is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        flag, key, record_id = json.loads(raw)
+        return ((int(flag), key), int(record_id))
+    except (ValueError, TypeError):
+        return None
+
+
+class Repository:
+    def __init__(self, collection, backend, index_fields=(), sort_fields=()):
+        self.collection = collection
+        self.backend = backend
+        self.index_fields = tuple(index_fields)
+        self.sort_fields = ("id",) + tuple(f for f in sort_fields if f != "id")
+        self._lock = threading.RLock()
+        self._records = None
+        self._order = None  # cached list view, rebuilt after writes
+        self._generation = None
+        self._buckets = {}  # field -> value -> set of ids
+        self._sorted = {}   # field -> sorted list of (sort key, id)
+        self._indexed = {}  # id -> (bucket values, sort keys) currently indexed
+
+    def _sync(self):
+        generation = self.backend.generation(self.collection)
+        if self._records is None or generation != self._generation:
+            self._records = {int(r.get("id", -1)): r for r in self.backend.all(self.collection)}
+            self._order = None
+            self._generation = generation
+            self._reindex()
+
+    def _stored(self, record_id, record):
+        """Apply the result of one of our own writes to the index."""
+        if record is None:
+            self._records.pop(record_id, None)
+        else:
+            self._records[record_id] = record
+        self._index(record_id, record)
+        self._order = None
+        self._generation = self.backend.generation(self.collection)
+
+    # -------------------------
+    # Secondary indexes
+    # -------------------------
+    def _keys(self, record_id, record):
+        values = {}
+        for field in self.index_fields:
+            value = record.get(field)
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            values[field] = value
+        keys = {}
+        for field in self.sort_fields:
+            if field == "id":
+                keys[field] = (0, record_id)
+                continue
+            # Only string keys, so every key compares cleanly with the others
+            value = record.get(field)
+            keys[field] = (0, value) if isinstance(value, str) and value else _MISSING
+        return values, keys
+
+    def _reindex(self):
+        self._buckets = {field: {} for field in self.index_fields}
+        self._sorted = {field: [] for field in self.sort_fields}
+        self._indexed = {}
+        for record_id, record in self._records.items():
+            values, keys = self._keys(record_id, record)
+            for field, value in values.items():
+                self._buckets[field].setdefault(value, set()).add(record_id)
+            for field, key in keys.items():
+                self._sorted[field].append((key, record_id))
+            self._indexed[record_id] = (values, keys)
+        for entries in self._sorted.values():
+            entries.sort()
+
+    def _index(self, record_id, record):
+        """Move record_id's index entries to match record (None removes them)."""
+        old = self._indexed.pop(record_id, None)
+        if old is not None:
+            values, keys = old
+            for field, value in values.items():
+                bucket = self._buckets[field].get(value)
+                if bucket is not None:
+                    bucket.discard(record_id)
+                    if not bucket:
+                        del self._buckets[field][value]
+            for field, key in keys.items():
+                entries = self._sorted[field]
+                i = bisect.bisect_left(entries, (key, record_id))
+                if i < len(entries) and entries[i] == (key, record_id):
+                    del entries[i]
+        if record is None:
+            return
+        values, keys = self._keys(record_id, record)
+        for field, value in values.items():
+            self._buckets[field].setdefault(value, set()).add(record_id)
+        for field, key in keys.items():
+            bisect.insort(self._sorted[field], (key, record_id))
+        self._indexed[record_id] = (values, keys)
+
+    def _range(self, field, lower, upper):
+        """Index bounds of the entries in self._sorted[field] with lower < key < upper."""
+        entries = self._sorted[field]
+        start = 0 if lower is None else bisect.bisect_right(entries, ((0, lower), _HIGHEST_ID))
+        if upper is None:
+            end = len(entries) if lower is None else bisect.bisect_left(entries, (_MISSING, _LOWEST_ID))
+        else:
+            end = bisect.bisect_left(entries, ((0, upper), _LOWEST_ID))
+        return start, max(start, end)
+
+    def query(self, equals=None, ranges=None, sort="id", descending=False, limit=None, after=None):
+        """Return (records, next_position) for a filtered, ordered page.
+
+        equals maps an index field to the value it must have; ranges maps a
+        sort field to exclusive (lower, upper) bounds, either of which may be
+        None. Records are ordered by sort and then id. after is the position
+        returned by the previous page; next_position is None on the last page.
+        """
+        equals = equals or {}
+        ranges = ranges or {}
+        with self._lock:
+            self._sync()
+            for field in equals:
+                if field not in self._buckets:
+                    raise ValueError(f"{field} is not indexed")
+            for field in list(ranges) + [sort]:
+                if field not in self._sorted:
+                    raise ValueError(f"cannot sort or range on {field}")
+
+            # Walk whichever candidate set is smallest
+            start, end = self._range(sort, *ranges.get(sort, (None, None)))
+            entries = self._sorted[sort]
+            best, candidates = end - start, None
+            for field, value in equals.items():
+                bucket = self._buckets[field].get(value, ())
+                if len(bucket) < best:
+                    best, candidates = len(bucket), bucket
+            for field, (lower, upper) in ranges.items():
+                if field == sort:
+                    continue
+                lo, hi = self._range(field, lower, upper)
+                if hi - lo < best:
+                    best, candidates = hi - lo, [rid for _, rid in self._sorted[field][lo:hi]]
+            if candidates is not None:
+                entries = sorted((self._indexed[rid][1][sort], rid) for rid in candidates)
+                start, end = 0, len(entries)
+
+            if after is not None:
+                try:
+                    if descending:
+                        end = min(end, bisect.bisect_left(entries, after))
+                    else:
+                        start = max(start, bisect.bisect_right(entries, after))
+                except TypeError:
+                    raise ValueError("cursor does not belong to this sort order")
+            positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+
+            page = []
+            for i in positions:
+                key, record_id = entries[i]
+                values, keys = self._indexed[record_id]
+                if any(field not in values or values[field] != value for field, value in equals.items()):
+                    continue
+                if not all(self._in_range(keys[field], lower, upper)
+                           for field, (lower, upper) in ranges.items()):
+                    continue
+                if limit is not None and len(page) == limit:
+                    # There is at least one more match
+                    last_id = page[-1]["id"]
+                    return page, (self._indexed[last_id][1][sort], last_id)
+                page.append(self._records[record_id])
+            return page, None
+
+    @staticmethod
+    def _in_range(key, lower, upper):
+        if key == _MISSING:
+            return lower is None and upper is None
+        return (lower is None or key[1] > lower) and (upper is None or key[1] < upper)
+
+    def all(self):
+        """Return every record in stable order. Treat the list as read-only."""
+        with self._lock:
+            self._sync()
+            if self._order is None:
+                self._order = list(self._records.values())
+            return self._order
+
+    def version(self):
+        """Token for HTTP caching; see storage backends' version()."""
+        return self.backend.version(self.collection)
+
+    def get(self, record_id):
+        with self._lock:
+            self._sync()
+            return self._records.get(record_id)
+
+    def insert(self, record):
+        with self._lock:
+            self._sync()
+            created = self.backend.insert(self.collection, record)
+            self._stored(int(created["id"]), created)
+            return created
+
+    def update(self, record_id, fields):
+        with self._lock:
+            self._sync()
+            if record_id not in self._records:
+                return None
+            updated = self.backend.update(self.collection, record_id, fields)
+            if updated is not None:
+                self._stored(record_id, updated)
+            return updated
+
+    def delete(self, record_id):
+        with self._lock:
+            self._sync()
+            if record_id not in self._records:
+                return False
+            deleted = self.backend.delete(self.collection, record_id)
+            if deleted:
+                self._stored(record_id, None)
+            return deleted
+
+    def apply(self, operations):
+        """Validate and apply a batch of mutations with one backend write.
+
+        operations is a list of {"op": "create"|"patch"|"delete", "id", "data"}.
+        Returns (True, results) with one record (None for deletes) per
+        operation, or (False, errors) with an error string or None per
+        operation if any target is missing; nothing is written in that case.
+        """
+        with self._lock:
+            self._sync()
+            errors = []
+            deleted = set()
+            for op in operations:
+                record_id = op.get("id")
+                if op["op"] == "create":
+                    errors.append(None)
+                elif record_id not in self._records or record_id in deleted:
+                    errors.append("not found")
+                else:
+                    if op["op"] == "delete":
+                        deleted.add(record_id)
+                    errors.append(None)
+            if any(errors):
+                return False, errors
+
+            results = self.backend.apply(self.collection, operations)
+            for op, record in zip(operations, results):
+                if record is None:
+                    # deleted, possibly after an earlier patch in this batch
+                    self._records.pop(op["id"], None)
+                    self._index(op["id"], None)
+                else:
+                    self._records[int(record["id"])] = record
+                    self._index(int(record["id"]), record)
+            self._order = None
+            self._generation = self.backend.generation(self.collection)
+            return True, results
+
+
+MAX_BULK_OPERATIONS = 500
+_BULK_OPS = {"create": "create", "update": "patch", "delete": "delete"}
+
+
+def build_operations(items, new_record, record_changes):
+    """Translate bulk request items into Repository.apply operations.
+
+    items look like {"op": "create"|"update"|"delete", "id": 3, "data": {...}}.
+    new_record(data) returns (record, error) and record_changes(data) returns
+    the fields to patch. Returns (True, operations) or (False, errors) with
+    an error string or None per item.
+    """
+    operations = []
+    errors = []
+    for item in items:
+        if not isinstance(item, dict) or item.get("op") not in _BULK_OPS:
+            errors.append("op must be create, update or delete")
+            continue
+        op = _BULK_OPS[item["op"]]
+        data = item.get("data")
+        if data is None:
+            data = {}
+        elif not isinstance(data, dict):
+            errors.append("data must be an object")
+            continue
+        if op == "create":
+            record, error = new_record(data)
+            errors.append(error)
+            operations.append({"op": op, "data": record})
+            continue
+        try:
+            record_id = int(item.get("id"))
+        except (TypeError, ValueError):
+            errors.append("id must be an integer")
+            continue
+        errors.append(None)
+        if op == "patch":
+            operations.append({"op": op, "id": record_id, "data": record_changes(data)})
+        else:
+            operations.append({"op": op, "id": record_id})
+    if any(errors):
+        return False, errors
+    return True, operations
+
+
+# collection -> (equality-indexed fields, sortable fields)
+INDEXES = {
+    "tasks": (("status", "priority"), ("due",)),
+}
+
+_repositories = {}
+_registry_lock = threading.Lock()
+
+
+def get_repository(collection):
+    """Return the process-wide repository for a record collection."""
+    backend = storage.get_backend()
+    with _registry_lock:
+        repo = _repositories.get(collection)
+        if repo is None or repo.backend is not backend:
+            index_fields, sort_fields = INDEXES.get(collection, ((), ()))
+            repo = Repository(collection, backend, index_fields, sort_fields)
+            _repositories[collection] = repo
+        return repo
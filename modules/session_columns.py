@@ -0,0 +1,200 @@
+# modules/session_columns.py
+"""Columnar in-memory view of study sessions for report reductions.
+
+Sessions are held as parallel arrays, one slot per session::
+
+    dates     date ordinal (date.toordinal())
+    subjects  index into the subject dictionary (``names``)
+    starts    start time in minutes after midnight, -1 if unknown
+    minutes   elapsed minutes
+
+Group-by reductions then run over the arrays instead of over session
+dicts: with NumPy installed they are single bincount / maximum.at calls,
+otherwise a tight loop over the stdlib ``array`` columns. The view is
+built from storage on first use. StudyManager appends each saved session
+to it and drops it after an edit or delete, so the next report rebuilds.
+"""
+import threading
+from array import array
+from datetime import date
+from modules import storage
+
+try:
+    import numpy as np
+except ImportError:  # optional: reports fall back to plain loops
+    np = None
+
+GROUP_BY = ("day", "subject", "hour")
+
+
+def _ordinal(day):
+    try:
+        return date.fromisoformat(str(day)).toordinal()
+    except ValueError:
+        return None
+
+
+def _start_minute(value):
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _elapsed(session):
+    try:
+        return max(0, int(session.get("elapsed_minutes") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class SessionColumns:
+    def __init__(self, sessions=None):
+        self._lock = threading.RLock()
+        self.names = []   # subject code -> name
+        self._codes = {}  # subject name -> code
+        self.dates = array("i")
+        self.subjects = array("i")
+        self.starts = array("i")
+        self.minutes = array("i")
+        self._hours = array("i")  # start hours, for the loop path
+        self._ids = set()  # ids of the sessions in the view
+        for session in sessions or ():
+            self._append(session)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def add(self, session):
+        """Append one saved session unless the view already holds its id."""
+        with self._lock:
+            if session.get("id") in self._ids:
+                return
+            self._append(session)
+
+    def _append(self, session):
+        ordinal = _ordinal(session.get("date"))
+        if ordinal is None:
+            return
+        if session.get("id") is not None:
+            self._ids.add(session["id"])
+        subject = session.get("subject") or "unknown"
+        code = self._codes.get(subject)
+        if code is None:
+            code = self._codes[subject] = len(self.names)
+            self.names.append(subject)
+        self.dates.append(ordinal)
+        self.subjects.append(code)
+        self.starts.append(_start_minute(session.get("start_time")))
+        self.minutes.append(_elapsed(session))
+
+    def _keys(self, group_by):
+        if group_by == "day":
+            return self.dates
+        if group_by == "subject":
+            return self.subjects
+        if group_by == "hour":
+            if np is not None:
+                starts = np.frombuffer(self.starts, dtype=np.int32)
+                return np.where(starts >= 0, starts // 60, -1).astype(np.int32)
+            # Derived on hour queries and kept; only rows added since the
+            # last one are converted
+            done = len(self._hours)
+            self._hours.extend(s // 60 if s >= 0 else -1 for s in self.starts[done:])
+            return self._hours
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+
+    def _label(self, group_by, key):
+        if group_by == "day":
+            return date.fromordinal(key).isoformat()
+        if group_by == "subject":
+            return self.names[key]
+        return key
+
+    def totals(self, start=None, end=None, group_by="day"):
+        """{key: {"minutes", "sessions", "longest"}} for sessions dated start..end.
+
+        start and end are YYYY-MM-DD strings (inclusive, either may be None).
+        Keys are dates, subject names or start hours (0-23) depending on
+        group_by; sessions without a start time are left out of "hour".
+        """
+        with self._lock:
+            keys = self._keys(group_by)
+            lo = _ordinal(start) if start else None
+            hi = _ordinal(end) if end else None
+            if np is not None:
+                raw = self._reduce_numpy(keys, lo, hi)
+            else:
+                raw = self._reduce_loop(keys, lo, hi)
+            return {self._label(group_by, key): figures for key, figures in sorted(raw.items()) if key >= 0}
+
+    def _reduce_numpy(self, keys, lo, hi):
+        dates = np.frombuffer(self.dates, dtype=np.int32)
+        if not isinstance(keys, np.ndarray):
+            keys = np.frombuffer(keys, dtype=np.int32)
+        minutes = np.frombuffer(self.minutes, dtype=np.int32)
+        mask = np.ones(len(dates), dtype=bool)
+        if lo is not None:
+            mask &= dates >= lo
+        if hi is not None:
+            mask &= dates <= hi
+        mask &= keys >= 0
+        keys, minutes = keys[mask], minutes[mask]
+        if not len(keys):
+            return {}
+        groups, inverse = np.unique(keys, return_inverse=True)
+        total = np.bincount(inverse, weights=minutes, minlength=len(groups))
+        count = np.bincount(inverse, minlength=len(groups))
+        longest = np.zeros(len(groups), dtype=np.int64)
+        np.maximum.at(longest, inverse, minutes)
+        return {int(key): {"minutes": int(total[i]), "sessions": int(count[i]), "longest": int(longest[i])}
+                for i, key in enumerate(groups)}
+
+    def _reduce_loop(self, keys, lo, hi):
+        raw = {}
+        for ordinal, key, minutes in zip(self.dates, keys, self.minutes):
+            if (lo is not None and ordinal < lo) or (hi is not None and ordinal > hi) or key < 0:
+                continue
+            figures = raw.get(key)
+            if figures is None:
+                figures = raw[key] = {"minutes": 0, "sessions": 0, "longest": 0}
+            figures["minutes"] += minutes
+            figures["sessions"] += 1
+            if minutes > figures["longest"]:
+                figures["longest"] = minutes
+        return raw
+
+
+_columns = None
+_columns_backend = None
+_columns_lock = threading.Lock()
+
+
+def get_columns():
+    """Return the process-wide columnar view, building it from storage if needed."""
+    global _columns, _columns_backend
+    backend = storage.get_backend()
+    with _columns_lock:
+        if _columns is None or _columns_backend is not backend:
+            _columns = SessionColumns(backend.all("sessions"))
+            _columns_backend = backend
+        return _columns
+
+
+def add(session):
+    """Append a newly stored session (with its id) to the view, if built.
+
+    A view built after the session was stored has already read it from
+    storage; add() skips it there rather than counting it twice.
+    """
+    with _columns_lock:
+        if _columns is not None:
+            _columns.add(session)
+
+
+def invalidate():
+    """Drop the view after an edit or delete; the next report rebuilds it."""
+    global _columns
+    with _columns_lock:
+        _columns = None
@@ -0,0 +1,268 @@
+# modules/session_partitions.py
+"""Month-partitioned storage for study sessions (JSON backend).
+
+Sessions live in one document per month plus a small manifest::
+
+    data/logs/sessions/manifest.json  {"last_id": 42,
+                                       "partitions": {"2025-11": {"count": 12,
+                                                                  "min_id": 1,
+                                                                  "max_id": 12}}}
+    data/logs/sessions/2025-11.json   {"sessions": [...]}
+
+A write rewrites only the partition of the session's month and the
+manifest; a date-range read opens only the months it covers. Lookups by id
+only open partitions whose id range contains it. Writes hold
+manifest.json.lock, so the CLI and the server never hand out the same id.
+
+The first time the store is used, sessions from the legacy layout
+(data/logs/master.json plus the per-day data/logs/<date>.json mirrors) are
+split into partitions and the old files are moved to data/logs/legacy/.
+scripts/migrate_sessions.py runs the same migration explicitly.
+"""
+import glob
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from modules import utils
+
+PARTITION_DIRNAME = "sessions"
+MANIFEST_FILENAME = "manifest.json"
+LEGACY_DIRNAME = "legacy"
+UNDATED = "undated"
+
+_DAILY_LOG = re.compile(r"^\d{4}-\d{2}-\d{2}\.json$")
+
+
+def partition_dir():
+    return os.path.join(utils.LOGS_DIR, PARTITION_DIRNAME)
+
+
+def manifest_path():
+    return os.path.join(partition_dir(), MANIFEST_FILENAME)
+
+
+def month_of(session):
+    """Partition key ("YYYY-MM") for a session, from its date."""
+    day = str(session.get("date") or "")
+    return day[:7] if re.match(r"^\d{4}-\d{2}", day) else UNDATED
+
+
+class SessionPartitions:
+    def __init__(self):
+        self._lock = threading.RLock()
+
+    # -------------------------
+    # Files
+    # -------------------------
+    def _partition_path(self, month):
+        return os.path.join(partition_dir(), f"{month}.json")
+
+    def _manifest(self):
+        doc = utils.load_json(manifest_path())
+        if isinstance(doc, dict) and "partitions" in doc:
+            return doc
+        migrate_legacy()
+        doc = utils.load_json(manifest_path())
+        return doc if isinstance(doc, dict) and "partitions" in doc else {"last_id": 0, "partitions": {}}
+
+    def _load(self, month):
+        doc = utils.load_json(self._partition_path(month))
+        return doc.get("sessions", []) if isinstance(doc, dict) else []
+
+    def _store(self, manifest, changed):
+        """Write the changed partitions ({month: items}), then the manifest.
+
+        Both synchronously, partitions first: another process never reads a
+        manifest entry whose partition isn't on disk yet. Callers hold
+        _locked().
+        """
+        partitions = dict(manifest["partitions"])
+        for month, items in changed.items():
+            utils.save_json(self._partition_path(month), {"sessions": items}, sync=True)
+            if items:
+                ids = [int(s["id"]) for s in items]
+                partitions[month] = {"count": len(items), "min_id": min(ids), "max_id": max(ids)}
+            else:
+                partitions.pop(month, None)
+        utils.save_json(manifest_path(), {"last_id": manifest["last_id"], "partitions": partitions}, sync=True)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive write access, across threads and processes (the CLI
+        saves sessions while the server runs)."""
+        with self._lock, utils.file_lock(manifest_path() + ".lock"):
+            yield
+
+    def _locate(self, manifest, session_id):
+        """Return (month, items, index) for a session id, or None."""
+        for month, info in manifest["partitions"].items():
+            if info["min_id"] <= session_id <= info["max_id"]:
+                items = self._load(month)
+                for i, session in enumerate(items):
+                    if int(session.get("id", -1)) == session_id:
+                        return month, items, i
+        return None
+
+    # -------------------------
+    # Storage interface
+    # -------------------------
+    def generation(self):
+        return utils.file_signature(manifest_path())
+
+    def version(self):
+        return utils.document_version(manifest_path())
+
+    def last_id(self):
+        with self._lock:
+            return int(self._manifest().get("last_id", 0))
+
+    def months(self):
+        with self._lock:
+            return sorted(self._manifest()["partitions"])
+
+    def all(self):
+        with self._lock:
+            sessions = []
+            for month in sorted(self._manifest()["partitions"]):
+                sessions.extend(self._load(month))
+            return sessions
+
+    def between(self, start=None, end=None):
+        """Sessions with start <= date <= end (YYYY-MM-DD, inclusive)."""
+        with self._lock:
+            manifest = self._manifest()
+            sessions = []
+            for month in sorted(manifest["partitions"]):
+                if month == UNDATED:
+                    continue
+                if (start and month < start[:7]) or (end and month > end[:7]):
+                    continue
+                for session in self._load(month):
+                    day = session.get("date", "")
+                    if (not start or day >= start) and (not end or day <= end):
+                        sessions.append(session)
+            return sessions
+
+    def get(self, session_id):
+        with self._lock:
+            found = self._locate(self._manifest(), session_id)
+            return found[1][found[2]] if found else None
+
+    def insert(self, record):
+        with self._locked():
+            manifest = self._manifest()
+            record = dict(record)
+            month = month_of(record)
+            items = list(self._load(month))
+            # Ids in the partition count too: a crash between the partition
+            # and manifest writes leaves the manifest's last_id behind
+            record["id"] = max([int(manifest.get("last_id", 0))] + [int(s["id"]) for s in items]) + 1
+            manifest = dict(manifest, last_id=record["id"])
+            items.append(record)
+            self._store(manifest, {month: items})
+            return record
+
+    def update(self, session_id, fields):
+        with self._locked():
+            manifest = self._manifest()
+            found = self._locate(manifest, session_id)
+            if not found:
+                return None
+            month, items, i = found
+            items = list(items)
+            record = dict(items[i], **fields)
+            record["id"] = session_id
+            new_month = month_of(record)
+            if new_month == month:
+                items[i] = record
+                self._store(manifest, {month: items})
+            else:
+                # The date moved to another month: move the record too,
+                # adding it before removing it
+                del items[i]
+                target = list(self._load(new_month))
+                target.append(record)
+                self._store(manifest, {new_month: target, month: items})
+            return record
+
+    def delete(self, session_id):
+        with self._locked():
+            manifest = self._manifest()
+            found = self._locate(manifest, session_id)
+            if not found:
+                return False
+            month, items, i = found
+            items = list(items)
+            del items[i]
+            self._store(manifest, {month: items})
+            return True
+
+
+# -------------------------
+# Migration from master.json + daily logs
+# -------------------------
+def _session_key(session):
+    return (session.get("date"), session.get("subject"), session.get("start_time"),
+            session.get("end_time"), session.get("elapsed_minutes"))
+
+
+def migrate_legacy():
+    """Split data/logs/master.json and the daily logs into month partitions.
+
+    Sessions that only appear in a daily log are kept too; sessions without
+    an id get one. Does nothing if a manifest already exists. Returns
+    {month: count}.
+    """
+    if os.path.exists(manifest_path()):
+        return {}
+    master_path = os.path.join(utils.LOGS_DIR, "master.json")
+    daily_paths = sorted(p for p in glob.glob(os.path.join(utils.LOGS_DIR, "*.json"))
+                         if _DAILY_LOG.match(os.path.basename(p)))
+    for path in [master_path] + daily_paths:
+        utils.flush(path)
+
+    master = utils.load_json(master_path)
+    master = master if isinstance(master, dict) else {}
+    sessions = [dict(s) for s in master.get("sessions", []) if isinstance(s, dict)]
+
+    # The daily logs mirror master.json; add only what master.json lacks
+    seen = Counter(_session_key(s) for s in sessions)
+    for path in daily_paths:
+        day = os.path.basename(path)[:-len(".json")]
+        doc = utils.load_json(path)
+        for entry in doc.get("sessions", []) if isinstance(doc, dict) else []:
+            session = {"date": day, **{k: v for k, v in entry.items() if k != "date"}}
+            key = _session_key(session)
+            if seen[key]:
+                seen[key] -= 1
+            else:
+                sessions.append(session)
+
+    last_id = max([int(master.get("last_id") or 0)] +
+                  [int(s["id"]) for s in sessions if s.get("id") is not None])
+    by_month = {}
+    for session in sessions:
+        if session.get("id") is None:
+            last_id += 1
+            session["id"] = last_id
+        by_month.setdefault(month_of(session), []).append(session)
+
+    partitions = {}
+    for month, items in by_month.items():
+        utils.save_json(os.path.join(partition_dir(), f"{month}.json"), {"sessions": items}, sync=True)
+        ids = [int(s["id"]) for s in items]
+        partitions[month] = {"count": len(items), "min_id": min(ids), "max_id": max(ids)}
+    # Written last: its presence marks the migration as done
+    utils.save_json(manifest_path(), {"last_id": last_id, "partitions": partitions}, sync=True)
+
+    legacy_dir = os.path.join(utils.LOGS_DIR, LEGACY_DIRNAME)
+    for path in [master_path] + daily_paths:
+        if os.path.exists(path):
+            os.makedirs(legacy_dir, exist_ok=True)
+            os.replace(path, os.path.join(legacy_dir, os.path.basename(path)))
+            utils.invalidate_cache(path)
+    if sessions:
+        utils.append_log("storage.log", f"Split {len(sessions)} session(s) into {len(partitions)} month partition(s)")
+    return {month: len(items) for month, items in by_month.items()}
@@ -0,0 +1,492 @@
+# modules/storage.py
+"""Pluggable persistence for tasks, notes, subjects and study sessions.
+
+Two backends share one small interface:
+
+* ``JsonBackend`` keeps the original data/*.json documents (default).
+  Tasks and notes are written as small appends to a mutation journal
+  (see modules/journal.py) that is periodically folded into the document.
+  Study sessions are split into monthly documents
+  (see modules/session_partitions.py).
+* ``SQLiteBackend`` stores one row per record in data/nari.db using WAL
+  mode, so a single update touches one row instead of rewriting a file.
+
+Pick one with the ``NARI_STORAGE`` environment variable (``json`` or
+``sqlite``). The first time the SQLite database is created it is filled
+from the existing JSON files by ``migrate_from_json``.
+
+Collections are ``tasks``, ``notes`` and ``sessions`` (dict records with an
+integer ``id``) and ``subjects`` (plain names, keyed by the name itself).
+"""
+import json
+import os
+import sqlite3
+import threading
+from modules import utils, journal, session_partitions
+
+STORAGE_ENV = "NARI_STORAGE"
+SQLITE_FILENAME = "nari.db"
+
+RECORD_COLLECTIONS = ("tasks", "notes", "sessions")
+JOURNALED_COLLECTIONS = ("tasks", "notes")
+COLLECTIONS = RECORD_COLLECTIONS + ("subjects",)
+
+
+def _collection_file(collection):
+    """Return (path, top-level key) of the JSON document for a collection."""
+    # Resolved on every call so tests can repoint utils.* at a temp dir.
+    if collection == "tasks":
+        return utils.TASKS_FILE, "tasks"
+    if collection == "notes":
+        return utils.NOTES_FILE, "notes"
+    if collection == "subjects":
+        return utils.SUBJECTS_FILE, "subjects"
+    raise KeyError(f"Unknown collection: {collection}")
+
+
+def _check_collection(collection):
+    if collection not in COLLECTIONS:
+        raise KeyError(f"Unknown collection: {collection}")
+
+
+# -------------------------
+# JSON backend
+# -------------------------
+class JsonBackend:
+    """Whole-document storage on top of utils.load_json/save_json."""
+
+    name = "json"
+
+    def __init__(self):
+        self._sessions = session_partitions.SessionPartitions()
+
+    def _journal(self, collection):
+        path, key = _collection_file(collection)
+        return journal.get_collection(path, key)
+
+    def _load_doc(self, collection):
+        path, _ = _collection_file(collection)
+        data = utils.load_json(path)
+        return data if isinstance(data, dict) else {}
+
+    def _load(self, collection):
+        _, key = _collection_file(collection)
+        return self._load_doc(collection).get(key, [])
+
+    def _save(self, collection, items):
+        path, key = _collection_file(collection)
+        utils.save_json(path, {key: items})
+
+    def last_id(self, collection):
+        """Highest id ever handed out in a record collection."""
+        if collection == "sessions":
+            return self._sessions.last_id()
+        if collection in JOURNALED_COLLECTIONS:
+            return self._journal(collection).last_id
+        raise KeyError(f"Not a record collection: {collection}")
+
+    def generation(self, collection):
+        """Token that changes when the collection is modified on disk."""
+        if collection == "sessions":
+            return self._sessions.generation()
+        if collection in JOURNALED_COLLECTIONS:
+            return self._journal(collection).generation()
+        path, _ = _collection_file(collection)
+        return utils.file_signature(path)
+
+    def version(self, collection):
+        """Token for HTTP caching; changes on every write to the collection."""
+        if collection == "sessions":
+            return self._sessions.version()
+        path, _ = _collection_file(collection)
+        if collection in JOURNALED_COLLECTIONS:
+            return (utils.document_version(path), self.generation(collection))
+        return utils.document_version(path)
+
+    def all(self, collection):
+        if collection == "sessions":
+            return self._sessions.all()
+        if collection in JOURNALED_COLLECTIONS:
+            return self._journal(collection).records()
+        return self._load(collection)
+
+    def sessions_between(self, start=None, end=None):
+        """Study sessions dated start..end (inclusive), opening only those months."""
+        return self._sessions.between(start, end)
+
+    def get(self, collection, record_id):
+        if collection == "sessions":
+            return self._sessions.get(record_id)
+        if collection in JOURNALED_COLLECTIONS:
+            return self._journal(collection).get(record_id)
+        items = self._load(collection)
+        return record_id if record_id in items else None
+
+    def insert(self, collection, record):
+        if collection == "sessions":
+            return self._sessions.insert(record)
+        if collection in JOURNALED_COLLECTIONS:
+            return self._journal(collection).create({k: v for k, v in record.items() if k != "id"})
+
+        items = self._load(collection)
+        if record in items:
+            return None
+        items.append(record)
+        self._save(collection, items)
+        return {"name": record}
+
+    def update(self, collection, record_id, fields):
+        if collection == "sessions":
+            return self._sessions.update(record_id, fields)
+        if collection in JOURNALED_COLLECTIONS:
+            log = self._journal(collection)
+            if log.get(record_id) is None:
+                return None
+            return log.append("patch", record_id, fields)
+
+        items = self._load(collection)
+        new_name = fields.get("name")
+        if record_id not in items:
+            return None
+        if new_name != record_id and new_name in items:
+            return None
+        items[items.index(record_id)] = new_name
+        self._save(collection, items)
+        return {"name": new_name}
+
+    def delete(self, collection, record_id):
+        if collection == "sessions":
+            return self._sessions.delete(record_id)
+        if collection in JOURNALED_COLLECTIONS:
+            log = self._journal(collection)
+            if log.get(record_id) is None:
+                return False
+            log.append("delete", record_id)
+            return True
+
+        items = self._load(collection)
+        if record_id not in items:
+            return False
+        items.remove(record_id)
+        self._save(collection, items)
+        return True
+
+    def apply(self, collection, operations):
+        """Apply a batch of {"op", "id", "data"} mutations in one write.
+
+        Targets must already be validated (see Repository.apply). Returns the
+        resulting record per operation, None for deletes.
+        """
+        if collection in JOURNALED_COLLECTIONS:
+            entries = []
+            for op in operations:
+                entry = {"op": op["op"], "id": op.get("id")}
+                if op["op"] != "delete":
+                    entry["data"] = {k: v for k, v in op["data"].items() if k != "id"}
+                entries.append(entry)
+            return self._journal(collection).commit(entries)
+
+        results = []
+        for op in operations:
+            if op["op"] == "create":
+                results.append(self.insert(collection, op["data"]))
+            elif op["op"] == "patch":
+                results.append(self.update(collection, op["id"], op["data"]))
+            else:
+                self.delete(collection, op["id"])
+                results.append(None)
+        return results
+
+
+# -------------------------
+# SQLite backend
+# -------------------------
+# Columns copied out of the record so they can be indexed; the full record
+# always lives in the ``data`` column.
+_INDEXED_COLUMNS = {
+    "tasks": ("status", "priority", "due"),
+    "notes": ("title",),
+    "sessions": ("date", "subject"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT,
+    priority TEXT,
+    due TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(due);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT,
+    subject TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_sessions_subject ON sessions(subject);
+"""
+
+
+class SQLiteBackend:
+    """Row-per-record storage in a WAL-mode SQLite database."""
+
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        # One shared connection; the lock serialises access across threads
+        # and eventlet greenlets.
+        self._lock = threading.RLock()
+        self._versions = dict.fromkeys(COLLECTIONS, 0)  # own writes per table
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            for table in COLLECTIONS:
+                if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return False
+        return True
+
+    def generation(self, collection):
+        """Token that changes when another connection commits.
+
+        PRAGMA data_version ignores this connection's own writes, which the
+        in-memory repositories already apply themselves.
+        """
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def version(self, collection):
+        """Token for HTTP caching; changes on every write to the collection."""
+        with self._lock:
+            return (self._versions[collection], self.generation(collection))
+
+    def reserve_ids(self, collection, last_id):
+        """Make sure AUTOINCREMENT never hands out an id <= last_id."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (last_id, collection))
+            if cur.rowcount == 0:
+                self._conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (collection, last_id))
+
+    def _row_values(self, collection, record):
+        return [record.get(col) for col in _INDEXED_COLUMNS[collection]]
+
+    def all(self, collection):
+        _check_collection(collection)
+        with self._lock:
+            if collection == "subjects":
+                rows = self._conn.execute("SELECT name FROM subjects ORDER BY position").fetchall()
+                return [r[0] for r in rows]
+            rows = self._conn.execute(f"SELECT data FROM {collection} ORDER BY id").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def sessions_between(self, start=None, end=None):
+        """Study sessions dated start..end (inclusive), via the date index."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM sessions WHERE date >= ? AND date <= ? ORDER BY id",
+                (start or "", end or "\uffff")).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def get(self, collection, record_id):
+        _check_collection(collection)
+        with self._lock:
+            if collection == "subjects":
+                row = self._conn.execute("SELECT name FROM subjects WHERE name = ?", (record_id,)).fetchone()
+                return row[0] if row else None
+            row = self._conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def insert(self, collection, record):
+        _check_collection(collection)
+        with self._lock, self._conn:
+            self._versions[collection] += 1
+            return self._insert(collection, record)
+
+    def update(self, collection, record_id, fields):
+        _check_collection(collection)
+        with self._lock, self._conn:
+            self._versions[collection] += 1
+            return self._update(collection, record_id, fields)
+
+    def delete(self, collection, record_id):
+        _check_collection(collection)
+        with self._lock, self._conn:
+            self._versions[collection] += 1
+            return self._delete(collection, record_id)
+
+    def apply(self, collection, operations):
+        """Apply a batch of {"op", "id", "data"} mutations in one transaction."""
+        _check_collection(collection)
+        results = []
+        with self._lock, self._conn:
+            self._versions[collection] += 1
+            for op in operations:
+                if op["op"] == "create":
+                    results.append(self._insert(collection, op["data"]))
+                elif op["op"] == "patch":
+                    results.append(self._update(collection, op["id"], op["data"]))
+                else:
+                    self._delete(collection, op["id"])
+                    results.append(None)
+        return results
+
+    # The helpers below run inside the caller's transaction.
+    def _insert(self, collection, record):
+        if collection == "subjects":
+            exists = self._conn.execute("SELECT 1 FROM subjects WHERE name = ?", (record,)).fetchone()
+            if exists:
+                return None
+            self._conn.execute(
+                "INSERT INTO subjects (name, position) "
+                "VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM subjects))",
+                (record,))
+            return {"name": record}
+
+        record = dict(record)
+        columns = _INDEXED_COLUMNS[collection]
+        if record.get("id") is None:
+            # Reserve the id first so the stored JSON carries it too.
+            cur = self._conn.execute(
+                f"INSERT INTO {collection} ({', '.join(columns)}, data) "
+                f"VALUES ({', '.join('?' * len(columns))}, '{{}}')",
+                self._row_values(collection, record))
+            record["id"] = cur.lastrowid
+            self._conn.execute(f"UPDATE {collection} SET data = ? WHERE id = ?",
+                               (json.dumps(record), record["id"]))
+        else:
+            record["id"] = int(record["id"])
+            self._conn.execute(
+                f"INSERT INTO {collection} (id, {', '.join(columns)}, data) "
+                f"VALUES (?, {', '.join('?' * len(columns))}, ?)",
+                [record["id"], *self._row_values(collection, record), json.dumps(record)])
+        return record
+
+    def _update(self, collection, record_id, fields):
+        if collection == "subjects":
+            new_name = fields.get("name")
+            if not self._conn.execute("SELECT 1 FROM subjects WHERE name = ?", (record_id,)).fetchone():
+                return None
+            if new_name != record_id and self._conn.execute(
+                    "SELECT 1 FROM subjects WHERE name = ?", (new_name,)).fetchone():
+                return None
+            self._conn.execute("UPDATE subjects SET name = ? WHERE name = ?", (new_name, record_id))
+            return {"name": new_name}
+
+        row = self._conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+        if not row:
+            return None
+        record = json.loads(row[0])
+        record.update(fields)
+        columns = _INDEXED_COLUMNS[collection]
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        self._conn.execute(
+            f"UPDATE {collection} SET {assignments}, data = ? WHERE id = ?",
+            [*self._row_values(collection, record), json.dumps(record), record_id])
+        return record
+
+    def _delete(self, collection, record_id):
+        key = "name" if collection == "subjects" else "id"
+        cur = self._conn.execute(f"DELETE FROM {collection} WHERE {key} = ?", (record_id,))
+        return cur.rowcount > 0
+
+
+# -------------------------
+# Migration
+# -------------------------
+def migrate_from_json(backend, source=None):
+    """Copy every JSON collection into backend, keeping existing ids.
+
+    Collections that already hold data in the target are skipped, so the
+    migration is safe to run more than once. Returns {collection: count}.
+    """
+    source = source or JsonBackend()
+    migrated = {}
+    for collection in COLLECTIONS:
+        if backend.all(collection):
+            migrated[collection] = 0
+            continue
+        count = 0
+        for record in source.all(collection):
+            if collection != "subjects" and record.get("id") is None:
+                # Legacy sessions were stored without ids
+                record = {k: v for k, v in record.items() if k != "id"}
+            backend.insert(collection, record)
+            count += 1
+        if collection in RECORD_COLLECTIONS and hasattr(source, "last_id"):
+            # Ids of records deleted before the migration stay retired
+            backend.reserve_ids(collection, source.last_id(collection))
+        migrated[collection] = count
+    return migrated
+
+
+# -------------------------
+# Backend selection
+# -------------------------
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def sqlite_path():
+    return os.path.join(utils.DATA_DIR, SQLITE_FILENAME)
+
+
+def create_backend(kind=None):
+    """Build a backend of the given kind (defaults to $NARI_STORAGE)."""
+    kind = (kind or os.environ.get(STORAGE_ENV, "json")).lower()
+    if kind == "json":
+        return JsonBackend()
+    if kind == "sqlite":
+        path = sqlite_path()
+        fresh = not os.path.exists(path)
+        backend = SQLiteBackend(path)
+        if fresh:
+            counts = migrate_from_json(backend)
+            utils.append_log("storage.log", f"Migrated JSON data into {path}: {counts}")
+        return backend
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+def get_backend():
+    """Return the process-wide storage backend."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend (used by tests and the migrator)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -1,60 +1,51 @@
-import os
-from datetime import datetime
-from modules import utils
+from modules import utils, storage, study_stats, session_columns
 
 class StudyManager:
     def __init__(self):
         self.logs_dir = "data/logs"
         self.master_log = "data/logs/master.json"
         utils.ensure_directory(self.logs_dir)
-        # Track one active session in memory for simple CLI/API usage
-        self.active_session = None
+        self.store = storage.get_backend()
 
     def get_all_sessions(self):
-        sessions = utils.load_json(self.master_log) or {}
-        return sessions.get("sessions", [])
+        return self.store.all("sessions")
 
     def get_session(self, session_id):
-        sessions = self.get_all_sessions()
-        return next((s for s in sessions if s.get("id") == session_id), None)
+        return self.store.get("sessions", session_id)
 
-    def start_session(self, session_data):
+    # Active sessions live in backend.session_manager (one per owner), so
+    # this API, the backend routes and the CLI all see the same ones.
+    # Imported lazily: session_manager saves through modules.study, which
+    # imports this module.
+    def start_session(self, session_data, owner=None):
+        from backend import session_manager
         subject = session_data.get("subject")
         if not subject:
             return None
-        # Start and remember the active session
-        start_time = datetime.now()
-        session = {
-            "subject": subject,
-            "start_time": start_time.strftime("%H:%M"),
-            "date": start_time.strftime("%Y-%m-%d"),
-            "status": "active",
-            "started_at": start_time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        # store as active session with datetime object for stopping
-        self.active_session = {"subject": subject, "start_time_dt": start_time}
-        return session
+        ok, _ = session_manager.start_session(subject, owner or session_manager.DEFAULT_OWNER)
+        if not ok:
+            return None
+        return self.get_status(owner)
 
-    def stop_active_session(self, save=True):
-        """Stop the currently active session. If save=True, persist to logs."""
-        if not self.active_session:
+    def stop_active_session(self, save=True, owner=None):
+        """Stop the owner's active session. If save=True, persist to logs."""
+        from backend import session_manager
+        ok, result = session_manager.stop_session(save=save, owner=owner or session_manager.DEFAULT_OWNER)
+        if not ok:
             return None
-        subject = self.active_session.get("subject")
-        start_time = self.active_session.get("start_time_dt")
-        end_time = datetime.now()
-        # Save to files
-        saved = self.save_session(subject, start_time, end_time)
-        # clear active session
-        self.active_session = None
-        return saved
+        return result["saved"] if save else result
 
-    def get_status(self):
-        """Return currently active session info or None."""
-        if not self.active_session:
+    def get_status(self, owner=None):
+        """Return the owner's active session info or None."""
+        from backend import session_manager
+        active = session_manager.get_session(owner or session_manager.DEFAULT_OWNER)
+        if not active:
             return None
-        start_time = self.active_session.get("start_time_dt")
+        # The registry keeps UTC; this API reports local time
+        start_time = session_manager.local_time(active.start_time)
         return {
-            "subject": self.active_session.get("subject"),
+            "owner": active.owner,
+            "subject": active.subject,
             "start_time": start_time.strftime("%H:%M"),
             "date": start_time.strftime("%Y-%m-%d"),
             "status": "active",
@@ -62,33 +53,36 @@ class StudyManager:
         }
 
     def update_session(self, session_id, session_data):
-        session = self.get_session(session_id)
-        if not session:
-            return None
-            
-        session.update(session_data)
-        return session
+        """Apply an edit; raises ValueError for a date that isn't YYYY-MM-DD."""
+        fields = {k: v for k, v in session_data.items() if k != "id"}
+        if "date" in fields and not study_stats.is_day(fields["date"]):
+            raise ValueError("date must be YYYY-MM-DD")
+        before = self.store.get("sessions", session_id)
+        updated = self.store.update("sessions", session_id, fields)
+        if updated:
+            self._refresh_stats(before.get("date"), updated.get("date"))
+        return updated
 
     def delete_session(self, session_id):
-        sessions = self.get_all_sessions()
-        new_sessions = [s for s in sessions if s.get("id") != session_id]
-        if len(new_sessions) < len(sessions):
-            utils.save_json(self.master_log, {"sessions": new_sessions})
-            return True
-        return False
+        session = self.store.get("sessions", session_id)
+        deleted = self.store.delete("sessions", session_id)
+        if deleted:
+            self._refresh_stats(session.get("date"))
+        return deleted
+
+    def _refresh_stats(self, *days):
+        """Recompute the precomputed stats for days whose sessions changed."""
+        session_columns.invalidate()
+        days = {d for d in days if d}
+        if not days:
+            return
+        stats = study_stats.get_stats()
+        for day in days:
+            stats.recompute_day(day, self.store.sessions_between(day, day))
 
     def save_session(self, subject, start_time, end_time):
         """Save completed study session"""
         date_str = start_time.strftime("%Y-%m-%d")
-        log_file = os.path.join(self.logs_dir, f"{date_str}.json")
-
-        # Load or init daily log
-        data = utils.load_json(log_file) or {
-            "date": date_str,
-            "sessions": [],
-            "total_time_minutes": 0
-        }
-
         elapsed_minutes = int((end_time - start_time).total_seconds() // 60)
         session = {
             "subject": subject,
@@ -97,14 +91,7 @@ class StudyManager:
             "elapsed_minutes": elapsed_minutes
         }
 
-        data["sessions"].append(session)
-        data["total_time_minutes"] = data.get("total_time_minutes", 0) + elapsed_minutes
-        utils.save_json(log_file, data)
-
-        # Update master log
-        master_data = utils.load_json(self.master_log) or {"sessions": []}
-        session_with_date = {"date": date_str, **session}
-        master_data["sessions"].append(session_with_date)
-        utils.save_json(self.master_log, master_data)
-        
-        return session
\ No newline at end of file
+        record = self.store.insert("sessions", {"date": date_str, **session})
+        study_stats.get_stats().add({"date": date_str, **session})
+        session_columns.add(record)
+        return session
@@ -0,0 +1,228 @@
+# modules/study_stats.py
+"""Precomputed study aggregates.
+
+data/logs/stats.json holds one entry per study day::
+
+    {"days": {"2025-11-09": {"minutes": 95, "sessions": 3, "longest": 50,
+                             "subjects": {"physics": {"minutes": 50, ...}}}}}
+
+StudyManager keeps it current as sessions are saved, edited and deleted, so
+reports only visit the days in the requested range instead of every session
+ever recorded. Weekly and per-subject figures are folded from the days at
+query time. If the file is missing it is rebuilt once from the sessions in
+storage.
+"""
+import bisect
+import os
+import threading
+from datetime import date
+from modules import utils, storage
+
+GROUP_BY = ("day", "week", "subject")
+
+
+def stats_file():
+    return os.path.join(utils.LOGS_DIR, "stats.json")
+
+
+def _empty():
+    return {"minutes": 0, "sessions": 0, "longest": 0}
+
+
+def _add(totals, minutes):
+    totals["minutes"] += minutes
+    totals["sessions"] += 1
+    totals["longest"] = max(totals["longest"], minutes)
+
+
+def _merge(totals, other):
+    totals["minutes"] += other["minutes"]
+    totals["sessions"] += other["sessions"]
+    totals["longest"] = max(totals["longest"], other["longest"])
+
+
+def _minutes(session):
+    try:
+        return max(0, int(session.get("elapsed_minutes") or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def is_day(value):
+    """True for a "YYYY-MM-DD" string (legacy data and edits may hold others)."""
+    try:
+        return date.fromisoformat(value).isoformat() == value
+    except (TypeError, ValueError):
+        return False
+
+
+def week_of(day):
+    """ISO week label ("2025-W45") for a YYYY-MM-DD string."""
+    year, week, _ = date.fromisoformat(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class StudyStats:
+    def __init__(self, path=None):
+        self.path = path or stats_file()
+        self._lock = threading.RLock()
+        self._days = None
+        self._keys = None  # sorted day keys, for range lookups
+        self._signature = None  # file signature when _days was loaded
+
+    def _ensure(self):
+        """Load the aggregates, again if another process (e.g. the CLI) has
+        rewritten the file; returns True if they had to be rebuilt from storage."""
+        signature = utils.file_signature(self.path)
+        if self._days is not None and signature == self._signature:
+            return False
+        doc = utils.load_json(self.path)
+        if isinstance(doc, dict) and isinstance(doc.get("days"), dict):
+            self._days = {day: entry for day, entry in doc["days"].items() if is_day(day)}
+            self._keys = sorted(self._days)
+            self._signature = signature
+            return False
+        self.rebuild()
+        return True
+
+    def _save(self):
+        utils.save_json(self.path, {"days": self._days})
+
+    def rebuild(self, sessions=None):
+        """Recompute every day from sessions (default: all stored sessions)."""
+        if sessions is None:
+            sessions = storage.get_backend().all("sessions")
+        with self._lock:
+            self._days = {}
+            for session in sessions:
+                self._add_session(session)
+            self._keys = sorted(self._days)
+            self._save()
+
+    def _add_session(self, session):
+        day = session.get("date")
+        if not is_day(day):
+            return
+        entry = self._days.get(day)
+        if entry is None:
+            entry = self._days[day] = dict(_empty(), subjects={})
+        minutes = _minutes(session)
+        _add(entry, minutes)
+        subject = session.get("subject") or "unknown"
+        _add(entry["subjects"].setdefault(subject, _empty()), minutes)
+
+    def add(self, session):
+        """Count one newly saved session (a dict with date, subject, elapsed_minutes).
+
+        Call after the session is stored: a first-time rebuild already sees it.
+        """
+        with self._lock:
+            if self._ensure():
+                return
+            is_new = session.get("date") not in self._days
+            self._add_session(session)
+            if is_new and session.get("date") in self._days:
+                bisect.insort(self._keys, session["date"])
+            self._save()
+
+    def recompute_day(self, day, sessions):
+        """Replace a day's figures with those of sessions (all sessions on that day).
+
+        Used after an edit or delete, where totals can't simply be decremented
+        (the longest session may be the one that went away).
+        """
+        with self._lock:
+            self._ensure()
+            self._days.pop(day, None)
+            for session in sessions:
+                if session.get("date") == day:
+                    self._add_session(session)
+            self._keys = sorted(self._days)
+            self._save()
+
+    def version(self):
+        return utils.document_version(self.path)
+
+    def days_between(self, start=None, end=None):
+        """(day, entry) pairs with start <= day <= end, oldest first."""
+        with self._lock:
+            self._ensure()
+            lo = 0 if start is None else bisect.bisect_left(self._keys, start)
+            hi = len(self._keys) if end is None else bisect.bisect_right(self._keys, end)
+            return [(day, self._days[day]) for day in self._keys[lo:hi]]
+
+    def query(self, start=None, end=None, group_by="day"):
+        """Totals per day, ISO week or subject for days in [start, end].
+
+        Returns {"groups": [{"key", "minutes", "sessions", "longest"}], "total": {...}}.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        groups = {}
+        total = _empty()
+        for day, entry in self.days_between(start, end):
+            _merge(total, entry)
+            if group_by == "day":
+                _merge(groups.setdefault(day, _empty()), entry)
+            elif group_by == "week":
+                _merge(groups.setdefault(week_of(day), _empty()), entry)
+            else:
+                for subject, figures in entry["subjects"].items():
+                    _merge(groups.setdefault(subject, _empty()), figures)
+        if group_by == "subject":
+            ordered = sorted(groups.items(), key=lambda item: -item[1]["minutes"])
+        else:
+            ordered = sorted(groups.items())
+        return {
+            "groups": [dict(figures, key=key) for key, figures in ordered],
+            "total": total
+        }
+
+
+    def heatmap(self, year):
+        """Minutes studied on each day of year, as a 366-entry list.
+
+        Entry i is January 1st + i days; in a non-leap year the last entry
+        is None.
+        """
+        first = date(year, 1, 1)
+        minutes = [0] * (date(year, 12, 31).toordinal() - first.toordinal() + 1)
+        for day, entry in self.days_between(f"{year:04d}-01-01", f"{year:04d}-12-31"):
+            minutes[date.fromisoformat(day).toordinal() - first.toordinal()] = entry["minutes"]
+        if len(minutes) == 365:
+            minutes.append(None)
+        return minutes
+
+    def streak(self, today=None):
+        """Current and longest runs of consecutive days with at least one session.
+
+        The current streak still counts if the last study day was yesterday
+        (today isn't over yet).
+        """
+        today = today or date.today()
+        with self._lock:
+            self._ensure()
+            ordinals = [date.fromisoformat(day).toordinal() for day in self._keys
+                        if self._days[day]["sessions"] and day <= today.isoformat()]
+        longest = run = 0
+        previous = None
+        for ordinal in ordinals:
+            run = run + 1 if previous is not None and ordinal == previous + 1 else 1
+            longest = max(longest, run)
+            previous = ordinal
+        current = run if ordinals and ordinals[-1] >= today.toordinal() - 1 else 0
+        last = date.fromordinal(ordinals[-1]).isoformat() if ordinals else None
+        return {"current": current, "longest": longest, "last_day": last}
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_stats():
+    """Return the process-wide StudyStats for the current data directory."""
+    global _stats
+    with _stats_lock:
+        if _stats is None or _stats.path != stats_file():
+            _stats = StudyStats()
+        return _stats
@@ -1,38 +1,17 @@
 # modules/subjects.py
-import os
-import json
-
-SUBJECTS_FILE = os.path.join("data", "subjects.json")
-os.makedirs(os.path.dirname(SUBJECTS_FILE), exist_ok=True)
+from modules import storage
 
 def load_subjects():
-    if os.path.exists(SUBJECTS_FILE):
-        try:
-            with open(SUBJECTS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f).get("subjects", [])
-        except Exception:
-            # corrupted or empty file — return empty list
-            return []
-    return []
-
-def save_subjects(subjects):
-    with open(SUBJECTS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"subjects": subjects}, f, indent=4)
+    return storage.get_backend().all("subjects")
 
 def add_subject(subject):
-    subjects = load_subjects()
-    if subject in subjects:
+    if storage.get_backend().insert("subjects", subject) is None:
         print(f"⚠ Subject '{subject}' already exists.")
     else:
-        subjects.append(subject)
-        save_subjects(subjects)
         print(f"✅ Subject '{subject}' added.")
 
 def remove_subject(subject):
-    subjects = load_subjects()
-    if subject in subjects:
-        subjects.remove(subject)
-        save_subjects(subjects)
+    if storage.get_backend().delete("subjects", subject):
         print(f"❌ Subject '{subject}' removed.")
     else:
         print(f"⚠ Subject '{subject}' not found.")
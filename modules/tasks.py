@@ -1,16 +1,12 @@
 # modules/tasks.py
 import argparse
-from modules import utils
+from modules import utils, repository
 
-TASKS_FILE = utils.TASKS_FILE
+def _repo():
+    return repository.get_repository("tasks")
 
 def _load_tasks():
-    data = utils.load_json(TASKS_FILE)
-    return data.get("tasks", [])
-
-def _save_tasks(tasks):
-    data = {"tasks": tasks}
-    utils.save_json(TASKS_FILE, data)
+    return _repo().all()
 
 def add_task(argv):
     """add-task "title" -p priority -d yyyy-mm-dd"""
@@ -28,19 +24,14 @@ def add_task(argv):
     priority = args.priority
     due = args.due
 
-    tasks = _load_tasks()
-    new_id = utils.next_id(tasks)
-    item = {
-        "id": new_id,
+    item = _repo().insert({
         "title": title,
         "priority": priority,
         "due": due,
         "status": "pending",
         "created": utils.timestamp()
-    }
-    tasks.append(item)
-    _save_tasks(tasks)
-    print(f"Task added: [{new_id}] {title}")
+    })
+    print(f"Task added: [{item['id']}] {title}")
 
 def list_tasks(argv=None):
     tasks = _load_tasks()
@@ -57,18 +48,13 @@ def complete_task(argv):
     except ValueError:
         print("Invalid id. Use integer.")
         return
-    tasks = _load_tasks()
-    found = False
-    for t in tasks:
-        if int(t.get("id", -1)) == id_:
-            t["status"] = "completed"
-            t["completed_at"] = utils.timestamp()
-            found = True
-            break
-    if not found:
+    updated = _repo().update(id_, {
+        "status": "completed",
+        "completed_at": utils.timestamp()
+    })
+    if not updated:
         print(f"No task with id {id_}")
         return
-    _save_tasks(tasks)
     print(f"Task {id_} marked completed.")
 
 def delete_task(argv):
@@ -80,10 +66,7 @@ def delete_task(argv):
     except ValueError:
         print("Invalid id. Use integer.")
         return
-    tasks = _load_tasks()
-    new_tasks = [t for t in tasks if int(t.get("id", -1)) != id_]
-    if len(new_tasks) == len(tasks):
+    if not _repo().delete(id_):
         print(f"No task with id {id_}")
         return
-    _save_tasks(new_tasks)
     print(f"Task {id_} deleted.")
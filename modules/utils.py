@@ -1,8 +1,20 @@
 # modules/utils.py
 import os
 import json
+import time
+import atexit
+import signal
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from backend.socket import socketio, NAMESPACE
+try:
+    import fcntl
+except ImportError:  # Windows: file_lock() only has the callers' own locks
+    fcntl = None
+from backend.socket import NAMESPACE
+from backend.socket.emitter import emitter
 
 # -------------------------
 # Paths
@@ -17,13 +29,6 @@ NOTES_FILE = os.path.join(DATA_DIR, "notes.json")
 ACTIVITY_LOG_FILE = os.path.join(DATA_DIR, "activity_log.json")
 
 
-def next_id(items):
-    """Return next numeric ID for a list of dicts with 'id' keys."""
-    if not items:
-        return 1
-    return max(int(item.get("id", 0)) for item in items) + 1
-
-
 def timestamp():
     """Return current timestamp as a string in YYYY-MM-DD HH:MM:SS format."""
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -74,13 +79,97 @@ def pretty_print_list(title, items):
 # -------------------------
 # JSON Helpers
 # -------------------------
+# Parsed documents keyed by absolute path. Each entry holds the file's
+# (inode, mtime_ns, size) signature at the time it was parsed, so a poll
+# of an unchanged file costs one stat() instead of a full json.load().
+_doc_cache = {}
+_doc_cache_lock = threading.Lock()
+
+
+def file_signature(path):
+    """Return (inode, mtime_ns, size) for path, or None if it is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+FILE_LOCK_POLL = 0.05  # seconds between attempts to take a file lock
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive flock() on path (created if missing) for the block.
+
+    Each call opens its own descriptor, so other threads of this process are
+    kept out too; not reentrant. Waiting polls with time.sleep(), which
+    yields to other green threads under eventlet. A no-op without fcntl.
+    """
+    if fcntl is None:
+        yield
+        return
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, "a") as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                time.sleep(FILE_LOCK_POLL)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _cache_put(path, data):
+    """Record data as the current parsed content of path."""
+    signature = file_signature(path)
+    key = os.path.abspath(path)
+    with _doc_cache_lock:
+        if signature is None:
+            _doc_cache.pop(key, None)
+        else:
+            _doc_cache[key] = (signature, data)
+
+
+def invalidate_cache(path=None):
+    """Drop the cached document for path (or every document if path is None)."""
+    with _doc_cache_lock:
+        if path is None:
+            _doc_cache.clear()
+        else:
+            _doc_cache.pop(os.path.abspath(path), None)
+
+
 def load_json(path):
-    """Load JSON data from file safely."""
-    if not os.path.exists(path):
+    """Load JSON data from file safely.
+
+    The parsed document is cached and shared between callers until the file
+    changes on disk, so callers that mutate the result must save it back.
+    Documents still waiting for the background flusher are returned as-is.
+    """
+    key = os.path.abspath(path)
+    with _pending_lock:
+        if key in _pending:
+            return _pending[key][0]
+
+    signature = file_signature(path)
+    if signature is None:
+        invalidate_cache(path)
         return {}
+
+    with _doc_cache_lock:
+        cached = _doc_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
     try:
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            data = json.load(f)
     except FileNotFoundError:
         append_log("file_errors.log", f"FileNotFoundError: {path}")
         return {}
@@ -91,25 +180,203 @@ def load_json(path):
         append_log("file_errors.log", f"Unexpected error loading {path}: {e}")
         return {}
 
-def save_json(path, data):
-    """Save JSON data to file safely."""
+    with _doc_cache_lock:
+        _doc_cache[key] = (signature, data)
+    return data
+
+# -------------------------
+# Write-behind
+# -------------------------
+# save_json only records the latest document per path; a background flusher
+# writes dirty documents at most every FLUSH_INTERVAL_MS, so a burst of N
+# saves to one file costs one disk write. flush() forces pending writes out
+# and runs automatically at interpreter exit and, once
+# install_signal_flush() has been called, on SIGTERM/SIGINT.
+FLUSH_INTERVAL_MS = 200
+
+# Reentrant: a signal handler calls flush() in whatever code it interrupted,
+# which may be holding these.
+_pending = {}  # abspath -> (document, its JSON text when it was saved)
+_pending_lock = threading.RLock()
+_versions = {}  # abspath -> number of in-process writes, for ETags
+_write_lock = threading.RLock()  # serialises disk writes
+_dirty_event = threading.Event()
+_flusher_thread = None
+_write_stats = {"requested": 0, "written": 0, "coalesced": 0}
+
+
+def save_json(path, data, sync=False):
+    """Save JSON data to file safely.
+
+    By default the write is deferred to the background flusher; pass
+    sync=True when the file must be on disk before returning.
+    """
+    key = os.path.abspath(path)
+    bump_version(key)
+    if sync:
+        with _write_lock:
+            with _pending_lock:
+                _pending.pop(key, None)
+                _write_stats["requested"] += 1
+                text = _serialise(data)
+            if not _write_json(key, data, text):
+                _requeue(key, data, text)
+        return
+
+    with _pending_lock:
+        _write_stats["requested"] += 1
+        if key in _pending:
+            _write_stats["coalesced"] += 1
+        # Serialised now: the flusher must not read the document while
+        # other threads go on changing it
+        _pending[key] = (data, _serialise(data))
+    _ensure_flusher()
+    _dirty_event.set()
+
+
+def _serialise(data):
+    return json.dumps(data, indent=2)
+
+
+def _requeue(key, data, text):
+    """Put back a document whose write failed, unless a newer save replaced it.
+
+    It is retried on the next flush (the next save, or at exit).
+    """
+    with _pending_lock:
+        _pending.setdefault(key, (data, text))
+
+
+def flush(path=None):
+    """Write pending documents (all of them, or just path) to disk now."""
+    if path is None or os.path.abspath(path) == os.path.abspath(ACTIVITY_LOG_FILE):
+        _persist_activity()
+    with _write_lock:
+        with _pending_lock:
+            if path is None:
+                items = list(_pending.items())
+                _pending.clear()
+            else:
+                key = os.path.abspath(path)
+                items = [(key, _pending.pop(key))] if key in _pending else []
+        for key, (data, text) in items:
+            if not _write_json(key, data, text):
+                _requeue(key, data, text)
+
+
+def bump_version(path):
+    """Mark path as changed by this process (save_json does this itself)."""
+    key = os.path.abspath(path)
+    with _pending_lock:
+        _versions[key] = _versions.get(key, 0) + 1
+
+
+def document_version(path):
+    """Cheap token that changes whenever path is saved or rewritten.
+
+    Combines the in-process write counter, which moves as soon as save_json
+    is called, with the file signature, which catches writes by other
+    processes. Neither needs the file to be read.
+    """
+    key = os.path.abspath(path)
+    with _pending_lock:
+        count = _versions.get(key, 0)
+    return (count, file_signature(key))
+
+
+def write_stats():
+    """Return counters for save_json calls, disk writes and coalesced saves."""
+    with _pending_lock:
+        stats = dict(_write_stats)
+        stats["pending"] = len(_pending)
+    return stats
+
+
+def _flusher_loop():
+    while True:
+        _dirty_event.wait()
+        time.sleep(FLUSH_INTERVAL_MS / 1000)
+        _dirty_event.clear()
+        try:
+            flush()
+        except Exception as e:
+            append_log("file_errors.log", f"Background flush failed: {e}")
+
+
+def _ensure_flusher():
+    global _flusher_thread
+    if _flusher_thread is None:
+        _flusher_thread = threading.Thread(target=_flusher_loop, daemon=True)
+        _flusher_thread.start()
+
+
+def _write_json(path, data, text=None):
+    """Atomically write data (as text, if given) to path and refresh the
+    document cache. Returns True once the file has been written."""
     parent = os.path.dirname(path)
     if parent:
         os.makedirs(parent, exist_ok=True)
 
-    tmp_path = f"{path}.tmp"
+    tmp_path = None
     try:
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+        # A fresh temp file per write: a flush from a signal handler must not
+        # share it with the write it interrupted
+        fd, tmp_path = tempfile.mkstemp(dir=parent or None, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if text is None:
+                json.dump(data, f, indent=2)
+            else:
+                f.write(text)
         os.replace(tmp_path, path)
+        _cache_put(path, data)
+        _write_stats["written"] += 1
+        return True
     except Exception as e:
         append_log("file_errors.log", f"Error saving {path}: {e}")
+        invalidate_cache(path)
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         # Fallback to non-atomic write if atomic fails, but log the error
         try:
             with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+                if text is None:
+                    json.dump(data, f, indent=2)
+                else:
+                    f.write(text)
+            _cache_put(path, data)
+            _write_stats["written"] += 1
+            return True
         except Exception as fallback_e:
             append_log("file_errors.log", f"Fallback write failed for {path}: {fallback_e}")
+            return False
+
+
+atexit.register(flush)
+
+
+def install_signal_flush(signals=(signal.SIGTERM, signal.SIGINT)):
+    """Flush pending writes when the process is told to stop.
+
+    atexit doesn't run on SIGTERM (systemctl stop/restart). Each handler
+    flushes and then hands the signal to the handler that was installed
+    before it; for the default action the signal is re-raised, so the exit
+    status is unchanged. Must be called from the main thread.
+    """
+    for signum in signals:
+        previous = signal.getsignal(signum)
+
+        def handler(signum, frame, previous=previous):
+            try:
+                flush()
+            except Exception as e:
+                append_log("file_errors.log", f"Flush on signal {signum} failed: {e}")
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+        signal.signal(signum, handler)
 
 # -------------------------
 # Timestamp Helper
@@ -133,8 +400,58 @@ def append_log(filename, message):
 # -------------------------
 # Activity Log Helper
 # -------------------------
+# The last ACTIVITY_LIMIT entries live in memory and are the source of truth;
+# the background flusher writes them to ACTIVITY_LOG_FILE at most once per
+# FLUSH_INTERVAL_MS, however many entries were logged in between.
+ACTIVITY_LIMIT = 500
+
+_activity = None
+_activity_lock = threading.RLock()  # see _pending_lock
+_activity_dirty = False
+_activity_version = 0
+_activity_unarchived = []  # entries not yet appended to activity_history
+
+
+def _activity_buffer():
+    """Return the in-memory activity deque, loading it from disk on first use."""
+    global _activity
+    if _activity is None:
+        data = load_json(ACTIVITY_LOG_FILE)
+        logs = data.get("activity", []) if isinstance(data, dict) else []
+        _activity = deque(logs, maxlen=ACTIVITY_LIMIT)
+    return _activity
+
+
+def _persist_activity():
+    global _activity_dirty, _activity_unarchived
+    with _activity_lock:
+        if not _activity_dirty:
+            return
+        snapshot = {"activity": list(_activity)}
+        unarchived, _activity_unarchived = _activity_unarchived, []
+        _activity_dirty = False
+    with _write_lock:
+        written = _write_json(os.path.abspath(ACTIVITY_LOG_FILE), snapshot)
+    if not written:
+        with _activity_lock:
+            _activity_dirty = True  # retried on the next flush
+    if unarchived:
+        # Imported here: activity_history itself depends on this module
+        from modules import activity_history
+        try:
+            activity_history.append(unarchived)
+        except Exception as e:
+            append_log("file_errors.log", f"Activity history append failed: {e}")
+
+
+def activity_version():
+    """Counter that changes whenever an activity entry is logged."""
+    return _activity_version
+
+
 def log_user_activity(text):
     """Log activity with ironclad persistence and real-time emission."""
+    global _activity_dirty, _activity_version
     try:
         # 1. Prepare Entry
         entry = {
@@ -142,26 +459,22 @@ def log_user_activity(text):
             "time": datetime.now().strftime("%H:%M:%S"), # Just time for the console feel
             "full_date": timestamp()
         }
+
+        # 2. Append to the ring buffer (keeps the last 500 for the console)
+        with _activity_lock:
+            _activity_buffer().append(entry)
+            _activity_unarchived.append(entry)
+            _activity_dirty = True
+            _activity_version += 1
+
+        # 3. Persist in the background
+        _ensure_flusher()
+        _dirty_event.set()
+
+        # 4. Live Push
+        emitter.emit("activity_logged", entry, namespace=NAMESPACE)
         
-        # 2. Load and Append
-        # If file missing or corrupt, start fresh
-        data = load_json(ACTIVITY_LOG_FILE)
-        if not isinstance(data, dict): data = {"activity": []}
-        logs = data.get("activity", [])
-        
-        logs.append(entry)
-        
-        # 3. Trim (keep last 500 for the console)
-        if len(logs) > 500:
-            logs = logs[-500:]
-            
-        # 4. Atomic Save
-        save_json(ACTIVITY_LOG_FILE, {"activity": logs})
-        
-        # 5. Live Push
-        socketio.emit("activity_logged", entry, namespace=NAMESPACE)
-        
-        # 6. Terminal feedback for the user
+        # 5. Terminal feedback for the user
         print(f" LOG > {text}")
     except Exception as e:
         print(f" CRITICAL ERROR in logging: {e}")
@@ -170,8 +483,8 @@ def log_user_activity(text):
 def get_activity_log():
     """Retrieve activity log for initial frontend load."""
     try:
-        data = load_json(ACTIVITY_LOG_FILE)
-        logs = data.get("activity", [])
+        with _activity_lock:
+            logs = list(_activity_buffer())
         # Return as-is, frontend will handle the ordering
         return logs
     except Exception as e:
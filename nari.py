@@ -23,7 +23,8 @@ def show_help():
     print(" subjects list                        - List all subjects")
     print(" study start <subject>                - Start a study session")
     print(" study stop                           - Stop current session (prompts to save)")
-    print(" study report [YYYY-MM-DD]            - Show daily study report (default: today)")
+    print(" study report [YYYY-MM-DD]            - Show per-subject totals for a day (default: today)")
+    print(" study report --sessions              - List every recorded session")
     print(" tasks add \"title\" [-p prio] [-d date] - Add a task")
     print(" tasks list                           - List active tasks")
     print(" tasks complete <id>                  - Mark a task as completed")
@@ -55,7 +56,7 @@ def handle_command(cmd, args):
                 print(f"Stopped study session: {result['subject']} for {result['elapsed_seconds']} seconds")
             else:
                 print(f"Error stopping study session: {result}")
-        elif sub == "report":
+        elif sub == "report" and "--sessions" in sub_args:
             from modules.study_manager import StudyManager # Local import for report
             study_mgr = StudyManager()
             sessions = study_mgr.get_all_sessions()
@@ -65,6 +66,18 @@ def handle_command(cmd, args):
                     print(f"{s['date']} - {s['subject']}: {s.get('start_time', 'N/A')} to {s.get('end_time', 'N/A')}")
             else:
                 print("No study sessions found")
+        elif sub == "report":
+            from modules import study_stats # Local import for report
+            day = sub_args[0] if sub_args else time.strftime("%Y-%m-%d")
+            report = study_stats.get_stats().query(day, day, group_by="subject")
+            total = report["total"]
+            if total["sessions"]:
+                print(f"\n=== Study Report: {day} ===")
+                for g in report["groups"]:
+                    print(f"{g['key']}: {g['minutes']} min in {g['sessions']} session(s), longest {g['longest']} min")
+                print(f"Total: {total['minutes']} min in {total['sessions']} session(s)")
+            else:
+                print(f"No study sessions found for {day}")
         else:
             print("Unknown study command. Try: start, stop, report")
     elif cmd == "tasks":
@@ -146,6 +159,8 @@ def main():
     parser.add_argument("--status", action="store_true", help="Check if server is running")
     parser.add_argument("--restart", action="store_true", help="Restart the server")
     args = parser.parse_args()
+    # systemd stops the service with SIGTERM, which skips atexit
+    utils.install_signal_flush()
 
     if args.status:
         check_server_status()
@@ -156,11 +171,12 @@ def main():
         print("Please run server and CLI separately.")
     elif args.server:
         print("Server initialized for eventlet.")
-        from backend.app import clock_manager, automation_engine
+        from backend.app import clock_manager, automation_engine, recovery_system
         
         print("Starting background services...")
         clock_manager.start()
         automation_engine.start()
+        recovery_system.start_pruner()
         
         print("Starting NARI server on http://localhost:5000")
         socketio.run(app, host='0.0.0.0', port=5000, debug=True, use_reloader=False)
@@ -0,0 +1,23 @@
+"""
+One-shot split of data/logs/master.json (and the per-day logs) into
+monthly session partitions under data/logs/sessions/.
+Usage (from the repository root):
+    python -m scripts.migrate_sessions
+The JSON backend also does this on first use; the old files are moved to
+data/logs/legacy/.
+"""
+from modules import session_partitions
+
+
+def main():
+    print(f"Splitting study sessions into {session_partitions.partition_dir()} ...")
+    counts = session_partitions.migrate_legacy()
+    if not counts:
+        print("  nothing to do (already partitioned, or no sessions)")
+    for month, count in sorted(counts.items()):
+        print(f"  {month}: {count} session(s)")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+One-shot migration of data/*.json into the SQLite storage backend.
+Usage (from the repository root):
+    python -m scripts.migrate_to_sqlite
+Then start NARI with NARI_STORAGE=sqlite.
+"""
+from modules import storage
+
+
+def main():
+    path = storage.sqlite_path()
+    print(f"Migrating JSON data into {path} ...")
+    backend = storage.SQLiteBackend(path)
+    counts = storage.migrate_from_json(backend)
+    backend.close()
+    for collection, count in counts.items():
+        print(f"  {collection}: {count} record(s) imported")
+    print(f"Done. Set {storage.STORAGE_ENV}=sqlite to use the new backend.")
+
+
+if __name__ == "__main__":
+    main()
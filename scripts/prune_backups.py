@@ -0,0 +1,24 @@
+"""
+Import old data/backups/<timestamp>/ folders into the backup store and
+apply the retention policy ($NARI_BACKUP_RETENTION) once.
+Usage (from the repository root):
+    python -m scripts.prune_backups
+The server does the same in the background every hour.
+"""
+from backend.core.maintenance import AutoRecovery, BACKUP_DIR, retention_policy
+
+
+def main():
+    policy = retention_policy()
+    print(f"Pruning {BACKUP_DIR} (keep last={policy['last']}, hourly={policy['hourly']}h, daily={policy['daily']}d) ...")
+    store = AutoRecovery().store
+    imported = store.import_legacy()
+    if imported:
+        print(f"  imported {imported} backup(s) from timestamp folders")
+    dropped, deleted = store.prune(policy)
+    print(f"  dropped {dropped} version(s), deleted {deleted} object(s)")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import json
+from modules import utils, activity_history
+
+
+def test_query_seeks_by_day_and_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(activity_history, "INDEX_STRIDE", 200)
+    monkeypatch.setattr(activity_history, "_last_indexed", {})
+
+    entries = []
+    for day in ("2026-03-01", "2026-03-02", "2026-03-03"):
+        for minute in range(30):
+            entries.append({"text": f"API: GET /api/tasks {minute}", "full_date": f"{day} 10:{minute:02d}:00"})
+    entries[40]["text"] = "Task added: taxes"
+    activity_history.append(entries[:45])
+    activity_history.append(entries[45:])  # a second batch continues the index
+
+    assert activity_history.days() == ["2026-03-01", "2026-03-02", "2026-03-03"]
+    index = activity_history._read_index("2026-03-02")
+    assert len(index) > 1 and index[0][1] == 0
+
+    found = activity_history.query("2026-03-02 10:20:00", "2026-03-02 10:22:00")
+    assert [e["full_date"] for e in found] == [
+        "2026-03-02 10:20:00", "2026-03-02 10:21:00", "2026-03-02 10:22:00"]
+    found = activity_history.query("2026-03-01 10:29:00", limit=2)
+    assert [e["full_date"] for e in found] == ["2026-03-01 10:29:00", "2026-03-02 10:00:00"]
+    assert [e["text"] for e in activity_history.query(text="TAXES")] == ["Task added: taxes"]
+
+    with open(tmp_path / "activity" / "2026-03-03.jsonl") as f:
+        assert len([json.loads(line) for line in f]) == 30
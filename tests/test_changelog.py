@@ -0,0 +1,41 @@
+import pytest
+from backend.core.changelog import ChangeLog
+
+
+def test_since_folds_to_latest_change_per_record():
+    log = ChangeLog(start=100)
+    log.record("tasks", "upsert", 1, {"id": 1, "title": "a"})
+    log.record("tasks", "upsert", 2, {"id": 2, "title": "b"})
+    rev = log.revision
+    log.record("tasks", "upsert", 1, {"id": 1, "title": "a2"})
+    log.record("tasks", "delete", 2)
+    log.record("subjects", "upsert", "Physics", {"name": "Physics"})
+
+    changes, current = log.since(rev)
+    assert current == 105
+    assert changes == {
+        "tasks": {"upserts": [{"id": 1, "title": "a2"}], "deletes": [2]},
+        "subjects": {"upserts": [{"name": "Physics"}], "deletes": []},
+    }
+    assert log.since(current) == ({}, current)
+
+
+def test_since_asks_for_resync_once_truncated():
+    log = ChangeLog(size=3, start=0)
+    for i in range(5):
+        log.record("notes", "upsert", i, {"id": i})
+
+    assert log.since(0) == (None, 5)
+    assert log.since(1) == (None, 5)
+    changes, _ = log.since(2)
+    assert [n["id"] for n in changes["notes"]["upserts"]] == [2, 3, 4]
+    # revisions from the future (e.g. a previous, longer-lived process)
+    assert log.since(99) == (None, 5)
+
+
+def test_unhashable_keys_are_refused():
+    log = ChangeLog(start=0)
+    with pytest.raises(TypeError):
+        log.record("subjects", "upsert", ["x"], {"name": ["x"]})
+    assert log.revision == 0
+    assert log.since(0) == ({}, 0)
@@ -0,0 +1,218 @@
+import json
+import time
+from datetime import datetime, timedelta
+from backend.core.clock_system import ClockManager, ALARMS_FILE, IST, TIME_FORMAT, parse_alarm_time
+from backend.core.timers import Timer
+
+
+def make_manager(tmp_path, monkeypatch):
+    # ClockManager and AutoRecovery use paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "clock").mkdir(parents=True)
+    (tmp_path / "data" / "clock" / "alarms.json").write_text("[]")
+    return ClockManager(socketio=None)
+
+
+def minutes_from_now(n):
+    return (datetime.now(IST) + timedelta(minutes=n)).strftime(TIME_FORMAT)
+
+
+def test_heap_fires_earliest_and_skips_stale_entries(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    late = manager.add_alarm("late", minutes_from_now(10))
+    early = manager.add_alarm("early", minutes_from_now(5), repeat=True)
+    gone = manager.add_alarm("gone", minutes_from_now(2))
+    manager.delete_alarm(gone["id"])
+
+    assert 4 * 60 - 1 < manager.next_due() <= 5 * 60
+    fire_at = parse_alarm_time(early["time"])
+    assert manager.check_alarms(now=fire_at - 0.5) == []
+    assert [a["name"] for a in manager.check_alarms(now=fire_at)] == ["early"]
+    # the repeating alarm moved to the same time tomorrow, without editing it
+    assert manager.next_due(now=fire_at) == parse_alarm_time(late["time"]) - fire_at
+    assert manager.alarms[1]["time"] == early["time"]
+    assert parse_alarm_time(manager.next_fire(early["id"])) == fire_at + 24 * 3600
+
+    manager.toggle_alarm(late["id"], False)
+    assert manager.next_due(now=fire_at) == 24 * 3600
+    manager.toggle_alarm(late["id"], True)
+    assert [a["name"] for a in manager.check_alarms(now=fire_at + 24 * 3600)] == ["late", "early"]
+    assert not manager.alarms[0]["enabled"]
+
+
+def test_worker_is_woken_by_new_alarms(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    manager.start()
+    try:
+        time.sleep(0.05)  # worker is now waiting with nothing scheduled
+        alarm = manager.add_alarm("now", datetime.now(IST).strftime(TIME_FORMAT))
+        deadline = time.time() + 1
+        while manager.alarms[0]["enabled"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert not manager.alarms[0]["enabled"], alarm
+    finally:
+        manager.stop()
+
+
+def test_missed_alarms_are_not_fired_late(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    past = (datetime.now(IST) - timedelta(days=2, minutes=5)).strftime(TIME_FORMAT)
+    manager.alarms = [
+        {"id": "1", "name": "once", "time": past, "repeat": False, "enabled": True},
+        {"id": "2", "name": "daily", "time": past, "repeat": True, "enabled": True},
+    ]
+    manager._save_alarms()
+
+    reloaded = ClockManager(socketio=None)
+    assert reloaded.check_alarms() == []
+    # the daily alarm continues with its next occurrence; its time is untouched
+    assert reloaded.alarms[1]["time"] == past
+    assert 0 < parse_alarm_time(reloaded.next_fire("2")) - time.time() < 24 * 3600
+    assert reloaded.next_fire("1") is None
+    assert 0 < reloaded.next_due() < 24 * 3600
+
+
+def test_store_handles_thousands_of_alarms(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    day = (datetime.now(IST) + timedelta(days=1)).strftime("%Y-%m-%d")
+    timetable = [{"name": f"period {i}", "time": f"{day} {i // 60 % 24:02d}:{i % 60:02d}", "repeat": True}
+                 for i in range(1440)]
+    ok, added = manager.add_alarms(timetable)
+    assert ok and len(added) == 1440 and len({a["id"] for a in added}) == 1440
+    assert manager.add_alarm("extra", f"{day} 23:59")
+    # nothing is added when one item is bad
+    ok, errors = manager.add_alarms([{"name": "x", "time": f"{day} 10:00"}, {"name": "period 0", "time": f"{day} 00:00"}])
+    assert not ok and errors[0] is None and errors[1].startswith("Duplicate")
+    assert not manager.add_alarm("period 5", f"{day} 00:05")
+
+    victim = added[700]
+    assert manager.delete_alarm(victim["id"]) and not manager.delete_alarm(victim["id"])
+    assert manager.add_alarm(victim["name"], victim["time"])  # its (name, time) slot is free again
+    assert manager.toggle_alarm(added[3]["id"], False) and not manager.toggle_alarm("missing", True)
+
+    # a single backup for the whole burst of changes
+    assert len(manager.recovery.store.versions(ALARMS_FILE)) == 1
+    reloaded = ClockManager(socketio=None)
+    assert len(reloaded.alarms) == 1441
+    assert reloaded.add_alarm("later", f"{day} 23:58")["id"] > max(a["id"] for a in manager.alarms)
+
+
+def test_recurrence_rules(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    # Monday 2030-01-07, weekdays at 08:50 except Wednesday the 9th, plus a Saturday
+    alarm = manager.add_alarm("period 1", "2030-01-07 08:50", rule="FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+                              exdates=["2030-01-09 08:50"], rdates=["2030-01-12 10:00"])
+    assert alarm["repeat"]
+    fired = []
+    for _ in range(6):
+        now = parse_alarm_time(manager.next_fire(alarm["id"]))
+        fired += [a["occurrence"] for a in manager.check_alarms(now=now)]
+    assert fired == ["2030-01-07 08:50", "2030-01-08 08:50", "2030-01-10 08:50",
+                     "2030-01-11 08:50", "2030-01-12 10:00", "2030-01-14 08:50"]
+    assert manager.alarms[0]["time"] == "2030-01-07 08:50"
+
+    hourly = manager.add_alarm("water", "2030-01-07 09:00", rule="FREQ=HOURLY;INTERVAL=3;COUNT=2")
+    assert manager.next_fire(hourly["id"]) == "2030-01-07 09:00"
+    manager.check_alarms(now=parse_alarm_time("2030-01-07 12:00"))
+    manager.check_alarms(now=parse_alarm_time("2030-01-07 12:00"))
+    assert manager.next_fire(hourly["id"]) is None  # COUNT exhausted
+
+    assert not manager.add_alarm("bad", "2030-01-07 09:00", rule="FREQ=MINUTELY")
+    assert not manager.add_alarm("bad", "2030-01-07 09:00", rule="FREQ=SOMETIMES")
+    ok, error = manager.update_alarm(alarm["id"], {"rule": "FREQ=DAILY;INTERVAL=2", "exdates": []})
+    assert ok and "exdates" not in error
+    assert manager.update_alarm(alarm["id"], {"rule": "BYDAY=XX"})[1].startswith("invalid rule")
+    assert manager.update_alarm("missing", {}) == (False, None)
+
+
+def test_timer_tracks_monotonic_time():
+    now = [100.0]
+    stopwatch = Timer("1", "run", clock=lambda: now[0])
+    stopwatch.start()
+    now[0] += 5
+    stopwatch.lap()
+    stopwatch.pause()
+    now[0] += 60  # paused time is not counted
+    stopwatch.start()
+    now[0] += 2.5
+    state = stopwatch.state()
+    assert state["running"] and state["elapsed_ms"] == 7500 and state["laps_ms"] == [5000]
+
+    timer = Timer("2", "tea", kind="timer", duration=3, clock=lambda: now[0])
+    timer.start()
+    now[0] += 10
+    assert timer.elapsed() == 3 and timer.remaining() == 0
+    try:
+        timer.lap()
+        assert False, "timers have no laps"
+    except ValueError:
+        pass
+
+
+def test_timer_expires_through_the_scheduler(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    ok, error = manager.create_timer("bad", "timer", duration=0)
+    assert not ok and "duration" in error
+    ok, state = manager.create_timer("tea", "timer", duration=0.05)
+    ok, state = manager.control_timer(state["id"], "start")
+    assert ok and state["running"]
+    manager.add_alarm("later", minutes_from_now(10))
+    assert 0 < manager.next_due() <= 0.05
+    manager.control_timer(state["id"], "pause")
+    assert manager.next_due() > 9 * 60
+    manager.control_timer(state["id"], "start")
+
+    time.sleep(0.06)
+    assert manager.check_alarms() == []
+    (timer,) = manager.list_timers()
+    assert timer["finished"] and not timer["running"] and timer["elapsed_ms"] == 50
+    assert manager.next_due() > 9 * 60  # only the alarm is left
+
+    ok, error = manager.control_timer(timer["id"], "start")
+    assert not ok and "reset" in error
+    assert manager.control_timer("missing", "start") == (False, None)
+    assert manager.delete_timer(timer["id"]) and manager.list_timers() == []
+
+
+def test_malformed_recurrence_fields_are_rejected(tmp_path, monkeypatch):
+    manager = make_manager(tmp_path, monkeypatch)
+    when = minutes_from_now(30)
+    assert not manager.add_alarm("a", when, rule=5)
+    assert not manager.add_alarm("a", when, rdates=5)
+    assert not manager.add_alarm("a", when, exdates=[1])
+    assert not manager.add_alarm(["a"], when)
+
+    ok, errors = manager.add_alarms([{"name": "a", "time": when, "rule": ["FREQ=DAILY"]},
+                                     {"name": "b", "time": when, "exdates": "2025-01-01 10:00"},
+                                     {"name": {"x": 1}, "time": when}])
+    assert not ok and errors[0].startswith("rule must be") and errors[1].startswith("exdates must be")
+    assert errors[2] == "Name and time must be strings"
+
+    alarm = manager.add_alarm("a", when)
+    assert manager.update_alarm(alarm["id"], {"rdates": 5}) == (False, "rdates must be a list of YYYY-MM-DD HH:MM strings")
+    assert manager.update_alarm(alarm["id"], {"name": ["a"]}) == (False, "Name and time must be strings")
+    assert manager.update_alarm(alarm["id"], {"rule": 1})[1].startswith("rule must be")
+    assert manager.alarms == [alarm]
+
+
+def test_rules_that_never_match_are_rejected_without_scanning_the_calendar(tmp_path, monkeypatch):
+    never = "FREQ=HOURLY;BYMONTH=2;BYMONTHDAY=30"  # scans to year 9999 in dateutil
+    when = minutes_from_now(30)
+    # an alarm saved before rules were checked for occurrences
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "clock").mkdir(parents=True)
+    (tmp_path / "data" / "clock" / "alarms.json").write_text(json.dumps(
+        [{"id": "1", "name": "old", "time": when, "enabled": True, "repeat": True, "rule": never}]))
+    start = time.monotonic()
+    manager = ClockManager(socketio=None)
+    assert manager.next_fire("1") is None
+
+    ok, error = manager.update_alarm("1", {"rule": "FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30"})
+    assert not ok and error.startswith("rule has no occurrence")
+    ok, errors = manager.add_alarms([{"name": "b", "time": when, "rule": never}] * 20)
+    assert not ok and len(errors) == 20
+    assert time.monotonic() - start < 5
+
+    # a Feb 29 is at most 8 years away
+    leap = manager.add_alarm("leap", "2041-01-01 08:00", rule="FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29")
+    assert manager.next_fire(leap["id"]) == "2044-02-29 08:00"
@@ -0,0 +1,42 @@
+from backend.socket.emitter import CoalescingEmitter
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.frames = []
+        self.tasks = []
+
+    def emit(self, event, data=None, namespace=None, **kwargs):
+        self.frames.append((event, data, namespace))
+
+    def start_background_task(self, target, *args, **kwargs):
+        self.tasks.append(target)
+
+    def sleep(self, seconds=0):
+        pass
+
+
+def test_emitter_batches_in_order_and_sends_priority_events_now():
+    sio = FakeSocketIO()
+    emitter = CoalescingEmitter(sio)
+    emitter.emit("activity_logged", {"text": "a"}, namespace="/nari")
+    emitter.emit("activity_logged", {"text": "b"}, namespace="/nari")
+    emitter.emit("task_added", {"id": 1}, namespace="/nari")
+    assert sio.frames == []
+    assert len(sio.tasks) == 1  # one flush loop, however many events
+
+    emitter.emit("alarm_triggered", {"id": "x"}, namespace="/nari")
+    assert sio.frames == [
+        ("batch", {"events": [
+            {"event": "activity_logged", "items": [{"text": "a"}, {"text": "b"}]},
+            {"event": "task_added", "items": [{"id": 1}]},
+        ]}, "/nari"),
+        ("alarm_triggered", {"id": "x"}, "/nari"),
+    ]
+
+    emitter.emit("task_deleted", {"id": 1}, namespace="/nari")
+    emitter.flush()
+    assert sio.frames[-1] == ("task_deleted", {"id": 1}, "/nari")
+    stats = emitter.stats()
+    assert stats["events_in"] == 5 and stats["frames_out"] == 3
+    assert stats["coalescing_ratio"] == 1.67
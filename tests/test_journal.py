@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from modules import journal, utils
+
+
+def test_mutations_are_appended_and_replayed(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    with open(path, "w") as f:
+        json.dump({"tasks": [{"id": 1, "title": "Old"}]}, f)
+
+    log = journal.JournaledCollection(path, "tasks")
+    created = log.create({"title": "New", "status": "pending"})
+    assert created["id"] == 2
+    log.append("patch", 2, {"status": "completed"})
+    log.append("delete", 1)
+
+    # the snapshot is untouched; a fresh reader replays the journal
+    with open(path) as f:
+        assert json.load(f) == {"tasks": [{"id": 1, "title": "Old"}]}
+    reader = journal.JournaledCollection(path, "tasks")
+    assert reader.records() == [{"id": 2, "title": "New", "status": "completed"}]
+
+
+def test_compact_folds_journal_into_snapshot(tmp_path):
+    path = str(tmp_path / "notes.json")
+    log = journal.JournaledCollection(path, "notes")
+    log.create({"title": "a"})
+    log.create({"title": "b"})
+    log.append("delete", 1)
+
+    assert log.compact()
+    assert not os.path.exists(log.journal_path)
+    with open(path) as f:
+        assert json.load(f) == {"notes": [{"title": "b", "id": 2}], "last_id": 2}
+    assert log.create({"title": "c"})["id"] == 3
+
+
+def test_replay_is_idempotent_after_interrupted_compaction(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    log = journal.JournaledCollection(path, "tasks")
+    log.create({"title": "a"})
+    log.create({"title": "b"})
+    log.append("delete", 1)
+    expected = log.records()
+
+    # snapshot written but the retired journal was never removed
+    with open(path, "w") as f:
+        json.dump({"tasks": expected}, f)
+    os.replace(log.journal_path, log.journal_path + ".123")
+
+    reader = journal.JournaledCollection(path, "tasks")
+    assert reader.records() == expected
+
+
+@pytest.mark.skipif(utils.fcntl is None, reason="needs fcntl")
+def test_compaction_waits_for_an_append_in_another_process(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    log = journal.JournaledCollection(path, "tasks")
+    log.create({"title": "a"})
+    # Another process opens the journal, then writes only after a pause
+    script = (
+        "import json, time\n"
+        "from modules import utils\n"
+        f"with utils.file_lock({log.lock_path!r}):\n"
+        f"    with open({log.journal_path!r}, 'a') as f:\n"
+        "        print('opened', flush=True)\n"
+        "        time.sleep(0.3)\n"
+        "        f.write(json.dumps({'op': 'create', 'id': 2, 'data': {'title': 'b'}}) + '\\n')\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    child = subprocess.Popen([sys.executable, "-c", script], cwd=root, stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "opened"
+        assert log.compact()
+    finally:
+        child.wait(timeout=30)
+
+    reader = journal.JournaledCollection(path, "tasks")
+    assert [r["title"] for r in reader.records()] == ["a", "b"]
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from datetime import datetime, timedelta
+from backend.core.maintenance import (AutoRecovery, BACKUP_DIR, TIMESTAMP_FORMAT,
+                                      retention_policy, select_versions)
+from modules import utils
+
+
+def make_recovery(tmp_path, monkeypatch):
+    # AutoRecovery uses paths relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "clock").mkdir(parents=True)
+    return AutoRecovery()
+
+
+def object_count():
+    return sum(len(files) for _, _, files in os.walk(os.path.join(BACKUP_DIR, "objects")))
+
+
+def test_unchanged_backups_share_one_object(tmp_path, monkeypatch):
+    recovery = make_recovery(tmp_path, monkeypatch)
+    path = os.path.join("data", "clock", "alarms.json")
+    with open(path, "w") as f:
+        f.write('[{"id": "1"}]')
+
+    for _ in range(3):
+        recovery.create_backup(path)
+    assert object_count() == 1
+    versions = recovery.store.versions(path)
+    assert len(versions) == 3 and len({v["hash"] for v in versions}) == 1
+
+    with open(path, "w") as f:
+        f.write('[{"id": "2"}]')
+    recovery.create_backup(path)
+    assert object_count() == 2
+
+    # Same file name elsewhere gets its own manifest
+    os.makedirs(os.path.join("data", "other"))
+    other = os.path.join("data", "other", "alarms.json")
+    with open(other, "w") as f:
+        f.write('[{"id": "1"}]')
+    recovery.create_backup(other)
+    assert object_count() == 2 and len(recovery.store.versions(other)) == 1
+
+    with open(path, "w") as f:
+        f.write("garbage")
+    assert recovery.restore_from_backup(path)
+    with open(path) as f:
+        assert f.read() == '[{"id": "2"}]'
+
+
+def test_restore_skips_damaged_objects_and_falls_back_to_folders(tmp_path, monkeypatch):
+    recovery = make_recovery(tmp_path, monkeypatch)
+    path = os.path.join("data", "clock", "alarms.json")
+    for content in ("[1]", "[2]"):
+        with open(path, "w") as f:
+            f.write(content)
+        recovery.create_backup(path)
+    newest = recovery.store.versions(path)[-1]["hash"]
+    with open(recovery.store.object_path(newest), "w") as f:
+        f.write("[3]")
+    assert recovery.restore_from_backup(path)
+    with open(path) as f:
+        assert f.read() == "[1]"
+
+    # Old timestamp-folder backups still restore
+    legacy = os.path.join(BACKUP_DIR, "20251202_144907")
+    os.makedirs(legacy)
+    with open(os.path.join(legacy, "automation.json"), "w") as f:
+        f.write("[]")
+    automation = os.path.join("data", "automation.json")
+    assert recovery.restore_from_backup(automation)
+    with open(automation) as f:
+        assert f.read() == "[]"
+    assert not recovery.restore_from_backup(os.path.join("data", "missing.json"))
+
+
+def test_retention_keeps_last_hourly_and_daily():
+    now = datetime(2025, 12, 31, 12, 0)
+    # one version every 20 minutes for 60 days
+    entries = [{"time": (now - timedelta(minutes=20 * i)).strftime(TIMESTAMP_FORMAT), "hash": str(i)}
+               for i in range(60 * 72)][::-1]
+    kept = select_versions(entries, {"last": 5, "hourly": 24, "daily": 30}, now=now)
+    times = [datetime.strptime(e["time"], TIMESTAMP_FORMAT) for e in kept]
+    assert kept[-5:] == entries[-5:]
+    assert times == sorted(times)
+    assert len({t.strftime("%Y%m%d%H") for t in times if now - t <= timedelta(hours=24)}) == 25
+    assert min(times) >= now - timedelta(days=30)
+    # 25 hourly + 2 more of the last 5 (11:20, 11:00) + Dec 1..29 at 23:40
+    assert len(kept) == 25 + 2 + 29
+
+    assert retention_policy("last=3, daily=7,bogus=1,hourly=x") == {"last": 3, "hourly": 24, "daily": 7}
+    assert retention_policy("") == {"last": 10, "hourly": 24, "daily": 30}
+
+
+def test_prune_imports_legacy_folders_and_drops_unreferenced_objects(tmp_path, monkeypatch):
+    recovery = make_recovery(tmp_path, monkeypatch)
+    for day in range(1, 21):
+        folder = os.path.join(BACKUP_DIR, f"202501{day:02d}_080000")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "alarms.json"), "w") as f:
+            f.write(f"[{day}]")
+
+    assert recovery.store.prune({"last": 3, "hourly": 0, "daily": 0}) == (17, 17)
+    assert not any(name.startswith("2025") for name in os.listdir(BACKUP_DIR))
+    assert object_count() == 3
+
+    path = os.path.join("data", "clock", "alarms.json")
+    with open(path, "w") as f:
+        f.write("broken")
+    assert recovery.restore_from_backup(path)
+    with open(path) as f:
+        assert f.read() == "[20]"
+    # the restored content is backed up under the file's own manifest now
+    recovery.create_backup(path)
+    assert recovery.store.prune({"last": 3, "hourly": 0, "daily": 0}) == (0, 0)
+    assert object_count() == 3 and len(recovery.store.versions(path)) == 1
+
+
+@pytest.mark.skipif(utils.fcntl is None, reason="needs fcntl")
+def test_backups_wait_for_a_prune_in_another_process(tmp_path, monkeypatch):
+    recovery = make_recovery(tmp_path, monkeypatch)
+    path = os.path.join("data", "clock", "alarms.json")
+    with open(path, "w") as f:
+        f.write("[]")
+    # Stands in for scripts/prune_backups.py holding the store
+    script = (
+        "import time\n"
+        "from backend.core.maintenance import AutoRecovery\n"
+        "with AutoRecovery().store._locked():\n"
+        "    print('locked', flush=True)\n"
+        "    time.sleep(0.5)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    child = subprocess.Popen([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                             stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "locked"
+        start = time.monotonic()
+        recovery.create_backup(path)
+        assert time.monotonic() - start >= 0.3
+    finally:
+        child.wait(timeout=30)
+    assert len(recovery.store.versions(path)) == 1
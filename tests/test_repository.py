@@ -0,0 +1,106 @@
+import os
+from modules import utils, storage, repository
+
+
+def point_utils_at(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    monkeypatch.setattr(utils, "TASKS_FILE", os.path.join(data_dir, "tasks.json"))
+    monkeypatch.setattr(utils, "NOTES_FILE", os.path.join(data_dir, "notes.json"))
+
+
+def test_repository_keeps_index_in_sync(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    repo = repository.Repository("tasks", storage.JsonBackend())
+
+    a = repo.insert({"title": "a"})
+    b = repo.insert({"title": "b"})
+    c = repo.insert({"title": "c"})
+    assert repo.update(b["id"], {"status": "completed"})["status"] == "completed"
+    assert repo.delete(a["id"])
+    assert not repo.delete(a["id"])
+    assert repo.update(a["id"], {"title": "gone"}) is None
+    assert [t["title"] for t in repo.all()] == ["b", "c"]
+    assert repo.get(c["id"]) == c
+
+
+def test_repository_reloads_after_external_write(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    server = repository.Repository("notes", storage.JsonBackend())
+    server.insert({"title": "from server"})
+    assert len(server.all()) == 1
+
+    # a second process writing through its own journal reader
+    from modules import journal
+    other = journal.JournaledCollection(utils.NOTES_FILE, "notes")
+    other.create({"title": "from cli"})
+
+    assert [n["title"] for n in server.all()] == ["from server", "from cli"]
+
+
+def test_repository_apply_is_all_or_nothing(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    repo = repository.Repository("tasks", storage.JsonBackend())
+    first = repo.insert({"title": "first"})
+
+    ok, errors = repo.apply([
+        {"op": "create", "data": {"title": "never"}},
+        {"op": "patch", "id": 99, "data": {"status": "completed"}},
+    ])
+    assert not ok
+    assert errors == [None, "not found"]
+    assert [t["title"] for t in repo.all()] == ["first"]
+
+    ok, results = repo.apply([
+        {"op": "create", "data": {"title": "second"}},
+        {"op": "patch", "id": first["id"], "data": {"status": "completed"}},
+        {"op": "delete", "id": first["id"]},
+    ])
+    assert ok
+    assert results[0]["title"] == "second"
+    assert results[1]["status"] == "completed"
+    assert results[2] is None
+    assert [t["title"] for t in repo.all()] == ["second"]
+
+
+def test_repository_query_uses_indexes_and_pages(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    repo = repository.Repository("tasks", storage.JsonBackend(), ("status", "priority"), ("due",))
+    for i in range(10):
+        repo.insert({"title": f"t{i}", "status": "pending", "priority": "high" if i % 2 else "normal",
+                     "due": f"2026-01-{10 - i:02d}" if i < 8 else None})
+    repo.update(1, {"status": "completed"})  # t0
+
+    page, position = repo.query({"priority": "high"}, limit=2)
+    assert [t["title"] for t in page] == ["t1", "t3"]
+    page, position = repo.query({"priority": "high"}, limit=2, after=position)
+    assert [t["title"] for t in page] == ["t5", "t7"]
+    page, position = repo.query({"priority": "high"}, limit=2, after=position)
+    assert [t["title"] for t in page] == ["t9"] and position is None
+
+    # tasks without a due date sort last
+    page, _ = repo.query({"status": "pending"}, sort="due")
+    assert [t["title"] for t in page] == ["t7", "t6", "t5", "t4", "t3", "t2", "t1", "t8", "t9"]
+
+    page, _ = repo.query(ranges={"due": ("2026-01-04", "2026-01-08")}, sort="due", descending=True)
+    assert [t["due"] for t in page] == ["2026-01-07", "2026-01-06", "2026-01-05"]
+
+    repo.delete(6)  # t5
+    repo.update(3, {"priority": "high"})  # t2
+    page, _ = repo.query({"priority": "high", "status": "pending"})
+    assert [t["title"] for t in page] == ["t1", "t2", "t3", "t7", "t9"]
+
+
+def test_build_operations_rejects_non_object_data():
+    def new_record(data):
+        return dict(data), (None if data.get("title") else "title is required")
+
+    ok, errors = repository.build_operations([{"op": "create", "data": ["title"]},
+                                   {"op": "update", "id": 1, "data": "done"},
+                                   {"op": "delete", "id": 2}], new_record, dict)
+    assert not ok and errors == ["data must be an object", "data must be an object", None]
+
+    ok, operations = repository.build_operations([{"op": "update", "id": "3", "data": {"status": "done"}},
+                                       {"op": "delete", "id": 4, "data": None}], new_record, dict)
+    assert ok and operations == [{"op": "patch", "id": 3, "data": {"status": "done"}}, {"op": "delete", "id": 4}]
@@ -0,0 +1,64 @@
+import os
+from datetime import datetime
+import pytest
+from modules import utils, storage, session_columns
+from modules.study_manager import StudyManager
+
+
+SESSIONS = [
+    {"date": "2026-03-02", "subject": "physics", "start_time": "09:00", "elapsed_minutes": 50},
+    {"date": "2026-03-02", "subject": "maths", "start_time": "09:30", "elapsed_minutes": 20},
+    {"date": "2026-03-09", "subject": "physics", "start_time": "18:10", "elapsed_minutes": 30},
+    {"date": "2026-04-01", "subject": "maths", "start_time": None, "elapsed_minutes": 5},
+]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_group_by_reductions(monkeypatch, vectorized):
+    if vectorized and session_columns.np is None:
+        pytest.skip("numpy not installed")
+    if not vectorized:
+        monkeypatch.setattr(session_columns, "np", None)
+    columns = session_columns.SessionColumns(SESSIONS)
+    assert columns.names == ["physics", "maths"]
+
+    assert columns.totals("2026-03-01", "2026-03-31", "day") == {
+        "2026-03-02": {"minutes": 70, "sessions": 2, "longest": 50},
+        "2026-03-09": {"minutes": 30, "sessions": 1, "longest": 30}}
+    assert columns.totals(group_by="subject") == {
+        "physics": {"minutes": 80, "sessions": 2, "longest": 50},
+        "maths": {"minutes": 25, "sessions": 2, "longest": 20}}
+    # the session without a start time has no hour
+    assert columns.totals(group_by="hour") == {
+        9: {"minutes": 70, "sessions": 2, "longest": 50},
+        18: {"minutes": 30, "sessions": 1, "longest": 30}}
+    assert columns.totals("2026-05-01", None, "subject") == {}
+
+
+def test_view_follows_study_manager(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    monkeypatch.setattr(storage, "_backend", storage.JsonBackend())
+    mgr = StudyManager()
+    mgr.save_session("physics", datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 50))
+    assert len(session_columns.get_columns()) == 1
+
+    view = session_columns.get_columns()
+    assert view.totals(group_by="hour") == {9: {"minutes": 50, "sessions": 1, "longest": 50}}
+    mgr.save_session("maths", datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 10, 20))
+    # extended in place, not rebuilt from storage
+    assert session_columns.get_columns() is view
+    assert view.totals(group_by="subject")["maths"]["minutes"] == 20
+    assert view.totals(group_by="hour")[10]["sessions"] == 1
+
+    physics = next(s for s in mgr.get_all_sessions() if s["subject"] == "physics")
+    mgr.delete_session(physics["id"])
+    assert list(session_columns.get_columns().totals(group_by="subject")) == ["maths"]
+
+    # a view rebuilt between storing a session and adding it counts it once
+    session_columns.invalidate()
+    record = storage.get_backend().insert("sessions", {"date": "2026-03-03", "subject": "art", "elapsed_minutes": 5})
+    session_columns.get_columns()
+    session_columns.add(record)
+    assert session_columns.get_columns().totals(group_by="subject")["art"]["sessions"] == 1
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from datetime import datetime
+from flask import Flask, request
+from modules import utils, storage
+from modules.study_manager import StudyManager
+from backend import session_manager
+
+
+def isolate(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    monkeypatch.setattr(storage, "_backend", storage.JsonBackend())
+    monkeypatch.setattr(session_manager, "_sessions", {})
+
+
+def test_owners_have_independent_sessions(tmp_path, monkeypatch):
+    isolate(tmp_path, monkeypatch)
+    assert session_manager.start_session("physics", "alice")[0]
+    assert session_manager.start_session("maths", "bob")[0]
+    assert session_manager.start_session("chemistry", "alice") == (False, "session_already_running")
+    assert [s["owner"] for s in session_manager.list_sessions()] == ["alice", "bob"]
+
+    ok, result = session_manager.stop_session(owner="alice")
+    assert ok and result["subject"] == "physics" and result["saved"]["subject"] == "physics"
+    assert session_manager.get_status("alice") is None
+    assert session_manager.get_status("bob")["subject"] == "maths"
+    assert [s["subject"] for s in storage.get_backend().all("sessions")] == ["physics"]
+
+
+def test_concurrent_stops_save_once(tmp_path, monkeypatch):
+    isolate(tmp_path, monkeypatch)
+    session_manager.start_session("physics", "alice")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(session_manager.stop_session(owner="alice")[0]))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == [False] * 7 + [True]
+    assert len(storage.get_backend().all("sessions")) == 1
+
+
+def test_study_manager_shares_the_registry(tmp_path, monkeypatch):
+    isolate(tmp_path, monkeypatch)
+    mgr = StudyManager()
+    assert mgr.start_session({"subject": "physics"})["status"] == "active"
+    # the backend API and the CLI see the session started through StudyManager
+    assert session_manager.get_status()["subject"] == "physics"
+    assert StudyManager().start_session({"subject": "maths"}) is None
+    assert mgr.stop_active_session()["subject"] == "physics"
+    assert session_manager.get_status() is None
+
+
+def test_owner_from_request():
+    app = Flask(__name__)
+    with app.test_request_context(headers={"X-NARI-Device": "tablet"}):
+        assert session_manager.owner_from(request) == "tablet"
+    with app.test_request_context(json={"subject": "x", "user": "alice"}, headers={"X-NARI-Device": "tablet"}):
+        assert session_manager.owner_from(request) == "alice"
+    with app.test_request_context():
+        assert session_manager.owner_from(request) == session_manager.DEFAULT_OWNER
+
+
+def test_sessions_are_saved_in_local_time(tmp_path, monkeypatch):
+    isolate(tmp_path, monkeypatch)
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+    time.tzset()
+    try:
+        session_manager.start_session("physics", "alice")
+        # 20:00-21:00 UTC is 01:30-02:30 IST on the next day
+        session_manager.get_session("alice").start_time = datetime(2026, 3, 2, 20, 0)
+        monkeypatch.setattr(session_manager, "datetime", type("FakeDatetime", (datetime,), {
+            "utcnow": staticmethod(lambda: datetime(2026, 3, 2, 21, 0))}))
+        ok, result = session_manager.stop_session(owner="alice")
+        assert ok and result["start"] == "2026-03-02T20:00:00Z"
+        (saved,) = storage.get_backend().all("sessions")
+        assert (saved["date"], saved["start_time"], saved["end_time"]) == ("2026-03-03", "01:30", "02:30")
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+from modules import utils, storage, session_partitions
+
+
+def point_utils_at(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    os.makedirs(utils.LOGS_DIR)
+
+
+def write(path, doc):
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+def test_legacy_logs_are_split_by_month(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    march = {"date": "2026-03-02", "subject": "physics", "start_time": "09:00",
+             "end_time": "09:50", "elapsed_minutes": 50}
+    april = {"date": "2026-04-01", "subject": "maths", "start_time": "10:00",
+             "end_time": "10:20", "elapsed_minutes": 20}
+    write(os.path.join(utils.LOGS_DIR, "master.json"), {"sessions": [dict(march, id=7), april], "last_id": 7})
+    # The daily mirror repeats the March session and holds one master.json missed
+    write(os.path.join(utils.LOGS_DIR, "2026-03-02.json"), {"date": "2026-03-02", "sessions": [
+        {k: v for k, v in march.items() if k != "date"},
+        {"subject": "chemistry", "start_time": "11:00", "end_time": "11:15", "elapsed_minutes": 15}]})
+
+    store = session_partitions.SessionPartitions()
+    assert store.months() == ["2026-03", "2026-04"]
+    assert sorted((s["id"], s["subject"]) for s in store.all()) == [(7, "physics"), (8, "maths"), (9, "chemistry")]
+    assert store.last_id() == 9
+    assert sorted(os.listdir(os.path.join(utils.LOGS_DIR, "legacy"))) == ["2026-03-02.json", "master.json"]
+    assert session_partitions.migrate_legacy() == {}
+
+
+def test_range_reads_open_only_their_months(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    store = session_partitions.SessionPartitions()
+    for day in ("2026-01-15", "2026-02-03", "2026-02-20", "2026-03-01"):
+        store.insert({"date": day, "subject": "physics", "elapsed_minutes": 10})
+
+    opened = []
+    load = store._load
+    monkeypatch.setattr(store, "_load", lambda month: opened.append(month) or load(month))
+    assert [s["date"] for s in store.between("2026-02-01", "2026-02-10")] == ["2026-02-03"]
+    assert opened == ["2026-02"]
+
+
+def test_update_moves_session_between_months(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    backend = storage.JsonBackend()
+    first = backend.insert("sessions", {"date": "2026-01-31", "subject": "maths"})
+    second = backend.insert("sessions", {"date": "2026-01-02", "subject": "physics"})
+
+    moved = backend.update("sessions", first["id"], {"date": "2026-02-01"})
+    assert moved == {"id": first["id"], "date": "2026-02-01", "subject": "maths"}
+    assert [s["id"] for s in backend.sessions_between("2026-02-01", "2026-02-28")] == [first["id"]]
+    assert [s["id"] for s in backend.sessions_between("2026-01-01", "2026-01-31")] == [second["id"]]
+    assert backend.get("sessions", first["id"])["date"] == "2026-02-01"
+
+    assert backend.delete("sessions", second["id"])
+    assert session_partitions.SessionPartitions().months() == ["2026-02"]
+    assert backend.insert("sessions", {"date": "2026-02-02"})["id"] == 3
+
+
+def test_processes_saving_at_once_get_distinct_ids(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    # e.g. `study stop` in the CLI while the server saves a session
+    script = (
+        "import sys\n"
+        "from modules import utils, session_partitions\n"
+        f"utils.LOGS_DIR = {utils.LOGS_DIR!r}\n"
+        "store = session_partitions.SessionPartitions()\n"
+        "for i in range(30):\n"
+        "    store.insert({'date': '2026-03-02', 'subject': sys.argv[1], 'elapsed_minutes': i})\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    children = [subprocess.Popen([sys.executable, "-c", script, name], cwd=root) for name in ("a", "b")]
+    store = session_partitions.SessionPartitions()
+    for i in range(30):
+        store.insert({"date": "2026-03-02", "subject": "c", "elapsed_minutes": i})
+    for child in children:
+        assert child.wait(timeout=60) == 0
+
+    sessions = store.all()
+    assert len(sessions) == 90
+    assert sorted(s["id"] for s in sessions) == list(range(1, 91))
+    assert store.last_id() == 90
@@ -0,0 +1,74 @@
+import json
+import os
+from modules import utils, storage
+
+
+def point_utils_at(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    monkeypatch.setattr(utils, "SUBJECTS_FILE", os.path.join(data_dir, "subjects.json"))
+    monkeypatch.setattr(utils, "TASKS_FILE", os.path.join(data_dir, "tasks.json"))
+    monkeypatch.setattr(utils, "NOTES_FILE", os.path.join(data_dir, "notes.json"))
+    return data_dir
+
+
+def test_sqlite_backend_crud(tmp_path):
+    backend = storage.SQLiteBackend(str(tmp_path / "nari.db"))
+
+    task = backend.insert("tasks", {"title": "Read", "status": "pending"})
+    assert task["id"] == 1
+    assert backend.get("tasks", 1) == task
+
+    updated = backend.update("tasks", 1, {"status": "completed"})
+    assert updated["status"] == "completed"
+    assert backend.all("tasks") == [updated]
+
+    assert backend.delete("tasks", 1)
+    assert not backend.delete("tasks", 1)
+    # AUTOINCREMENT never hands out a deleted id again
+    assert backend.insert("tasks", {"title": "Next"})["id"] == 2
+
+    assert backend.insert("subjects", "Physics") == {"name": "Physics"}
+    assert backend.insert("subjects", "Physics") is None
+    backend.insert("subjects", "Maths")
+    assert backend.update("subjects", "Physics", {"name": "Maths"}) is None
+    backend.update("subjects", "Physics", {"name": "Chemistry"})
+    assert backend.all("subjects") == ["Chemistry", "Maths"]
+    backend.close()
+
+
+def test_migrate_from_json_keeps_ids(tmp_path, monkeypatch):
+    data_dir = point_utils_at(tmp_path, monkeypatch)
+    os.makedirs(os.path.join(data_dir, "logs"))
+    with open(utils.TASKS_FILE, "w") as f:
+        json.dump({"tasks": [{"id": 4, "title": "A"}, {"id": 9, "title": "B"}], "last_id": 12}, f)
+    with open(utils.SUBJECTS_FILE, "w") as f:
+        json.dump({"subjects": ["Physics"]}, f)
+    with open(os.path.join(utils.LOGS_DIR, "master.json"), "w") as f:
+        json.dump({"sessions": [{"date": "2025-11-09", "subject": "Physics", "elapsed_minutes": 5}]}, f)
+
+    backend = storage.SQLiteBackend(str(tmp_path / "nari.db"))
+    counts = storage.migrate_from_json(backend)
+    assert counts == {"tasks": 2, "notes": 0, "sessions": 1, "subjects": 1}
+    assert [t["id"] for t in backend.all("tasks")] == [4, 9]
+    # ids deleted before the migration are not handed out again
+    assert backend.insert("tasks", {"title": "C"})["id"] == 13
+    assert backend.get("sessions", 1)["subject"] == "Physics"
+
+    # a second run must not duplicate anything
+    assert storage.migrate_from_json(backend)["tasks"] == 0
+    backend.close()
+
+
+def test_json_backend_never_reuses_ids(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    backend = storage.JsonBackend()
+
+    for collection in ("tasks", "sessions"):
+        first = backend.insert(collection, {"title": "a", "date": "2026-01-01"})
+        second = backend.insert(collection, {"title": "b", "date": "2026-01-01"})
+        assert backend.delete(collection, second["id"])
+        third = backend.insert(collection, {"title": "c", "date": "2026-01-01"})
+        assert (first["id"], second["id"], third["id"]) == (1, 2, 3)
+        assert backend.last_id(collection) == 3
@@ -0,0 +1,108 @@
+import json
+import os
+import pytest
+from datetime import date, datetime
+from modules import utils, storage, study_stats
+from modules.study_manager import StudyManager
+
+
+def point_utils_at(tmp_path, monkeypatch):
+    data_dir = str(tmp_path / "data")
+    monkeypatch.setattr(utils, "DATA_DIR", data_dir)
+    monkeypatch.setattr(utils, "LOGS_DIR", os.path.join(data_dir, "logs"))
+    monkeypatch.setattr(storage, "_backend", storage.JsonBackend())
+
+
+def test_stats_follow_saves_and_deletes(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    mgr = StudyManager()
+    mgr.save_session("physics", datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 50))
+    mgr.save_session("maths", datetime(2026, 3, 2, 10, 0), datetime(2026, 3, 2, 10, 20))
+    mgr.save_session("physics", datetime(2026, 3, 9, 9, 0), datetime(2026, 3, 9, 9, 30))
+
+    stats = study_stats.get_stats()
+    by_day = stats.query("2026-03-01", "2026-03-31")
+    assert [(g["key"], g["minutes"], g["sessions"], g["longest"]) for g in by_day["groups"]] == [
+        ("2026-03-02", 70, 2, 50), ("2026-03-09", 30, 1, 30)]
+    assert by_day["total"] == {"minutes": 100, "sessions": 3, "longest": 50}
+    assert [g["key"] for g in stats.query(group_by="week")["groups"]] == ["2026-W10", "2026-W11"]
+    by_subject = stats.query(group_by="subject")["groups"]
+    assert [(g["key"], g["minutes"]) for g in by_subject] == [("physics", 80), ("maths", 20)]
+
+    longest = next(s for s in mgr.get_all_sessions() if s["elapsed_minutes"] == 50)
+    mgr.delete_session(longest["id"])
+    assert stats.query("2026-03-02", "2026-03-02")["total"] == {"minutes": 20, "sessions": 1, "longest": 20}
+
+    # a fresh process reads the precomputed file instead of the sessions
+    utils.flush()
+    assert study_stats.StudyStats().query()["total"]["minutes"] == 50
+
+
+def test_heatmap_and_streak(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    mgr = StudyManager()
+    for day in (1, 2, 3, 10, 11):
+        mgr.save_session("physics", datetime(2026, 3, day, 9, 0), datetime(2026, 3, day, 9, day))
+
+    stats = study_stats.get_stats()
+    heatmap = stats.heatmap(2026)
+    assert len(heatmap) == 366 and heatmap[-1] is None
+    assert heatmap[31 + 28] == 1 and heatmap[31 + 28 + 9] == 10 and sum(heatmap[:-1]) == 27
+    assert len(study_stats.StudyStats().heatmap(2028)) == 366  # leap year: all days real
+
+    assert stats.streak(date(2026, 3, 12)) == {"current": 2, "longest": 3, "last_day": "2026-03-11"}
+    assert stats.streak(date(2026, 3, 13))["current"] == 0
+    # deleting a day breaks the run
+    third = next(s for s in mgr.get_all_sessions() if s["date"] == "2026-03-02")
+    mgr.delete_session(third["id"])
+    assert stats.streak(date(2026, 3, 11))["longest"] == 2
+
+
+def test_stats_reload_after_another_process_writes(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    mgr = StudyManager()
+    mgr.save_session("physics", datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 50))
+    stats = study_stats.get_stats()
+    assert stats.query()["total"]["minutes"] == 50
+    utils.flush()
+
+    # e.g. the CLI saved a session: it rewrites stats.json behind our back
+    with open(stats.path) as f:
+        doc = json.load(f)
+    doc["days"]["2026-03-03"] = {"minutes": 20, "sessions": 1, "longest": 20, "subjects": {}}
+    with open(stats.path, "w") as f:
+        json.dump(doc, f)
+
+    assert stats.query()["total"]["minutes"] == 70
+    assert stats.streak(date(2026, 3, 3))["current"] == 2
+
+
+def test_sessions_with_bad_dates_are_left_out(tmp_path, monkeypatch):
+    point_utils_at(tmp_path, monkeypatch)
+    mgr = StudyManager()
+    mgr.save_session("physics", datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 2, 9, 50))
+    # legacy rows with dates that were never checked
+    store = storage.get_backend()
+    store.insert("sessions", {"date": "2026-3-3", "subject": "maths", "elapsed_minutes": 5})
+    store.insert("sessions", {"date": None, "subject": "maths", "elapsed_minutes": 5})
+
+    stats = study_stats.StudyStats()
+    stats.rebuild()
+    assert stats.query(group_by="week")["total"]["minutes"] == 50
+    assert stats.streak(date(2026, 3, 3))["current"] == 1
+    assert sum(stats.heatmap(2026)[:-1]) == 50
+
+    # a stats.json written before dates were checked
+    utils.flush()
+    with open(stats.path) as f:
+        doc = json.load(f)
+    doc["days"]["2026-3-3"] = {"minutes": 5, "sessions": 1, "longest": 5, "subjects": {}}
+    with open(stats.path, "w") as f:
+        json.dump(doc, f)
+    assert stats.streak(date(2026, 3, 3))["current"] == 1
+    assert stats.query(group_by="week")["total"]["minutes"] == 50
+
+    session = mgr.get_all_sessions()[0]
+    with pytest.raises(ValueError):
+        mgr.update_session(session["id"], {"date": "2025-1-5"})
+    assert mgr.get_session(session["id"])["date"] == "2026-03-02"
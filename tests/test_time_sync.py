@@ -0,0 +1,18 @@
+import time
+from backend.socket import socketio, _app, NAMESPACE
+import backend.socket.events  # noqa: F401  registers the handlers
+
+
+def test_time_sync_ack_carries_server_times():
+    client = socketio.test_client(_app, namespace=NAMESPACE)
+    t0 = time.time() * 1000
+    reply = client.emit("time_sync", {"t0": t0}, namespace=NAMESPACE, callback=True)
+    t3 = time.time() * 1000
+    assert reply["t0"] == t0
+    assert t0 <= reply["t1"] <= reply["t2"] <= t3
+    # offset and round trip as the client computes them
+    offset = ((reply["t1"] - t0) + (reply["t2"] - t3)) / 2
+    assert abs(offset) < 1000 and (t3 - t0) - (reply["t2"] - reply["t1"]) >= 0
+
+    assert client.emit("time_sync", None, namespace=NAMESPACE, callback=True)["t0"] is None
+    client.disconnect(namespace=NAMESPACE)
@@ -0,0 +1,128 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+from modules import utils
+
+
+def test_load_json_reuses_parsed_document(tmp_path):
+    path = str(tmp_path / "doc.json")
+    with open(path, "w") as f:
+        json.dump({"tasks": [{"id": 1}]}, f)
+
+    first = utils.load_json(path)
+    second = utils.load_json(path)
+    assert first == {"tasks": [{"id": 1}]}
+    assert first is second
+
+
+def test_load_json_reparses_after_external_change(tmp_path):
+    path = str(tmp_path / "doc.json")
+    with open(path, "w") as f:
+        json.dump({"tasks": []}, f)
+    assert utils.load_json(path) == {"tasks": []}
+
+    # simulate another process (e.g. the CLI) rewriting the file
+    with open(path, "w") as f:
+        json.dump({"tasks": [{"id": 7}]}, f)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert utils.load_json(path) == {"tasks": [{"id": 7}]}
+
+
+def test_save_json_updates_cache(tmp_path):
+    path = str(tmp_path / "doc.json")
+    data = {"notes": [{"id": 1, "title": "a"}]}
+    utils.save_json(path, data)
+    assert utils.load_json(path) is data
+
+    utils.flush()
+    os.remove(path)
+    assert utils.load_json(path) == {}
+
+
+def test_save_json_coalesces_bursts(tmp_path):
+    path = str(tmp_path / "activity.json")
+    before = utils.write_stats()
+    for i in range(5):
+        utils.save_json(path, {"activity": list(range(i))})
+
+    # reads see the latest state before anything hits the disk
+    assert utils.load_json(path) == {"activity": [0, 1, 2, 3]}
+    utils.flush(path)
+    with open(path) as f:
+        assert json.load(f) == {"activity": [0, 1, 2, 3]}
+
+    after = utils.write_stats()
+    assert after["coalesced"] - before["coalesced"] >= 4
+    assert after["written"] - before["written"] <= 2
+
+
+def test_document_version_moves_on_save(tmp_path):
+    path = str(tmp_path / "subjects.json")
+    before = utils.document_version(path)
+    utils.save_json(path, {"subjects": ["Physics"]})
+    # changes before the flusher has written anything
+    pending = utils.document_version(path)
+    assert pending != before
+    utils.flush(path)
+    assert utils.document_version(path) != pending
+    assert utils.document_version(path) == utils.document_version(path)
+
+
+def test_activity_log_is_served_from_memory(tmp_path, monkeypatch):
+    path = str(tmp_path / "activity_log.json")
+    monkeypatch.setattr(utils, "ACTIVITY_LOG_FILE", path)
+    monkeypatch.setattr(utils, "_activity", None)
+    monkeypatch.setattr(utils, "ACTIVITY_LIMIT", 3)
+    with open(path, "w") as f:
+        json.dump({"activity": [{"text": "old"}]}, f)
+
+    before = utils.write_stats()["written"]
+    for i in range(4):
+        utils.log_user_activity(f"entry {i}")
+    assert [e["text"] for e in utils.get_activity_log()] == ["entry 1", "entry 2", "entry 3"]
+
+    utils.flush()
+    with open(path) as f:
+        assert [e["text"] for e in json.load(f)["activity"]] == ["entry 1", "entry 2", "entry 3"]
+    assert utils.write_stats()["written"] - before <= 2
+
+
+def test_sigterm_flushes_pending_writes(tmp_path):
+    target = tmp_path / "doc.json"
+    script = (
+        "import os, signal, time\n"
+        "from modules import utils\n"
+        "utils.FLUSH_INTERVAL_MS = 60000\n"
+        "utils.install_signal_flush()\n"
+        f"utils.save_json({str(target)!r}, {{'saved': True}})\n"
+        "os.kill(os.getpid(), signal.SIGTERM)\n"
+        "time.sleep(5)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, timeout=30, capture_output=True)
+    assert result.returncode == -signal.SIGTERM  # still dies from the signal
+    assert json.loads(target.read_text()) == {"saved": True}
+
+
+def test_pending_writes_are_snapshots_and_survive_failed_writes(tmp_path):
+    path = str(tmp_path / "doc.json")
+    doc = {"items": [1]}
+    utils.save_json(path, doc)
+    doc["items"].append(2)  # changed after saving, without saving again
+    utils.flush(path)
+    with open(path) as f:
+        assert json.load(f) == {"items": [1]}
+
+    # Both write attempts fail while a directory is in the way
+    blocked = tmp_path / "blocked.json"
+    blocked.mkdir()
+    utils.save_json(str(blocked), {"items": [3]})
+    utils.flush(str(blocked))
+    assert utils.load_json(str(blocked)) == {"items": [3]}  # still pending
+    blocked.rmdir()
+    utils.flush(str(blocked))
+    assert json.loads(blocked.read_text()) == {"items": [3]}